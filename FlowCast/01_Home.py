@@ -1,4 +1,6 @@
 import streamlit as st
+from flowcast.assets import inject_css
+from flowcast.images import show_image
 
 # Define images
 IMAGE1 = "media/boat1.jpg"
@@ -18,171 +20,10 @@ st.set_page_config(
     },
 )
 
-# Custom CSS for Responsive Images and Rounded Corners
-st.markdown(
-    """
-    <style>
-        .responsive-image {
-            max-width: 100%; /* Ensures the image fits the container width */
-            height: auto;    /* Maintains aspect ratio */
-            border-radius: 20px; /* Rounded corners */
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2); /* Optional shadow for enhanced appearance */
-        }
-        .image-container {
-            text-align: center; /* Centers the image in its container */
-            margin: 20px 0; /* Adds spacing around the image */
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
+# Shared and page styles (assets/css), served as a cached static stylesheet
+inject_css("home")
 
-# Custom CSS for Styling and Sidebar
-st.markdown(
-    """
-    <style>
-        /* General Styles */
-        body {
-            margin: 0;
-            padding: 0;
-        }
-        .section-header {
-            font-size: 2.5rem;
-            text-align: center;
-            margin-top: 50px;
-            margin-bottom: 20px;
-            color: #005f73;
-            font-family: "Consolas", monospace;
-        }
-        .divider {
-            border-top: 1px solid #ccc;
-            margin: 30px 0;
-        }
-        /* Hero Section */
-        .hero-section {
-            position: relative;
-            background: linear-gradient(135deg, rgba(0, 95, 115, 0.9), rgba(10, 147, 150, 0.9)), url('');
-            background-size: cover;
-            background-position: center;
-            color: white;
-            text-align: center;
-            padding: 100px 20px;
-            border-radius: 10px;
-            animation: fadeIn 1.5s ease-in-out;
-            margin-bottom: 0; /* Removes the light gray gap */
-            font-family: "Consolas", monospace;
-        }
-        .hero-title {
-            font-size: 3.5rem;
-            font-weight: bold;
-            margin-bottom: 15px;
-            color: white;
-            font-family: "Consolas", monospace;
-        }
-        .hero-subtitle {
-            font-size: 1.5rem;
-            margin-bottom: 40px;
-            font-family: "Consolas", monospace;
-        }
-        .button-container a {
-            text-decoration: none;
-        }
-        .button-container button {
-            margin: 0 10px;
-            padding: 12px 30px;
-            font-size: 1rem;
-            color: white;
-            background-color: #0a9396;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: transform 0.3s ease-in-out, background-color 0.3s;
-        }
-        .button-container button:hover {
-            background-color: white;
-            color: #005f73;
-            transform: scale(1.05);
-        }
-        /* Cards */
-        .card {
-            background: white;
-            padding: 20px;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-            transition: transform 0.3s ease-in-out, box-shadow 0.3s;
-        }
-        .card:hover {
-            transform: translateY(-10px);
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3);
-        }
-        .card img {
-            border-radius: 15px;
-            width: 100%;
-        }
-        .card p {
-            margin-top: 10px;
-            font-family: "Consolas", monospace;
-        }
-        /* Animation */
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-                transform: translateY(20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        /* Sidebar Styling--main sidebar */
-        [data-testid="stSidebar"] {
-            background-color: #0a9396; /* Match the lighter blue from the banner gradient */
-            color: black;
-            padding: 20px;
-            font-family: "Consolas", monospace;
-        }
 
-        [data-testid="stSidebar"] h3 {
-            color: white;
-            font-weight: bold;
-            margin-bottom: 20px;
-        }
-
-        [data-testid="stSidebar"] label {
-            font-size: 1rem;
-            color: white;
-        }
-
-        [data-testid="stSidebar"] button {
-            background-color: #005f73;
-            color: white;
-            font-size: 1rem;
-            border-radius: 8px;
-            padding: 10px 15px;
-            margin: 10px 0;
-            border: none;
-            cursor: pointer;
-            transition: transform 0.2s, background-color 0.3s;
-        }
-
-        [data-testid="stSidebar"] button:hover {
-            background-color: #ffffff;
-            color: #005f73;
-            transform: scale(1.05);
-        }
-
-        [data-testid="stSidebar"] .stSelectbox {
-            background-color: rgba(255, 255, 255, 0.1);
-            color: white;
-            border-radius: 8px;
-            padding: 5px;
-            margin: 10px 0;
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
 
 # Hero Section
 st.markdown(
@@ -239,7 +80,7 @@ with tab1:
     )
 
 with tab2:
-    st.image(IMAGE1, caption="The Heron collecting data from the FIU lake by Parking Garage 6 (PG-6).", use_container_width=True)
+    show_image(IMAGE1, caption="The Heron collecting data from the FIU lake by Parking Garage 6 (PG-6).")
 
 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
@@ -274,7 +115,7 @@ with tab3:
 with tab4:
     #st.image(IMAGE2, caption="Our boat being prepared for a Biscayne Bay mission to collect data and provide updates "
                             # "on the quality of the ocean.", use_column_width=True)
-    st.image(IMAGE3, caption="Dr. Reis and the students who participated in the Oct. 25 "
-                             "mission at the Biscayne Bay Campus.", use_container_width=True)
+    show_image(IMAGE3, caption="Dr. Reis and the students who participated in the Oct. 25 "
+                               "mission at the Biscayne Bay Campus.", sizes="(max-width: 768px) 100vw, 33vw")
 
 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
@@ -0,0 +1,145 @@
+"""
+Concurrent sessions requesting the same stations, with and without coalescing.
+
+Synthetic NDBC fixtures (:mod:`flowcast.synthetic`) are served by a replay
+server with added latency.  ``--sessions`` threads (one per simulated
+Streamlit session) are released at once and fetch through
+:mod:`flowcast.ingest`:
+
+* ``hot``: every session opens the same station;
+* ``mixed``: each session opens a random station;
+* ``compare``: each session compares a random subset of stations
+  (``fetch_ndbc_stations``, i.e. ``get_many``);
+* ``failing``: every session opens a station whose upstream answers 503;
+* ``direct``: every session calls ``http_client.get`` on the same station's
+  URL (page code that bypasses the fetchers).
+
+Each scenario runs with coalescing (the default fetchers and client) and
+without (the undecorated fetchers and ``coalesce=False``), and the report
+lists upstream requests, distinct parsed frames, wall time and failed
+station lookups (without coalescing, requests queue for the per-host
+connection pool and can run into the connect timeout).  With
+coalescing, a scenario must send one request per distinct station, share
+one parsed frame per station, and hand every session the same result (or
+the same error); the exit status is 1 otherwise.
+
+Usage (from the ``FlowCast`` directory)::
+
+    python -m benchmarks.coalescing --sessions 300 --latency 0.2
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+STATIONS = ["41122", "41070", "41010", "41117", "41004", "41002", "44014", "44009"]
+SCENARIOS = ("hot", "mixed", "compare", "failing", "direct")
+
+
+def workload(scenario, sessions, seed):
+    """Argument of each session's fetch for ``scenario``."""
+    rng = random.Random(seed)
+    if scenario in ("hot", "direct"):
+        return [STATIONS[0]] * sessions
+    if scenario == "mixed":
+        return [rng.choice(STATIONS) for _ in range(sessions)]
+    if scenario == "compare":
+        # A handful of comparisons that many sessions open at the same time.
+        choices = [tuple(sorted(rng.sample(STATIONS, 3))) for _ in range(4)]
+        return [list(rng.choice(choices)) for _ in range(sessions)]
+    return ["99999"] * sessions
+
+
+def run(server, scenario, sessions, seed, coalesce):
+    """Run one scenario; returns ``(arguments, outcomes, upstream requests, seconds)``."""
+    from flowcast import http_client, ingest
+
+    http_client.configure(upstream=server.url, retries=0, coalesce=coalesce)
+    if scenario == "direct":
+        def fetch(station):
+            return http_client.get(ingest.NDBC_URL.format(station_id=station))
+    else:
+        fetch = ingest.fetch_ndbc_stations if scenario == "compare" else ingest.fetch_ndbc_station
+        if not coalesce:
+            fetch = fetch.__wrapped__
+    arguments = workload(scenario, sessions, seed)
+    barrier = threading.Barrier(sessions)
+
+    def session(argument):
+        barrier.wait()
+        try:
+            return fetch(argument)
+        except http_client.HTTPError as e:
+            return e
+
+    before = server.requests
+    started = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool:
+        outcomes = list(pool.map(session, arguments))
+    elapsed = time.perf_counter() - started
+    return arguments, outcomes, server.requests - before, elapsed
+
+
+def frames_of(scenario, argument, outcome):
+    """``{station: frame or error}`` of one session's outcome."""
+    if scenario == "compare":
+        frames, errors = outcome
+        return {**frames, **errors}
+    return {argument: outcome}
+
+
+def check(scenario, arguments, outcomes, upstream):
+    """Problems with a coalesced run (empty when every expectation holds)."""
+    results = {}
+    for argument, outcome in zip(arguments, outcomes):
+        for station, value in frames_of(scenario, argument, outcome).items():
+            results.setdefault(station, set()).add(id(value))
+    problems = []
+    if upstream != len(results):
+        problems.append(f"{upstream} upstream requests for {len(results)} stations")
+    shared = [s for s, ids in results.items() if len(ids) > 1]
+    if scenario != "compare" and shared:
+        problems.append(f"stations {shared} parsed more than once")
+    if scenario == "failing" and not all(isinstance(o, Exception) for o in outcomes):
+        problems.append("some sessions did not get the upstream error")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=300, help="Concurrent sessions (threads).")
+    parser.add_argument("--latency", type=float, default=0.2, help="Upstream latency in seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-k", dest="scenarios", action="append", choices=SCENARIOS,
+                        help="Only run these scenarios (repeatable).")
+    args = parser.parse_args(argv)
+
+    from flowcast import synthetic
+    from flowcast.replay import ReplayServer, write_fixture
+    from flowcast.ingest import NDBC_URL
+
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="flowcast-coalescing-") as fixtures:
+        for i, station in enumerate(STATIONS):
+            synthetic.store_ndbc_fixture(fixtures, station, 6480, seed=(args.seed, i))
+        write_fixture(fixtures, "GET", NDBC_URL.format(station_id="99999"), b"Service Unavailable", status=503)
+        with ReplayServer(fixtures, latency=args.latency) as server:
+            for scenario in args.scenarios or SCENARIOS:
+                for coalesce in (True, False):
+                    arguments, outcomes, upstream, elapsed = run(server, scenario, args.sessions, args.seed, coalesce)
+                    values = [v for a, o in zip(arguments, outcomes) for v in frames_of(scenario, a, o).values()]
+                    parsed = len({id(v) for v in values})
+                    errors = sum(isinstance(v, Exception) for v in values)
+                    problems = check(scenario, arguments, outcomes, upstream) if coalesce else []
+                    failed |= bool(problems)
+                    label = "coalesced" if coalesce else "independent"
+                    print(f"{scenario:>8} {label:>11}: {upstream:4d} upstream requests, {parsed:4d} parsed results "
+                          f"for {args.sessions} sessions in {elapsed:.2f} s, {errors:4d} failed lookups"
+                          + (f"  FAILED: {'; '.join(problems)}" if problems else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
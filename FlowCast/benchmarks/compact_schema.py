@@ -0,0 +1,114 @@
+"""
+Check that the compact sonde schema gives the same answers as float64.
+
+Parses a synthetic sonde export both ways (``flowcast.storage.ingest_csv``
+with and without ``compact=True``), runs the analyses the pages run on each
+and compares them:
+
+* comparative analysis: monthly averages and per-month correlations,
+* Data Analysis sidebar means,
+* fish-kill and water-quality model predictions.
+
+This is the tolerance check of the compact schema (the repo has no unit
+test suite): relative differences above ``--rtol`` (default 1e-4; float32
+keeps ~7 significant digits), or a value missing in one path only, are
+reported as ``MISMATCH`` and make the command exit with status 1.  Models
+missing from ``models/`` are reported as skipped.  It also prints the
+per-column memory report of :func:`flowcast.schema.memory_report`.
+
+Usage (from the ``FlowCast`` directory)::
+
+    python -m benchmarks.compact_schema
+    python -m benchmarks.compact_schema --rows 1000000
+"""
+import argparse
+import os
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import datasets
+from flowcast import analytics, models, schema, storage
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+def _comparative(frame):
+    df, available = analytics.select_parameters(analytics.combine_sonde_frames([frame]))
+    averages = analytics.monthly_averages(df, available).set_index('Month')
+    correlations = {month: analytics.month_slice(df, month)[available].corr()
+                    for month in df['Month'].cat.categories}
+    return averages, correlations
+
+
+def _predictions(frame):
+    """Predictions of each shipped model on ``frame`` (models missing from ``models/`` are skipped)."""
+    predictions = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if Path(models.FISH_KILL_MODEL).exists():
+            scored = models.assess_fish_kill(frame, models.load_model(models.FISH_KILL_MODEL))
+            predictions["fish-kill predictions"] = scored['Predicted ODO mg/L'].to_numpy()
+        if Path(models.MULTI_OUTPUT_MODEL).exists():
+            scored = models.predict_water_quality(frame, models.load_model(models.MULTI_OUTPUT_MODEL))
+            predicted = [f'Predicted {column}' for column in models.WATER_QUALITY_TARGETS]
+            predictions["water-quality predictions"] = scored[predicted].to_numpy()
+    return predictions
+
+
+def _worst(a, b):
+    """Largest relative difference between ``a`` and ``b`` (infinite where only one of them is missing)."""
+    a = np.asarray(a, dtype='float64')
+    b = np.asarray(b, dtype='float64')
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return float('inf')
+    scale = np.maximum(np.abs(a), 1e-12)
+    diff = np.abs(a - b) / scale
+    return float(np.nanmax(diff)) if diff.size else 0.0
+
+
+def compare(path, rtol):
+    """Return ``[(check, worst relative difference, ok)]`` for the export at ``path``."""
+    full = storage.ingest_csv(path, required=()).frame
+    compact = storage.ingest_csv(path, required=(), compact=True).frame
+
+    results = []
+    for column in storage.REQUIRED_COLUMNS:
+        results.append((f"mean {column}", _worst(full[column].mean(), compact[column].mean())))
+
+    averages, correlations = _comparative(full)
+    compact_averages, compact_correlations = _comparative(compact)
+    results.append(("monthly averages", _worst(averages, compact_averages.loc[averages.index])))
+    results.append(("monthly correlations", max(
+        _worst(correlations[month], compact_correlations[month]) for month in correlations)))
+
+    compact_predictions = _predictions(compact)
+    for name, predicted in _predictions(full).items():
+        results.append((name, _worst(predicted, compact_predictions[name])))
+    return [(name, worst, worst <= rtol) for name, worst in results], schema.memory_report(full, compact)
+
+
+def skipped_models():
+    """Shipped models the comparison could not run (missing from ``models/``)."""
+    return [path for path in (models.FISH_KILL_MODEL, models.MULTI_OUTPUT_MODEL) if not Path(path).exists()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compact_schema", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in the synthetic export.")
+    parser.add_argument("--rtol", type=float, default=1e-4, help="Allowed relative difference.")
+    args = parser.parse_args(argv)
+    os.chdir(APP_DIR)
+
+    results, report = compare(datasets.sonde_csv(args.rows), args.rtol)
+    print(report.to_string(), end="\n\n")
+    for name, worst, ok in results:
+        print(f"{name:<28} max rel. diff {worst:.2e}   {'ok' if ok else 'MISMATCH'}")
+    for path in skipped_models():
+        print(f"{Path(path).name:<28} skipped (model file missing)")
+    return 0 if all(ok for _, _, ok in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
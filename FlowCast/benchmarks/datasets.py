@@ -0,0 +1,132 @@
+"""
+Synthetic benchmark inputs scaled from the shipped data.
+
+Sonde frames reuse the schema of ``data/oct25-2024.csv``: the real rows are
+tiled up to the requested size, sensor channels get a small amount of noise
+and the timestamps are spread over March-October 2024 so the comparative
+analysis sees several months.  API payloads mimic the NDBC, USGS and WQP
+formats parsed by :mod:`flowcast.ingest`.
+
+Generated CSV files are cached under ``benchmarks/.cache``.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SONDE_TEMPLATE = Path(__file__).resolve().parent.parent / "data" / "oct25-2024.csv"
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+_NON_SENSOR = {"Latitude", "Longitude", "Date", "Time"}
+
+
+def sonde_frame(n_rows, seed=0):
+    """Sonde observations with the shipped schema and ``n_rows`` rows."""
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(SONDE_TEMPLATE)
+    idx = np.arange(n_rows) % len(template)
+    df = template.iloc[idx].reset_index(drop=True)
+
+    for col in df.columns:
+        if col not in _NON_SENSOR and pd.api.types.is_float_dtype(df[col]):
+            scale = float(df[col].std() or 1.0) * 0.05
+            df[col] = (df[col] + rng.normal(0, scale, n_rows)).round(3)
+    df["Latitude"] += rng.normal(0, 0.01, n_rows)
+    df["Longitude"] += rng.normal(0, 0.01, n_rows)
+
+    # Random sample times spread over the study period.
+    start = pd.Timestamp("2024-03-01 08:00:00").value
+    span = pd.Timestamp("2024-10-31 17:00:00").value - start
+    stamps = pd.to_datetime(start + np.sort(rng.integers(0, span, n_rows)))
+    df["Date"] = stamps.strftime("%m/%d/%Y")
+    df["Time"] = stamps.strftime("%H:%M:%S")
+    return df
+
+
+def survey_frame(n_rows, interval="1s", seed=0):
+    """
+    One survey of ``n_rows`` consecutive readings ``interval`` apart, with a ``Timestamp`` column.
+
+    The template's rows are repeated in their recorded order, so the depth
+    casts of the real survey recur throughout; sensor channels get noise.
+    """
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(SONDE_TEMPLATE)
+    df = template.iloc[np.arange(n_rows) % len(template)].reset_index(drop=True)
+    df = df.drop(columns=[c for c in df.columns if c.startswith(("Date", "Time", "Unnamed"))])
+    for col in df.columns:
+        if col not in _NON_SENSOR and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col] + rng.normal(0, float(df[col].std() or 1.0) * 0.01, n_rows)
+    df.insert(0, "Timestamp", pd.Timestamp("2024-10-25 06:00:00") + np.arange(n_rows) * pd.Timedelta(interval))
+    return df
+
+
+def sonde_csv(n_rows, seed=0):
+    """Path of a cached CSV holding :func:`sonde_frame` output."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    path = CACHE_DIR / f"sonde-{n_rows}-{seed}.csv"
+    if not path.exists():
+        sonde_frame(n_rows, seed).to_csv(path, index=False)
+    return path
+
+
+def ndbc_text(n_rows, seed=0):
+    """An NDBC realtime2 file with ``n_rows`` 10-minute observations."""
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range(end="2024-10-31 23:50", periods=n_rows, freq="10min")[::-1]
+    values = {
+        "WDIR": rng.integers(0, 360, n_rows).astype(str),
+        "WSPD": np.round(rng.gamma(2, 2, n_rows), 1).astype(str),
+        "WVHT": np.round(rng.gamma(2, 0.4, n_rows), 2).astype(str),
+        "APD": np.round(rng.normal(6, 1, n_rows), 1).astype(str),
+        "PRES": np.round(rng.normal(1015, 3, n_rows), 1).astype(str),
+        "ATMP": np.round(rng.normal(26, 2, n_rows), 1).astype(str),
+        "WTMP": np.round(rng.normal(27, 0.5, n_rows), 1).astype(str),
+    }
+    header = ("#YY  MM DD hh mm WDIR WSPD GST  WVHT   DPD   APD MWD   PRES  ATMP  WTMP  DEWP  VIS PTDY  TIDE\n"
+              "#yr  mo dy hr mn degT m/s  m/s     m   sec   sec degT   hPa  degC  degC  degC  nmi  hPa    ft\n")
+    lines = [
+        f"{t:%Y %m %d %H %M} {values['WDIR'][i]} {values['WSPD'][i]} MM {values['WVHT'][i]} MM {values['APD'][i]} MM "
+        f"{values['PRES'][i]} {values['ATMP'][i]} {values['WTMP'][i]} MM MM MM MM"
+        for i, t in enumerate(stamps)
+    ]
+    return header + "\n".join(lines) + "\n"
+
+
+def usgs_iv_payload(n_values, n_series=4, seed=0):
+    """An NWIS instantaneous-values JSON payload with ``n_values`` readings in total."""
+    rng = np.random.default_rng(seed)
+    per_series = max(1, n_values // n_series)
+    stamps = pd.date_range("2024-10-01", periods=per_series, freq="15min").strftime("%Y-%m-%dT%H:%M:%S.000-04:00")
+    series = []
+    for k, name in enumerate(["Temperature, water", "Dissolved oxygen", "pH", "Specific conductance"][:n_series]):
+        readings = np.round(rng.normal(10 + k, 1, per_series), 2).astype(str)
+        series.append({
+            "variable": {"variableName": name, "unit": {"unitCode": "u"}},
+            "values": [{"value": [{"value": v, "qualifiers": ["P"], "dateTime": t}
+                                  for v, t in zip(readings, stamps)]}],
+        })
+    return {"value": {"timeSeries": series}}
+
+
+def wqp_results_payload(n_results, seed=0):
+    """A WQP Result JSON payload with ``n_results`` measurements."""
+    rng = np.random.default_rng(seed)
+    names = np.array(["pH", "Temperature, water", "Dissolved oxygen (DO)", "Salinity"])
+    picks = rng.integers(0, len(names), n_results)
+    values = np.round(rng.normal(8, 2, n_results), 2).astype(str)
+    return {"results": [
+        {
+            "OrganizationIdentifier": "USGS-FL",
+            "MonitoringLocationIdentifier": "USGS-02323500",
+            "CharacteristicName": names[p],
+            "ResultMeasureValue": v,
+            "ResultMeasure": {"MeasureUnitCode": "mg/l"},
+            "ResultSampleFractionText": "Dissolved",
+            "ActivityTypeCode": "Sample-Routine",
+            "ActivityStartDate": "2023-01-15",
+            "LatitudeMeasure": 25.9,
+            "LongitudeMeasure": -80.1,
+        }
+        for p, v in zip(picks, values)
+    ]}
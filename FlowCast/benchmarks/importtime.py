@@ -0,0 +1,105 @@
+"""
+Import-time cost of each page's module-level imports.
+
+For every page the top-level ``import``/``from`` statements are extracted
+and run in a fresh interpreter under ``python -X importtime``; the report
+lists the cumulative import time of the page and the most expensive
+top-level packages.  ``streamlit`` itself is imported first and excluded,
+since the server has it loaded before any page runs.
+
+Usage (from the ``FlowCast`` directory)::
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --baseline benchmarks/results/imports-abc123.json
+"""
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.run import RESULTS_DIR, current_commit
+
+APP_DIR = Path(__file__).resolve().parent.parent
+PAGES = ["01_Home.py"] + sorted(p.relative_to(APP_DIR).as_posix() for p in (APP_DIR / "pages").glob("*.py"))
+
+PRELOADED = "import streamlit"
+
+
+def page_imports(path):
+    """Source of the module-level import statements of a page script."""
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def parse_importtime(stderr):
+    """``{top-level package: cumulative µs}`` from ``-X importtime`` output."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Entries indented by a single space were imported by the page itself and
+        # their cumulative time already includes everything they pulled in.
+        if name.startswith(" ") and not name.startswith("  "):
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative_us)
+    return packages
+
+
+def measure(source):
+    """Import ``source`` after streamlit in a fresh interpreter; returns (total µs, per-package µs)."""
+    code = f"{PRELOADED}\nimport sys\nprint('--', file=sys.stderr)\n{source}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=APP_DIR, capture_output=True,
+                          text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    stderr = proc.stderr.split("--\n", 1)[1]
+    packages = parse_importtime(stderr)
+    return sum(packages.values()), packages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importtime", description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="select", help="Only measure pages whose file name contains this text.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", help="Fail if slower than this earlier imports-*.json report.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown (default 0.25).")
+    args = parser.parse_args(argv)
+
+    report = {"commit": current_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "pages": {}}
+    for page in PAGES:
+        if args.select and args.select.lower() not in page.lower():
+            continue
+        source = page_imports(APP_DIR / page)
+        runs = [measure(source) for _ in range(args.repeat)]
+        total = statistics.median(r[0] for r in runs)
+        packages = runs[-1][1]
+        report["pages"][page] = {"median_ms": total / 1000, "packages_ms": {k: v / 1000 for k, v in packages.items()}}
+        top = ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in
+                        sorted(packages.items(), key=lambda kv: -kv[1])[:4])
+        print(f"{page:<36} {total / 1000:8.0f} ms   {top}")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"imports-{report['commit']}.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Report: {out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["pages"]
+        slower = [
+            f"{page}: {baseline[page]['median_ms']:.0f} ms -> {stats['median_ms']:.0f} ms"
+            for page, stats in report["pages"].items()
+            if page in baseline and stats["median_ms"] > baseline[page]["median_ms"] * (1 + args.threshold)
+        ]
+        for line in slower:
+            print(f"Import-time regression: {line}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
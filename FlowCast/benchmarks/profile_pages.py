@@ -0,0 +1,256 @@
+"""
+Headless page-latency profiling with Streamlit's ``AppTest``.
+
+Each scenario loads a page, applies canned widget inputs one rerun at a
+time and records, per rerun:
+
+* wall time of the rerun,
+* inclusive time of the page's top-level functions (``data_analysis``,
+  ``predictive_analysis``, ``comparative_analysis``, ``render_API``, ...),
+  estimated by a stack sampler running next to the script thread,
+* size of every Plotly figure sent to the browser,
+* peak traced Python memory (with ``--memory``; tracing slows the run down).
+
+The sampled stacks are written in the folded format understood by
+``flamegraph.pl`` and speedscope.  With ``--baseline`` the run becomes a
+regression gate: it fails if a scenario's median rerun time grew by more
+than ``--threshold``.
+
+Usage (from the ``FlowCast`` directory)::
+
+    python -m benchmarks.profile_pages
+    python -m benchmarks.profile_pages -k dashboard --fixtures fixtures/http
+    python -m benchmarks.profile_pages --baseline benchmarks/results/pages-abc123.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from benchmarks.run import RESULTS_DIR, current_commit
+
+# Pages open data/ and media/ relative to the app directory.
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Functions whose inclusive time is reported separately.
+TOP_LEVEL_FUNCTIONS = (
+    "data_analysis", "predictive_analysis", "comparative_analysis", "predict_water_quality", "predict_fish_kill",
+    "render_API", "display_buoy_map", "fetch_station_data", "stats_describe", "forecast_section",
+    "render_background", "query_workspace",
+)
+
+# (name, page, steps) where each step is (widget type, label, value) applied before a rerun.
+SCENARIOS = [
+    ("home", "01_Home.py", []),
+    ("background", "pages/02_Background.py", []),
+    ("analysis-data", "pages/03_Real-Time Analysis.py", [
+        ("radio", "Choose Dataset", "Default Dataset"),
+    ]),
+    ("analysis-predictive", "pages/03_Real-Time Analysis.py", [
+        ("selectbox", "Choose Section", "Predictive Analysis"),
+        ("radio", "Select Data Source", "Use Preloaded Dummy Data"),
+        ("selectbox", "Choose Analysis Type", "Fish Kill Risk Assessment"),
+    ]),
+    ("analysis-comparative", "pages/03_Real-Time Analysis.py", [
+        ("selectbox", "Choose Section", "Comparative Analysis"),
+    ]),
+    ("dashboard", "pages/04_Global Dashboard.py", [
+        ("selectbox", "Select Region", "Gulf of Mexico (East)/Florida"),
+        ("selectbox", "Select Station", "Hollywood Beach, FL"),
+    ]),
+    ("sign-up", "pages/05_Sign Up.py", []),
+    ("about", "pages/06_About Us.py", []),
+    ("query", "pages/07_Data Query.py", [
+        ("button", "Run Query", True),
+    ]),
+]
+
+# Scenarios that need upstream APIs; they run only against a replay server.
+NEEDS_UPSTREAM = {"dashboard"}
+
+
+class StackSampler:
+    """Samples the Streamlit script thread's Python stack at a fixed interval."""
+
+    def __init__(self, interval=0.001, thread_prefix="ScriptRunner"):
+        self.interval = interval
+        self.thread_prefix = thread_prefix
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or not names.get(ident, "").startswith(self.thread_prefix):
+                    continue
+                stack = []
+                try:
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                except AttributeError:
+                    # The frame was torn down while it was being walked; drop the sample.
+                    continue
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(self.interval)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="flowcast-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch)
+
+    def inclusive_share(self, function_names):
+        """Fraction of samples whose stack contains each of ``function_names``."""
+        if not self.samples:
+            return {}
+        shares = {}
+        for name in function_names:
+            hits = sum(count for stack, count in self.stacks.items()
+                       if any(part.startswith(f"{name} (") for part in stack.split(";")))
+            if hits:
+                shares[name] = hits / self.samples
+        return shares
+
+
+def _widget(at, kind, label):
+    return next(w for w in getattr(at, kind) if w.label == label)
+
+
+def _figure_sizes(at):
+    return [len(chart.proto.spec) for chart in at.get("plotly_chart")]
+
+
+def profile_scenario(name, page, steps, sampler, trace_memory, timeout):
+    """Run one scenario; returns a list of per-rerun measurements."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_DIR / page), default_timeout=timeout)
+    reruns = []
+    actions = [None] + steps
+    for action in actions:
+        if action is not None:
+            kind, label, value = action
+            _widget(at, kind, label).set_value(value)
+
+        sampler.stacks.clear()
+        sampler.samples = 0
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with sampler:
+            at.run()
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+        if at.exception:
+            raise RuntimeError(f"{name}: page raised {at.exception[0].message}")
+        shares = sampler.inclusive_share(TOP_LEVEL_FUNCTIONS)
+        reruns.append({
+            "step": "initial" if action is None else f"{action[0]}:{action[1]}={action[2]}",
+            "wall_s": wall,
+            "functions_s": {fn: share * wall for fn, share in shares.items()},
+            "figure_bytes": _figure_sizes(at),
+            "peak_traced_mb": peak,
+            "stacks": dict(sampler.stacks),
+        })
+    return reruns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.profile_pages", description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="select", help="Only run scenarios whose name contains this text.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh page sessions per scenario.")
+    parser.add_argument("--memory", action="store_true", help="Trace Python allocations (slower).")
+    parser.add_argument("--fixtures", help="Replay recorded API fixtures (see flowcast.replay) for API pages.")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--baseline", help="Fail if slower than this earlier pages-*.json report.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown (default 0.25).")
+    args = parser.parse_args(argv)
+    os.chdir(APP_DIR)
+
+    server = None
+    if args.fixtures:
+        from flowcast.replay import ReplayServer
+        server = ReplayServer(args.fixtures)
+        os.environ["FLOWCAST_UPSTREAM"] = server.start()
+
+    sampler = StackSampler()
+    report = {"commit": current_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "scenarios": {}}
+    folded = Counter()
+    try:
+        for name, page, steps in SCENARIOS:
+            if args.select and args.select.lower() not in name.lower():
+                continue
+            if name in NEEDS_UPSTREAM and server is None:
+                print(f"{name:<22} skipped (needs --fixtures)")
+                continue
+
+            runs = [profile_scenario(name, page, steps, sampler, args.memory, args.timeout)
+                    for _ in range(args.repeat)]
+            for run in runs:
+                for rerun in run:
+                    for stack, count in rerun.pop("stacks").items():
+                        folded[f"{name};{stack}"] += count
+
+            totals = [sum(r["wall_s"] for r in run) for run in runs]
+            last = runs[-1]
+            report["scenarios"][name] = {
+                "page": page,
+                "median_total_s": statistics.median(totals),
+                "reruns": last,
+            }
+            functions = Counter()
+            for rerun in last:
+                functions.update(rerun["functions_s"])
+            top = ", ".join(f"{fn} {t * 1000:.0f} ms" for fn, t in functions.most_common(3))
+            figures = sum(sum(r["figure_bytes"]) for r in last)
+            print(f"{name:<22} {statistics.median(totals) * 1000:8.0f} ms over {len(last)} rerun(s)   "
+                  f"figures {figures / 1024:8.1f} KB   {top}")
+    finally:
+        if server is not None:
+            server.stop()
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"pages-{report['commit']}.json"
+    out.write_text(json.dumps(report, indent=2))
+    folded_path = out.with_suffix(".folded")
+    folded_path.write_text("\n".join(f"{stack} {count}" for stack, count in folded.items()) + "\n")
+    print(f"Report: {out}\nFlame graph input: {folded_path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["scenarios"]
+        slower = [
+            f"{name}: {baseline[name]['median_total_s'] * 1000:.0f} ms -> {stats['median_total_s'] * 1000:.0f} ms"
+            for name, stats in report["scenarios"].items()
+            if name in baseline and stats["median_total_s"] > baseline[name]["median_total_s"] * (1 + args.threshold)
+        ]
+        for line in slower:
+            print(f"Page latency regression: {line}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
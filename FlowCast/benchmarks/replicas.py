@@ -0,0 +1,114 @@
+"""
+Upstream traffic of several app replicas sharing (or not sharing) a cache.
+
+Synthetic NDBC fixtures (:mod:`flowcast.synthetic`) are served by a replay
+server with added latency.  ``--replicas`` processes, each with
+``--sessions`` threads, look up random stations through
+:class:`flowcast.cache.Cache` at the same time, first with per-process
+``memory://`` caches and then with one shared ``file://`` cache; the report
+lists the upstream requests each configuration made and the hit rates.
+
+It also checks that the ``file://`` backend deletes expired entries, both
+when one is read and in :meth:`flowcast.cache.DiskBackend.sweep`; the exit
+status is 1 otherwise.
+
+Usage (from the ``FlowCast`` directory)::
+
+    python -m benchmarks.replicas --replicas 4 --sessions 8 --lookups 50 --latency 0.2
+"""
+import argparse
+import multiprocessing
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+STATIONS = ["41122", "41070", "41010", "41117", "41004", "41002", "44014", "44009"]
+
+
+def replica(upstream, cache_url, sessions, lookups, seed):
+    """One replica: ``sessions`` threads doing ``lookups`` station lookups each; returns its cache stats."""
+    from flowcast import cache, http_client, ingest
+
+    http_client.configure(upstream=upstream, pool_size=sessions, per_host=sessions)
+    shared = cache.Cache(cache.backend(cache_url), namespace=f"bench-{seed}")
+
+    def session(i):
+        rng = random.Random(seed * 1000 + i)
+        for _ in range(lookups):
+            station = rng.choice(STATIONS)
+            shared.get_or_compute("ndbc_station", (station,), lambda: ingest.fetch_ndbc_station(station), ttl=600)
+
+    with ThreadPoolExecutor(sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    return shared.stats().get("ndbc_station", {})
+
+
+def simulate(fixtures, cache_url, replicas, sessions, lookups, latency, seed):
+    from flowcast.replay import ReplayServer
+
+    with ReplayServer(fixtures, latency=latency) as server:
+        started = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(replicas) as pool:
+            stats = pool.starmap(replica, [(server.url, cache_url, sessions, lookups, seed) for _ in range(replicas)])
+        elapsed = time.perf_counter() - started
+        upstream = server.requests
+    totals = {result: sum(s.get(result, 0) for s in stats) for result in ("hit", "miss", "coalesced")}
+    return {
+        "upstream_requests": upstream,
+        "lookups": replicas * sessions * lookups,
+        "seconds": elapsed,
+        "hit_rate_per_replica": [round(s.get("hit_rate", 0), 3) for s in stats],
+        **totals,
+    }
+
+
+def check_expiry(directory):
+    """Problems with expired entries of a ``file://`` cache in ``directory`` (empty when they are deleted)."""
+    from flowcast import cache
+
+    store = cache.DiskBackend(directory)
+    problems = []
+    store.set("bench:expiry:read", "value", ttl=0.05)
+    store.set("bench:expiry:swept", "value", ttl=0.05)
+    store.set("bench:expiry:kept", "value", ttl=600)
+    time.sleep(0.1)
+    if store.get("bench:expiry:read") is not cache.MISSING:
+        problems.append("expired entry returned")
+    if store._path("bench:expiry:read").exists():
+        problems.append("expired entry not deleted when read")
+    store.sweep()
+    if store._path("bench:expiry:swept").exists():
+        problems.append("expired entry not deleted by sweep()")
+    if store.get("bench:expiry:kept") != "value":
+        problems.append("live entry lost")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions (threads) per replica.")
+    parser.add_argument("--lookups", type=int, default=25, help="Station lookups per session.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Upstream latency in seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from flowcast import synthetic
+
+    with tempfile.TemporaryDirectory(prefix="flowcast-replicas-") as tmp:
+        problems = check_expiry(f"{tmp}/expiry")
+        print(f"{'file expiry':>20}: " + (f"FAILED: {'; '.join(problems)}" if problems else "expired entries deleted"))
+        fixtures = f"{tmp}/fixtures"
+        for i, station in enumerate(STATIONS):
+            synthetic.store_ndbc_fixture(fixtures, station, 6480, seed=(args.seed, i))
+        for label, url in (("per-process memory", "memory://"), ("shared file", f"file://{tmp}/cache")):
+            result = simulate(fixtures, url, args.replicas, args.sessions, args.lookups, args.latency, args.seed)
+            print(f"{label:>20}: {result['upstream_requests']:4d} upstream requests for {result['lookups']} lookups "
+                  f"in {result['seconds']:.1f} s (hit {result['hit']}, miss {result['miss']}, "
+                  f"coalesced {result['coalesced']}); hit rate per replica {result['hit_rate_per_replica']}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""
+Run the FlowCast benchmark suite.
+
+Every case/size runs in a fresh subprocess so that its peak RSS is not
+polluted by earlier cases.  Results are written per commit to
+``benchmarks/results/<commit>.json`` and appended to
+``benchmarks/results/history.jsonl`` so timings can be tracked over commits.
+
+Usage (from the ``FlowCast`` directory)::
+
+    python -m benchmarks.run                      # quick sizes
+    python -m benchmarks.run --full               # up to millions of rows
+    python -m benchmarks.run -k Parse --repeat 5  # subset of cases
+    python -m benchmarks.run --compare            # fail on >20% slowdowns vs the previous commit
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from queue import Empty
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+HISTORY = RESULTS_DIR / "history.jsonl"
+
+
+def _rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(case_name, size, repeat, queue):
+    """Subprocess body: set up the case, then time ``repeat`` runs."""
+    from benchmarks import suite
+
+    case = next(c for c in suite.CASES if c.__name__ == case_name)()
+    case.setup(size)
+    rss_setup = _rss_mb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run(size)
+        timings.append(time.perf_counter() - start)
+    queue.put({
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "peak_rss_mb": _rss_mb(),
+        "run_rss_mb": _rss_mb() - rss_setup,
+    })
+
+
+def measure(case_name, size, repeat):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(case_name, size, repeat, queue))
+    proc.start()
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except Empty:
+            if not proc.is_alive():
+                raise RuntimeError(f"{case_name}[{size}] failed (exit code {proc.exitcode})")
+    proc.join()
+    return result
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_results(commit):
+    """Most recent history entry recorded for a different commit."""
+    if not HISTORY.exists():
+        return None
+    entries = [json.loads(line) for line in HISTORY.read_text().splitlines() if line.strip()]
+    for entry in reversed(entries):
+        if entry["commit"] != commit:
+            return entry
+    return None
+
+
+def compare(results, baseline, threshold):
+    """Return the ``case[size]`` keys that got slower than ``threshold`` allows."""
+    slower = []
+    for key, stats in results.items():
+        old = baseline.get("results", {}).get(key)
+        if old and stats["min_s"] > old["min_s"] * (1 + threshold):
+            slower.append(f"{key}: {old['min_s'] * 1000:.1f} ms -> {stats['min_s'] * 1000:.1f} ms")
+    return slower
+
+
+def main(argv=None):
+    from benchmarks import suite
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--full", action="store_true", help="Run every size, up to millions of rows.")
+    parser.add_argument("-k", dest="select", help="Only run cases whose name contains this text.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", action="store_true", help="Compare against the previous commit's results.")
+    parser.add_argument("--baseline", help="Compare against this results file instead.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (default 0.2).")
+    args = parser.parse_args(argv)
+
+    commit = current_commit()
+    results = {}
+    for case in suite.CASES:
+        if args.select and args.select.lower() not in case.__name__.lower():
+            continue
+        for size in (case.params if args.full else case.quick):
+            stats = measure(case.__name__, size, args.repeat)
+            key = f"{case.__name__}[{size}]"
+            results[key] = stats
+            print(f"{key:<36} min {stats['min_s'] * 1000:10.1f} ms   median {stats['median_s'] * 1000:10.1f} ms   "
+                  f"peak RSS {stats['peak_rss_mb']:8.1f} MB   (+{stats['run_rss_mb']:.1f} MB in run)")
+
+    entry = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor()},
+        "results": results,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    (RESULTS_DIR / f"{commit}.json").write_text(json.dumps(entry, indent=2))
+    with HISTORY.open("a") as fh:
+        fh.write(json.dumps(entry) + "\n")
+
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+    elif args.compare:
+        baseline = previous_results(commit)
+    if baseline is not None:
+        slower = compare(results, baseline, args.threshold)
+        print(f"Compared with {baseline['commit']}: " + ("no regressions." if not slower else "regressions:"))
+        for line in slower:
+            print(f"  {line}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
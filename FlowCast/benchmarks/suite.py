@@ -0,0 +1,289 @@
+"""
+Benchmark cases for the FlowCast data paths.
+
+Each case is a class in the style of airspeed velocity: ``params`` lists the
+input sizes, ``setup(n)`` builds the input outside the timed region and
+``run(n)`` is the code under measurement.  ``quick`` holds the sizes used by
+default; ``--full`` runs every size in ``params``.
+"""
+import itertools
+import json
+import tempfile
+import warnings
+
+import pandas as pd
+
+from benchmarks import datasets
+from flowcast import (analytics, comparison, evaluation, explorer, ingest, interpolation, models, profiles, storage,
+                      synthetic, tables, warehouse, zoning)
+
+SIZES = [10_000, 100_000, 1_000_000, 2_000_000]
+
+
+class SondeCsvLoad:
+    """``pd.read_csv`` of a sonde export (what every upload triggers)."""
+    params = SIZES
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        self.path = datasets.sonde_csv(n)
+
+    def run(self, n):
+        pd.read_csv(self.path)
+
+
+class SondeIngest:
+    """Upload ingestion of the Data Analysis columns: header check, dtypes, chunks, null counts."""
+    params = SIZES
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        self.path = datasets.sonde_csv(n)
+
+    def run(self, n):
+        storage.ingest_csv(self.path, columns=storage.REQUIRED_COLUMNS + ['Latitude', 'Longitude'])
+
+
+class NdbcParse:
+    """NDBC realtime2 text to frame (~6,500 rows is a real 45-day file)."""
+    params = [6_500, 100_000, 1_000_000]
+    quick = [6_500, 100_000]
+
+    def setup(self, n):
+        self.text = datasets.ndbc_text(n)
+
+    def run(self, n):
+        ingest.parse_ndbc_realtime(self.text)
+
+
+class UsgsIvParse:
+    """NWIS instantaneous-values JSON to long frame."""
+    params = [10_000, 100_000, 1_000_000]
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        self.body = json.dumps(datasets.usgs_iv_payload(n))
+
+    def run(self, n):
+        ingest.parse_usgs_iv(json.loads(self.body))
+
+
+class StationComparison:
+    """Multi-station comparison: parse N ~45-day NDBC files, align hourly, all-pairs lagged correlation (±24 h)."""
+    params = [10, 50, 200]
+    quick = [10, 50]
+
+    def setup(self, n):
+        self.texts = {str(41000 + i): datasets.ndbc_text(6_500, seed=i) for i in range(n)}
+
+    def run(self, n):
+        series = {sid: comparison.ndbc_series(ingest.parse_ndbc_realtime(text), 'WTMP')
+                  for sid, text in self.texts.items()}
+        aligned = comparison.align(series, '1h')
+        lags, corr = comparison.lagged_correlations(aligned, max_lag=24)
+        comparison.peak_lags(aligned, lags, corr)
+        comparison.station_summary(aligned)
+
+
+class WqpResultsParse:
+    """WQP Result JSON to frame."""
+    params = [10_000, 100_000, 1_000_000]
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        self.body = json.dumps(datasets.wqp_results_payload(n))
+
+    def run(self, n):
+        ingest.parse_wqp_results(json.loads(self.body))
+
+
+class FishKillScoring:
+    """Model scoring and risk labelling from ``predict_fish_kill``."""
+    params = SIZES
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.model = models.load_model(models.FISH_KILL_MODEL)
+        self.df = datasets.sonde_frame(n)
+
+    def run(self, n):
+        models.assess_fish_kill(self.df, self.model)
+
+
+class RiskZoning:
+    """Clustering of critical readings into fish-kill risk zones (``flowcast.zoning``)."""
+    params = SIZES
+    quick = [100_000, 1_000_000]
+
+    def setup(self, n):
+        df = datasets.sonde_frame(n)
+        # Measured values stand in for predictions; ~1% of the synthetic readings are below the ODO threshold.
+        self.df = df.assign(**{f'Predicted {column}': df[column] for column in models.WATER_QUALITY_TARGETS})
+
+    def run(self, n):
+        zoning.risk_zones(self.df)
+
+
+class ModelEvaluation:
+    """Error sums and drift histograms of one scored batch appended to an evaluation log (``flowcast.evaluation``)."""
+    params = SIZES
+    quick = [10_000, 100_000, 1_000_000]
+
+    def setup(self, n):
+        df = datasets.sonde_frame(n)
+        self.df = df.assign(**{f'Predicted {column}': df[column] * 1.01 for column in models.WATER_QUALITY_TARGETS})
+        self.root = tempfile.mkdtemp(prefix="flowcast-evaluation-")
+        self.reference = datasets.sonde_frame(10_000, seed=1)
+        # A new version per run, so every run records instead of finding the batch already logged.
+        self.versions = (f"bench{i}" for i in itertools.count())
+
+    def run(self, n):
+        evaluation.Monitor('water_quality', next(self.versions), self.root).record(self.df, self.reference)
+
+
+class ComparativeAggregation:
+    """Date filtering, month labelling, monthly means and correlation from ``comparative_analysis``."""
+    params = SIZES
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        self.frames = [datasets.sonde_frame(n // 2, seed=1), datasets.sonde_frame(n - n // 2, seed=2)]
+
+    def run(self, n):
+        combined = analytics.combine_sonde_frames([df.copy() for df in self.frames])
+        df, columns = analytics.select_parameters(combined)
+        analytics.monthly_averages(df, columns)
+        month = df['Month'].cat.categories[0]
+        analytics.month_slice(df, month)[columns].corr()
+
+
+class ComparativeSql:
+    """The same aggregation as SQL over the Parquet observation store (``flowcast.warehouse``)."""
+    params = SIZES
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        self.root = datasets.CACHE_DIR / f"warehouse-{n}"
+        self.sources = [warehouse.source_id(f"{n}-{seed}") for seed in (1, 2)]
+        for source, seed, rows in zip(self.sources, (1, 2), (n // 2, n - n // 2)):
+            frame = storage.ingest_csv(datasets.sonde_csv(rows, seed), required=(), compact=True).frame
+            warehouse.store_frame(frame, source, self.root)
+
+    def run(self, n):
+        columns = analytics.COMPARATIVE_PARAMETERS
+        monthly = warehouse.monthly_averages(self.sources, columns, analytics.STUDY_START, analytics.STUDY_END,
+                                             self.root)
+        month = monthly['Month'].iloc[0]
+        warehouse.correlations(self.sources, columns, month, self.root)
+        warehouse.month_rows(self.sources, month, analytics.LOCATION_COLUMNS[1:] + columns, self.root)
+
+
+class CastProfiling:
+    """Cast segmentation, depth layers and stratification of one survey (``flowcast.profiles``), uncached."""
+    params = [17_280, 86_400, 1_000_000]
+    quick = [17_280, 86_400]
+
+    def setup(self, n):
+        # A survey day at 5 s and at 1 s sampling.
+        self.df = datasets.survey_frame(n, "5s" if n == 17_280 else "1s")
+
+    def run(self, n):
+        labels = profiles.segment(self.df)
+        profiles.cast_summary(self.df, labels)
+        profiles.stratification(profiles.layers(self.df, labels))
+
+
+class SurfaceInterpolation:
+    """IDW and kriging surfaces on a 500 x 500 grid from ``n`` sonde samples (``flowcast.interpolation``)."""
+    params = [10_000, 50_000, 100_000]
+    quick = [10_000, 50_000]
+
+    def setup(self, n):
+        self.df = datasets.sonde_frame(n)
+
+    def run(self, n):
+        for method in interpolation.METHODS:
+            interpolation.interpolate(self.df['Latitude'], self.df['Longitude'], self.df['ODO mg/L'], 500, method)
+
+
+class SyntheticGeneration:
+    """Seeded synthetic sonde surveys (``flowcast.synthetic``), ``n`` readings in daily surveys."""
+    params = SIZES
+    quick = [100_000, 1_000_000]
+
+    def setup(self, n):
+        # Imports scipy outside the timed region.
+        synthetic.survey(10)
+
+    def run(self, n):
+        synthetic.sonde_track(n)
+
+
+class FigureConstruction:
+    """Plotly figures from the Data Analysis tabs, including JSON serialization."""
+    params = [10_000, 100_000, 1_000_000]
+    quick = [10_000, 100_000]
+
+    def setup(self, n):
+        import plotly.express as px
+        self.px = px
+        self.df = datasets.sonde_frame(n)
+
+    def run(self, n):
+        px = self.px
+        figures = [
+            px.scatter(self.df, x="Depth m", y="Temp °C", size=self.df["pH"].clip(lower=0), color="ODO mg/L"),
+            px.scatter_mapbox(self.df, lat="Latitude", lon="Longitude", color="ODO mg/L", zoom=10,
+                              mapbox_style="carto-positron"),
+            px.line(self.df, x=self.df.index, y="ODO mg/L"),
+        ]
+        for fig in figures:
+            fig.to_json()
+
+
+class RawTable:
+    """Bytes Streamlit builds for the Raw Data table on each rerun: the whole frame, then one page."""
+    params = [100_000, 1_000_000]
+    quick = [100_000, 1_000_000]
+
+    def setup(self, n):
+        from streamlit import dataframe_util
+        self.util = dataframe_util
+        self.df = datasets.sonde_frame(n)
+
+    def run(self, n):
+        self.util.convert_pandas_df_to_arrow_bytes(self.df)
+
+
+class RawTablePage(RawTable):
+    """The same through :func:`flowcast.tables.page`: one 500-row page from the middle of the frame."""
+
+    def run(self, n):
+        self.util.convert_arrow_table_to_arrow_bytes(tables.page(self.df, n // tables.PAGE_ROWS // 2))
+
+
+class ExplorerPage:
+    """One Browse rerun over the observation store: count and a sorted page under a time and a value filter."""
+    params = [100_000, 1_000_000, 2_000_000]
+    quick = [100_000, 1_000_000]
+
+    def setup(self, n):
+        self.root = datasets.CACHE_DIR / f"explorer-{n}"
+        track = synthetic.sonde_track(n)
+        if not warehouse.has_source("explorer", self.root):
+            warehouse.store_frame(track, "explorer", self.root)
+        # The last quarter of the archive
+        start = track['Timestamp'].iloc[3 * n // 4].to_pydatetime()
+        self.filters = [explorer.Filter('Timestamp', '≥', start), explorer.Filter('ODO mg/L', '>', 6.0)]
+
+    def run(self, n):
+        browse = explorer.Explorer.warehouse(root=self.root)
+        browse.count(self.filters)
+        browse.page(filters=self.filters, sort='ODO mg/L', descending=True, number=10)
+
+
+CASES = [SondeCsvLoad, SondeIngest, NdbcParse, StationComparison, UsgsIvParse, WqpResultsParse, FishKillScoring,
+         RiskZoning, ModelEvaluation, ComparativeAggregation, ComparativeSql, CastProfiling, SurfaceInterpolation,
+         SyntheticGeneration, FigureConstruction, RawTable, RawTablePage, ExplorerPage]
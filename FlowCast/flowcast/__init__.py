@@ -0,0 +1,6 @@
+"""
+FlowCast core package.
+
+Importable building blocks shared by the Streamlit pages (and usable outside
+of Streamlit, e.g. from scheduled jobs or a Python shell).
+"""
@@ -0,0 +1,141 @@
+"""
+Command-line entry point for running FlowCast analyses without Streamlit.
+
+Usage (from the ``FlowCast`` directory)::
+
+    python -m flowcast score fish-kill data/oct25-2024.csv -o risk.csv
+    python -m flowcast score water-quality uploads/*.csv
+    python -m flowcast forecast 41122 --column WTMP --horizon 48
+    python -m flowcast compare data/march-2024.csv data/oct25-2024.csv -o monthly.csv
+    python -m flowcast evaluate fish-kill data/oct25-2024.csv
+    python -m flowcast store data/*.csv
+    python -m flowcast sql "SELECT month, avg(\"ODO mg/L\") FROM observations GROUP BY month"
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+
+def _write(df, output):
+    if output:
+        df.to_csv(output, index=False)
+        print(f"Wrote {len(df)} rows to {output}")
+    else:
+        df.to_csv(sys.stdout, index=False)
+
+
+def score(args):
+    from flowcast import models, storage
+
+    df = pd.concat([storage.read_sonde_csv(path) for path in args.inputs], ignore_index=True)
+    if args.model == "fish-kill":
+        result = models.assess_fish_kill(df, models.load_model(models.FISH_KILL_MODEL))
+    else:
+        result = models.predict_water_quality(df, models.load_model(models.MULTI_OUTPUT_MODEL))
+    _write(result, args.output)
+
+
+def forecast(args):
+    from flowcast.forecast import forecast_series, ndbc_timestamps
+    from flowcast.ingest import fetch_ndbc_station
+
+    df = fetch_ndbc_station(args.station)
+    if args.column not in df.columns:
+        raise SystemExit(f"Station {args.station} does not report {args.column}.")
+    _, frame = forecast_series(df[args.column].set_axis(ndbc_timestamps(df)), horizon=args.horizon,
+                               level=args.level)
+    if frame is None:
+        raise SystemExit(f"Not enough recent {args.column} history at station {args.station}.")
+    _write(frame, args.output)
+
+
+def compare(args):
+    from flowcast import analytics, storage
+
+    combined = analytics.combine_sonde_frames([storage.read_sonde_csv(path) for path in args.inputs])
+    df, columns = analytics.select_parameters(combined)
+    if not columns:
+        raise SystemExit(f"None of {', '.join(analytics.COMPARATIVE_PARAMETERS)} found in the inputs.")
+    _write(analytics.monthly_averages(df, columns), args.output)
+
+
+def evaluate(args):
+    from flowcast import evaluation, models, storage
+
+    name = args.model.replace("-", "_")
+    monitor = evaluation.Monitor(name)
+    reference = storage.load_default_dataset().frame if monitor.reference() is None else None
+    model = models.load_model(monitor.path)
+    for path in args.inputs:
+        df = storage.read_sonde_csv(path)
+        scored = models.assess_fish_kill(df, model) if name == "fish_kill" else models.predict_water_quality(df, model)
+        recorded = monitor.record(scored, reference)
+        reference = None
+        print(f"{path}: {'recorded' if recorded else 'already recorded'}", file=sys.stderr)
+    errors, drift = evaluation.history(name)
+    if args.drift:
+        _write(drift, args.output)
+    else:
+        _write(errors, args.output)
+
+
+def store(args):
+    from flowcast import warehouse
+
+    for path in args.inputs:
+        print(f"{path}: {warehouse.store_file(path)}")
+
+
+def sql(args):
+    from flowcast import warehouse
+
+    _write(warehouse.query(args.query), args.output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m flowcast", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("score", help="Score sonde CSV files with a trained model.")
+    p.add_argument("model", choices=["fish-kill", "water-quality"])
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=score)
+
+    p = commands.add_parser("forecast", help="Forecast an NDBC station column.")
+    p.add_argument("station")
+    p.add_argument("--column", default="WTMP")
+    p.add_argument("--horizon", type=int, default=24)
+    p.add_argument("--level", type=float, default=0.9)
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=forecast)
+
+    p = commands.add_parser("compare", help="Monthly averages of the comparative-analysis parameters.")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=compare)
+
+    p = commands.add_parser("evaluate", help="Log error and drift metrics of scored sonde CSV files and print the history.")
+    p.add_argument("model", choices=["fish-kill", "water-quality"])
+    p.add_argument("inputs", nargs="*")
+    p.add_argument("--drift", action="store_true", help="Print input drift (PSI) instead of errors.")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=evaluate)
+
+    p = commands.add_parser("store", help="Add sonde CSV files to the Parquet observation store.")
+    p.add_argument("inputs", nargs="+")
+    p.set_defaults(func=store)
+
+    p = commands.add_parser("sql", help="Run SQL over the stored observations (view 'observations').")
+    p.add_argument("query")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=sql)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
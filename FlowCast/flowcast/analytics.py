@@ -0,0 +1,75 @@
+"""
+Aggregations behind the Comparative Analysis section.
+"""
+import pandas as pd
+
+DATE_COLUMNS = ('Date', 'Date (MM/DD/YYYY)')
+COMPARATIVE_PARAMETERS = ['ODO mg/L', 'pH', 'Chlorophyll RFU']
+LOCATION_COLUMNS = ['Date', 'Latitude', 'Longitude', 'Depth m']
+
+STUDY_START = '2024-03-01'
+STUDY_END = '2024-10-31'
+
+
+def combine_sonde_frames(frames, start=STUDY_START, end=STUDY_END):
+    """
+    Stack sonde exports and keep the rows inside ``[start, end]``.
+
+    Each frame may name its date column ``Date`` or ``Date (MM/DD/YYYY)``,
+    or carry the compact schema's ``Timestamp`` (see :mod:`flowcast.schema`);
+    all are normalized to a parsed ``Date`` column before stacking.
+
+    Raises
+    ------
+    ValueError
+        If a frame has no date column.
+    """
+    normalized = []
+    for df in frames:
+        if 'Timestamp' in df.columns:
+            df = df.rename(columns={'Timestamp': 'Date'})
+            df['Date'] = df['Date'].dt.normalize()
+            normalized.append(df)
+            continue
+        date_column = next((col for col in DATE_COLUMNS if col in df.columns), None)
+        if date_column is None:
+            raise ValueError("The uploaded data must include a 'Date' or 'Date (MM/DD/YYYY)' column.")
+        df = df.rename(columns={date_column: 'Date'})
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        normalized.append(df)
+
+    combined = pd.concat(normalized, ignore_index=True) if normalized else pd.DataFrame(columns=['Date'])
+    return combined[(combined['Date'] >= start) & (combined['Date'] <= end)]
+
+
+def select_parameters(df, parameters=COMPARATIVE_PARAMETERS):
+    """
+    Narrow ``df`` to location columns plus the available ``parameters``.
+
+    Negative depths (sensor above the surface) are dropped and a categorical
+    ``Month`` label ("March 2024") is added, with categories in order of
+    appearance.  Returns ``(frame, available_parameters)``.
+    """
+    available = [col for col in parameters if col in df.columns]
+    if not available:
+        return df.iloc[0:0], available
+
+    df = df[[col for col in LOCATION_COLUMNS if col in df.columns] + available]
+    if 'Depth m' in df.columns:
+        df = df[df['Depth m'] >= 0]
+
+    # Format each distinct month once instead of every row.
+    codes, months = pd.factorize(df['Date'].dt.to_period('M'))
+    labels = months.strftime('%B %Y')
+    df = df.assign(Month=pd.Categorical.from_codes(codes, categories=labels))
+    return df, available
+
+
+def monthly_averages(df, columns):
+    """Mean of ``columns`` per ``Month``."""
+    return df.groupby('Month', observed=True)[columns].mean().reset_index()
+
+
+def month_slice(df, month):
+    """Rows of ``df`` recorded in ``month`` (a ``Month`` label)."""
+    return df[df['Month'] == month]
@@ -0,0 +1,88 @@
+"""
+Page stylesheets: merged, minified and served as static files.
+
+The CSS sources live in ``assets/css``.  :data:`BUNDLES` lists, per page,
+which sources make up its stylesheet (in cascade order).  The first call to
+:func:`stylesheet_url` for a bundle concatenates and minifies its sources and
+writes ``static/css/<bundle>.<hash>.css``, which Streamlit serves under
+``app/static/`` when ``server.enableStaticServing`` is on.  :func:`inject_css`
+then sends only a ``<link>`` tag on each rerun instead of the whole style
+block; the content hash in the file name lets browsers cache it for good.
+
+If static serving is disabled the minified CSS is inlined as a fallback.
+
+Bundles can be prebuilt for a deployment with ``python -m flowcast.assets``.
+"""
+import functools
+import hashlib
+import os
+import re
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+CSS_DIR = APP_DIR / "assets" / "css"
+STATIC_DIR = APP_DIR / "static"
+STATIC_URL = "app/static"
+
+BUNDLES = {
+    "home": ["home.css", "theme.css", "images.css"],
+    "background": ["background.css", "theme.css", "images.css"],
+    "analysis": ["analysis.css"],
+    "dashboard": ["dashboard.css"],
+    "sign-up": ["sign-up.css", "theme.css"],
+    "about": ["about.css", "theme.css", "images.css"],
+}
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+@functools.lru_cache(maxsize=None)
+def bundle_css(name):
+    """Minified CSS of bundle ``name``; built once per process."""
+    try:
+        sources = BUNDLES[name]
+    except KeyError:
+        raise ValueError(f"Unknown stylesheet bundle {name!r}; expected one of {', '.join(BUNDLES)}") from None
+    return "".join(minify_css((CSS_DIR / source).read_text(encoding="utf-8")) for source in sources)
+
+
+@functools.lru_cache(maxsize=None)
+def build(name):
+    """Write bundle ``name`` to the static folder; returns its path relative to it."""
+    css = bundle_css(name)
+    digest = hashlib.sha256(css.encode()).hexdigest()[:12]
+    relative = f"css/{name}.{digest}.css"
+    path = STATIC_DIR / relative
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(css, encoding="utf-8")
+        os.replace(tmp, path)
+    return relative
+
+
+def stylesheet_url(name):
+    """URL of bundle ``name`` as served by Streamlit's static file serving."""
+    return f"{STATIC_URL}/{build(name)}"
+
+
+def inject_css(name):
+    """Style the current page with bundle ``name``."""
+    import streamlit as st
+
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(f'<link rel="stylesheet" href="{stylesheet_url(name)}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>{bundle_css(name)}</style>", unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    for bundle in BUNDLES:
+        print(STATIC_DIR / build(bundle))
@@ -0,0 +1,477 @@
+"""
+Result cache shared by the app's replicas, with single-flight misses.
+
+``st.cache_data`` keeps results inside one Streamlit process: behind a load
+balancer every replica fetches and holds its own copy of each station.
+:class:`Cache` puts results in a pluggable backend instead, chosen with
+``FLOWCAST_CACHE``:
+
+* ``memory://`` (default): per process, as before;
+* ``file:///shared/dir``: pickles in a directory shared by the replicas (one
+  host or a shared volume), written atomically, with ``fcntl`` file locks
+  (on Windows, where there is no ``fcntl``, misses are only merged within a
+  process); expired entries are deleted when read and swept periodically;
+* ``redis://host:6379/0``: a Redis-compatible server (Redis, Valkey, KeyDB),
+  with the optional ``redis`` package.
+
+Keys are ``<FLOWCAST_CACHE_NAMESPACE>:<name>:<hash of the arguments>``, so
+deployments (or app versions) sharing a server do not see each other's
+entries.  Values are pickled in every backend, so callers always get their
+own copy, as with ``st.cache_data``.
+
+Misses are single-flight: concurrent misses for the same key in one process
+wait for the first caller, and across replicas the backend lock makes
+the others wait for the replica computing it and then read its result
+(for at most ``LOCK_TIMEOUT`` seconds, after which they compute it too).
+Errors are not cached.  The in-process part is :class:`SingleFlight`,
+which :func:`coalesced` also applies to the upstream fetchers.
+
+Every lookup is counted in ``flowcast_cache_requests_total`` by ``cache``
+(the name), ``result`` (``hit``, ``miss`` or ``coalesced``: served by a
+concurrent computation) and ``replica`` (``FLOWCAST_REPLICA``, default host
+and pid); :meth:`Cache.stats` gives the same counts and the hit rate
+in-process.
+
+Usage::
+
+    @cache.cached("ndbc_station", ttl=600)
+    def station_frame(station_id): ...
+
+``python -m flowcast.cache clear [NAME]`` drops entries of the configured
+backend.
+"""
+import argparse
+import collections
+import contextlib
+import functools
+import hashlib
+import os
+import pickle
+import socket
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from flowcast import metrics
+
+CACHE_URL = os.environ.get("FLOWCAST_CACHE") or "memory://"
+NAMESPACE = os.environ.get("FLOWCAST_CACHE_NAMESPACE", "flowcast")
+REPLICA = os.environ.get("FLOWCAST_REPLICA") or f"{socket.gethostname()}-{os.getpid()}"
+
+MEMORY_ENTRIES = 256
+# Longest wait (s) for another replica computing the same key before computing it anyway.
+LOCK_TIMEOUT = 60.0
+POLL_INTERVAL = 0.05
+# Seconds between sweeps of expired entries in a DiskBackend, counted from its last sweep (checked on writes).
+SWEEP_INTERVAL = 300.0
+# Expiry time (epoch seconds, inf for none) at the start of each DiskBackend file.
+EXPIRY_HEADER = struct.Struct("<d")
+KEY_HASH_LENGTH = 24
+
+MISSING = object()
+
+
+def _dumps(value, ttl):
+    expires = time.time() + ttl if ttl else None
+    return pickle.dumps((expires, value), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(data):
+    expires, value = pickle.loads(data)
+    if expires is not None and expires < time.time():
+        return MISSING
+    return value
+
+
+# ===============================
+# Backends
+# ===============================
+
+class MemoryBackend:
+    """Entries of this process only (an LRU of ``max_entries``)."""
+
+    def __init__(self, max_entries=MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                return MISSING
+            self._entries.move_to_end(key)
+        return _loads(data)
+
+    def set(self, key, value, ttl=None):
+        data = _dumps(value, ttl)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lock(self, key):
+        # Concurrent misses within the process are merged by Cache already.
+        return contextlib.nullcontext()
+
+    def clear(self, prefix=""):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+class DiskBackend:
+    """
+    Pickled entries in ``directory``, shared by every process that can reach it.
+
+    Each file starts with its expiry time (8 bytes), so expired entries are
+    deleted when read and, every ``SWEEP_INTERVAL`` seconds of writes, by a
+    :meth:`sweep` that reads only those headers.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        # The key's readable prefix (namespace and name) groups entries for clear().
+        return self.directory / key.rsplit(":", 1)[0].replace(":", "/") / f"{digest}.pkl"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            if len(data) < EXPIRY_HEADER.size:
+                return MISSING
+            (expires,) = EXPIRY_HEADER.unpack_from(data)
+            if expires < time.time():
+                # Another replica may have replaced it since; that costs it a recomputation at worst.
+                path.unlink(missing_ok=True)
+                return MISSING
+            return _loads(data[EXPIRY_HEADER.size:])
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return MISSING
+
+    def set(self, key, value, ttl=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        expires = time.time() + ttl if ttl else float("inf")
+        tmp.write_bytes(EXPIRY_HEADER.pack(expires) + _dumps(value, ttl))
+        os.replace(tmp, path)
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + SWEEP_INTERVAL
+            self.sweep()
+
+    def sweep(self):
+        """Delete expired entries (and lock files idle for ``LOCK_TIMEOUT`` without an entry); returns the count."""
+        removed = 0
+        now = time.time()
+        for path in self.directory.rglob("*.pkl") if self.directory.exists() else ():
+            try:
+                with open(path, "rb") as fh:
+                    header = fh.read(EXPIRY_HEADER.size)
+                if len(header) == EXPIRY_HEADER.size and EXPIRY_HEADER.unpack(header)[0] < now:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        for path in self.directory.rglob("*.lock") if self.directory.exists() else ():
+            try:
+                if not path.with_suffix(".pkl").exists() and path.stat().st_mtime < now - LOCK_TIMEOUT:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        path = self._path(key).with_suffix(".lock")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Touched so that sweep() sees the lock file in use.
+        path.touch()
+        with open(path, "a") as fh:
+            # Waits while another process computes the entry, up to LOCK_TIMEOUT; released on close.
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while True:
+                try:
+                    fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    # The holder finished (its result is there for the caller to read) or took too long.
+                    if self.get(key) is not MISSING or time.monotonic() >= deadline:
+                        break
+                    time.sleep(POLL_INTERVAL)
+            yield
+
+    def clear(self, prefix=""):
+        folder = self.directory / prefix.rstrip(":").replace(":", "/")
+        for path in folder.rglob("*.pkl") if folder.exists() else ():
+            path.unlink(missing_ok=True)
+
+
+class RedisBackend:
+    """Entries in a Redis-compatible server at ``url`` (needs the ``redis`` package)."""
+
+    # Deletes the lock only if this caller still holds it.
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("FLOWCAST_CACHE=redis://... needs the 'redis' package (pip install redis).") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        data = self._client.get(key)
+        return MISSING if data is None else _loads(data)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, _dumps(value, ttl), px=int(ttl * 1000) if ttl else None)
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        name, token = f"{key}:lock", uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        acquired = False
+        while not acquired and time.monotonic() < deadline:
+            acquired = bool(self._client.set(name, token, nx=True, px=int(LOCK_TIMEOUT * 1000)))
+            # The holder finished: its result is in the cache for the caller to read.
+            if not acquired and self._client.get(key) is not None:
+                break
+            if not acquired:
+                time.sleep(POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            if acquired:
+                self._client.eval(self._RELEASE, 1, name, token)
+
+    def clear(self, prefix=""):
+        for key in self._client.scan_iter(match=f"{prefix}*"):
+            self._client.delete(key)
+
+
+def backend(url=CACHE_URL):
+    """Backend for a ``FLOWCAST_CACHE`` URL (``memory://``, ``file:///dir`` or ``redis://...``)."""
+    parts = urlsplit(url)
+    if parts.scheme == "memory":
+        return MemoryBackend()
+    if parts.scheme == "file":
+        return DiskBackend(parts.netloc + parts.path)
+    if parts.scheme in ("redis", "rediss", "unix"):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported cache URL {url!r}; use memory://, file:///path or redis://host:port/db.")
+
+
+# ===============================
+# Cache
+# ===============================
+
+class _Flight:
+    """A call in progress that concurrent callers wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Merges concurrent calls with the same key into one, across threads.
+
+    :meth:`do` runs ``func`` for the first caller of a key; callers arriving
+    while it runs wait for it and get the same result object (or exception)
+    instead of running ``func`` again.  Nothing is kept once the call ends.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """``(func(), shared)``, where ``shared`` is True for callers served by another caller's call."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+        try:
+            flight.value = func()
+            return flight.value, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+def coalesced(source, key=None):
+    """
+    Decorator merging concurrent identical calls of a fetcher (see :class:`SingleFlight`).
+
+    Calls are identical when ``key(*args, **kwargs)`` (default: the
+    arguments, by ``repr``) is.  Waiting callers share the leader's result
+    object, so it must not be modified in place; they are counted in
+    ``flowcast_fetch_coalesced_total`` by ``source``.
+    """
+    def decorate(func):
+        flights = SingleFlight()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parts = key(*args, **kwargs) if key else (args, sorted(kwargs.items()))
+            value, shared = flights.do(repr(parts), lambda: func(*args, **kwargs))
+            if shared:
+                metrics.count("flowcast_fetch_coalesced_total",
+                              documentation="Fetches served by a concurrent identical fetch.", source=source)
+            return value
+        return wrapper
+    return decorate
+
+
+class Cache:
+    """Single-flight cache over a backend; keys are namespaced with ``namespace``."""
+
+    RESULTS = ("hit", "miss", "coalesced")
+
+    def __init__(self, store, namespace=NAMESPACE):
+        self.store = store
+        self.namespace = namespace
+        self._flights = SingleFlight()
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def key(self, name, parts):
+        """Backend key of ``name`` called with ``parts`` (anything with a stable ``repr``)."""
+        digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:KEY_HASH_LENGTH]
+        return f"{self.namespace}:{name}:{digest}"
+
+    def _count(self, name, result):
+        with self._lock:
+            self._counts[name, result] += 1
+        metrics.count("flowcast_cache_requests_total", documentation="Shared cache lookups by result.",
+                      cache=name, result=result, replica=REPLICA)
+
+    def get_or_compute(self, name, parts, compute, ttl=None):
+        """
+        Cached value of ``name`` for ``parts``, calling ``compute()`` on a miss.
+
+        Concurrent misses for the same key (in this process or, with a shared
+        backend, in other replicas) wait for one computation.  Exceptions of
+        ``compute`` propagate to every waiting caller and are not cached.
+        """
+        key = self.key(name, parts)
+        value = self.store.get(key)
+        if value is not MISSING:
+            self._count(name, "hit")
+            return value
+
+        value, shared = self._flights.do(key, lambda: self._fill(name, key, compute, ttl))
+        if shared:
+            self._count(name, "coalesced")
+            return pickle.loads(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def _fill(self, name, key, compute, ttl):
+        with self.store.lock(key):
+            # Another replica may have filled the entry while this one waited for the lock.
+            value = self.store.get(key)
+            if value is not MISSING:
+                self._count(name, "coalesced")
+            else:
+                value = compute()
+                self.store.set(key, value, ttl)
+                self._count(name, "miss")
+        return value
+
+    def cached(self, name=None, ttl=None, key=None):
+        """
+        Decorator caching a function's results under ``name`` (default: its qualified name).
+
+        ``key(*args, **kwargs)`` returns what identifies a call (default: the
+        arguments themselves, which must have a stable ``repr``).
+        """
+        def decorate(func):
+            label = name or f"{func.__module__}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                parts = key(*args, **kwargs) if key else (args, sorted(kwargs.items()))
+                return self.get_or_compute(label, parts, lambda: func(*args, **kwargs), ttl)
+
+            wrapper.clear = lambda: self.clear(label)
+            return wrapper
+        return decorate
+
+    def clear(self, name=None):
+        """Drop the entries of ``name`` (default: every entry of the namespace)."""
+        self.store.clear(f"{self.namespace}:{name}:" if name else f"{self.namespace}:")
+
+    def stats(self):
+        """``{name: {'hit': n, 'miss': n, 'coalesced': n, 'hit_rate': ...}}`` of this process."""
+        with self._lock:
+            counts = dict(self._counts)
+        result = {}
+        for (name, kind), n in counts.items():
+            result.setdefault(name, dict.fromkeys(self.RESULTS, 0))[kind] = n
+        for entry in result.values():
+            entry['hit_rate'] = (entry['hit'] + entry['coalesced']) / sum(entry[r] for r in self.RESULTS)
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def default():
+    """The process-wide :class:`Cache` configured by ``FLOWCAST_CACHE``."""
+    return Cache(backend(CACHE_URL))
+
+
+def cached(name=None, ttl=None, key=None):
+    """:meth:`Cache.cached` on :func:`default`, resolved at the first call."""
+    def decorate(func):
+        wrapped = {}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not wrapped:
+                wrapped['func'] = default().cached(name, ttl, key)(func)
+            return wrapped['func'](*args, **kwargs)
+
+        wrapper.clear = lambda: default().clear(name or f"{func.__module__}.{func.__qualname__}")
+        return wrapper
+    return decorate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m flowcast.cache", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("clear", help=f"Drop cached entries of {CACHE_URL} (namespace {NAMESPACE}).")
+    p.add_argument("name", nargs="?")
+    args = parser.parse_args(argv)
+    default().clear(args.name)
+    print(f"Cleared {args.name or 'all entries'} in {CACHE_URL} ({NAMESPACE})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,231 @@
+"""
+Side-by-side comparison of many stations on a common time grid.
+
+Readings from NDBC buoys or USGS sites are aligned onto one regular grid in
+a single vectorized pass over all stations: the station code and grid step
+of every reading form a flat index, and ``np.bincount`` sums and counts them
+into a ``(stations, steps)`` float32 matrix.  Point-sampled parameters can
+take the reading nearest each grid time instead (``pandas.merge_asof``
+within a tolerance).
+
+On the aligned matrix, :func:`differences` compares every station with a
+reference, :func:`lagged_correlations` correlates all station pairs at every
+lag with a few matrix products per lag, and :func:`station_summary` reports
+per-station statistics and coverage.  Fifty stations over 90 days of hourly
+steps is a 50 x 2160 float32 matrix (~430 KB); only the raw readings are
+large, and they are dropped once aligned.
+
+Typical use::
+
+    frames, errors = ingest.fetch_ndbc_stations(ids)
+    aligned = align({sid: ndbc_series(df, 'WTMP') for sid, df in frames.items()}, freq='1h')
+    lags, corr = lagged_correlations(aligned, max_lag=24)
+    peaks = peak_lags(aligned, lags, corr)
+"""
+import collections
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from flowcast.forecast import NDBC_SENTINELS, ndbc_timestamps
+
+AlignedSeries = collections.namedtuple('AlignedSeries', ['values', 'station_ids', 'grid'])
+AlignedSeries.__doc__ = "A ``(stations, steps)`` float32 matrix, its station ids and its UTC time grid."
+
+
+# ===============================
+# Series extraction
+# ===============================
+
+def ndbc_series(df, column):
+    """``column`` of an NDBC frame as a UTC-indexed series without gaps or sentinels."""
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    series = pd.Series(values, index=ndbc_timestamps(df), name=column)
+    return series[series.index.notna() & series.notna() & ~series.isin(NDBC_SENTINELS)]
+
+
+def usgs_series(readings, parameter):
+    """
+    One parameter of a USGS long-format frame (see :func:`flowcast.ingest.parse_usgs_iv`).
+
+    ``parameter`` is matched against the start of the ``Parameter`` names,
+    e.g. ``"Temperature, water"``.
+    """
+    if readings.empty:
+        return pd.Series(dtype=float, name=parameter)
+    rows = readings[readings['Parameter'].str.startswith(parameter)]
+    index = pd.to_datetime(rows['Timestamp'], utc=True, errors='coerce')
+    series = pd.Series(rows['Value'].to_numpy(dtype=float), index=pd.DatetimeIndex(index), name=parameter)
+    return series[series.index.notna() & series.notna()]
+
+
+# ===============================
+# Alignment
+# ===============================
+
+def _grid(series, freq, start, end):
+    step = pd.Timedelta(freq)
+    non_empty = [s for s in series if len(s)]
+    if start is None:
+        start = min(s.index.min() for s in non_empty) if non_empty else None
+    if end is None:
+        end = max(s.index.max() for s in non_empty) if non_empty else None
+    if start is None or end is None:
+        return pd.DatetimeIndex([], tz='UTC'), step
+    start = pd.Timestamp(start, tz='UTC') if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)
+    end = pd.Timestamp(end, tz='UTC') if pd.Timestamp(end).tzinfo is None else pd.Timestamp(end)
+    return pd.date_range(start.floor(step), end.floor(step), freq=step), step
+
+
+def align(series_by_station, freq='1h', start=None, end=None, how='mean', tolerance=None):
+    """
+    Put several timestamp-indexed series on one regular UTC grid.
+
+    Parameters
+    ----------
+    series_by_station : dict
+        Station id to series (e.g. from :func:`ndbc_series`).  Naive
+        timestamps are taken as UTC.
+    freq : str
+        Grid step, e.g. ``"1h"`` or ``"1D"``.
+    start, end : timestamp, optional
+        Grid bounds; default to the earliest and latest reading.
+    how : {"mean", "nearest"}
+        ``"mean"`` averages the readings inside each step (left-closed,
+        labelled by its start); ``"nearest"`` takes the reading closest to
+        each grid time, at most ``tolerance`` (default: half a step) away.
+
+    Returns
+    -------
+    AlignedSeries
+        Stations without readings in the range are kept as all-NaN rows.
+    """
+    station_ids = list(series_by_station)
+    series = [s if s.index.tz is not None else s.tz_localize('UTC') for s in series_by_station.values()]
+    grid, step = _grid(series, freq, start, end)
+    values = np.full((len(station_ids), len(grid)), np.nan, dtype='float32')
+    if not len(grid) or not station_ids:
+        return AlignedSeries(values, station_ids, grid)
+
+    lengths = np.array([len(s) for s in series])
+    codes = np.repeat(np.arange(len(station_ids)), lengths)
+    # Timestamps can be in ns or us depending on how they were parsed.
+    times = np.concatenate([s.index.as_unit('ns').asi8 for s in series] + [np.empty(0, dtype='int64')])
+    readings = np.concatenate([s.to_numpy(dtype=float) for s in series] + [np.empty(0)])
+
+    if how == 'mean':
+        origin, step_ns = grid[0].value, step.value
+        buckets = (times - origin) // step_ns
+        keep = (buckets >= 0) & (buckets < len(grid)) & ~np.isnan(readings)
+        flat = codes[keep] * len(grid) + buckets[keep]
+        sums = np.bincount(flat, weights=readings[keep], minlength=values.size)
+        counts = np.bincount(flat, minlength=values.size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values[:] = (sums / counts).reshape(values.shape)
+    elif how == 'nearest':
+        tolerance = step / 2 if tolerance is None else pd.Timedelta(tolerance)
+        observed = pd.DataFrame({'station': codes, 'time': times.astype('datetime64[ns]'), 'value': readings})
+        observed = observed.dropna().sort_values('time')
+        targets = pd.DataFrame({
+            'station': np.repeat(np.arange(len(station_ids)), len(grid)),
+            'time': np.tile(grid.tz_convert(None).as_unit('ns').to_numpy(), len(station_ids)),
+        }).sort_values('time', kind='stable')
+        matched = pd.merge_asof(targets, observed, on='time', by='station', direction='nearest', tolerance=tolerance)
+        position = np.searchsorted(grid.tz_convert(None).as_unit('ns').to_numpy(), matched['time'].to_numpy())
+        values[matched['station'].to_numpy(), position] = matched['value'].to_numpy()
+    else:
+        raise ValueError(f"how must be 'mean' or 'nearest', not {how!r}")
+    return AlignedSeries(values, station_ids, grid)
+
+
+def aligned_frame(aligned, names=None):
+    """The aligned matrix as a frame: one column per station (renamed with ``names``), indexed by time."""
+    columns = [names.get(sid, sid) for sid in aligned.station_ids] if names else aligned.station_ids
+    return pd.DataFrame(aligned.values.T, index=aligned.grid, columns=columns)
+
+
+# ===============================
+# Cross-station statistics
+# ===============================
+
+def station_summary(aligned, names=None):
+    """Mean, standard deviation, range, latest value and grid coverage per station."""
+    values = aligned.values.astype(float)
+    valid = ~np.isnan(values)
+    with warnings.catch_warnings():
+        # All-NaN rows (stations without readings) give NaN statistics.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        summary = pd.DataFrame({
+            'mean': np.nanmean(values, axis=1),
+            'std': np.nanstd(values, axis=1, ddof=1),
+            'min': np.nanmin(values, axis=1),
+            'max': np.nanmax(values, axis=1),
+        }, index=[names.get(sid, sid) for sid in aligned.station_ids] if names else aligned.station_ids)
+    last = np.where(valid.any(axis=1), valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1), -1)
+    summary['latest'] = np.where(last >= 0, values[np.arange(len(values)), last], np.nan)
+    summary['coverage'] = valid.mean(axis=1) if values.shape[1] else 0.0
+    return summary
+
+
+def differences(aligned, reference, names=None):
+    """Each station minus station ``reference`` at every grid step (reference column omitted)."""
+    row = aligned.station_ids.index(reference)
+    frame = aligned_frame(aligned, names)
+    return frame.drop(columns=frame.columns[row]).sub(frame.iloc[:, row], axis=0)
+
+
+def lagged_correlations(aligned, max_lag=24, min_periods=24):
+    """
+    Pearson correlation of every station pair at lags ``-max_lag..max_lag`` steps.
+
+    ``corr[k, i, j]`` correlates station ``i`` at time ``t`` with station
+    ``j`` at ``t + lags[k]`` over the steps where both have data (pairwise
+    complete, like ``DataFrame.corr``); a positive peak lag means ``j``
+    follows ``i``.  Pairs with fewer than ``min_periods`` common steps are
+    NaN.
+
+    Returns ``(lags, corr)`` with ``corr`` of shape ``(lags, stations, stations)``.
+    """
+    x = aligned.values.astype(float)
+    valid = (~np.isnan(x)).astype(float)
+    x0 = np.where(valid > 0, x, 0.0)
+    n_steps = x.shape[1]
+    lags = np.arange(-max_lag, max_lag + 1)
+    corr = np.full((len(lags), len(x), len(x)), np.nan)
+    for k, lag in enumerate(lags):
+        if abs(lag) >= n_steps:
+            continue
+        # Station i over [0, T - lag) against station j over [lag, T) (mirrored for negative lags).
+        a = slice(0, n_steps - lag) if lag >= 0 else slice(-lag, n_steps)
+        b = slice(lag, n_steps) if lag >= 0 else slice(0, n_steps + lag)
+        xa, xb, ma, mb = x0[:, a], x0[:, b], valid[:, a], valid[:, b]
+        n = ma @ mb.T
+        sa, sb = xa @ mb.T, ma @ xb.T
+        saa, sbb = (xa * xa) @ mb.T, ma @ (xb * xb).T
+        sab = xa @ xb.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = (n * sab - sa * sb) / np.sqrt((n * saa - sa ** 2) * (n * sbb - sb ** 2))
+        r[n < min_periods] = np.nan
+        corr[k] = np.clip(r, -1.0, 1.0)
+    return lags, corr
+
+
+def peak_lags(aligned, lags, corr, names=None):
+    """
+    One row per station pair: correlation at lag 0 and the lag of the strongest correlation.
+
+    ``lag_steps`` is in grid steps; positive means the second station follows the first.
+    """
+    labels = [names.get(sid, sid) for sid in aligned.station_ids] if names else aligned.station_ids
+    i, j = np.triu_indices(len(labels), k=1)
+    pairs = corr[:, i, j]
+    strongest = np.argmax(np.where(np.isnan(pairs), -np.inf, np.abs(pairs)), axis=0) if len(i) else i
+    zero = int(np.flatnonzero(lags == 0)[0])
+    return pd.DataFrame({
+        'station_a': np.asarray(labels, dtype=object)[i],
+        'station_b': np.asarray(labels, dtype=object)[j],
+        'correlation': pairs[zero] if len(i) else [],
+        'peak_lag_steps': lags[strongest] if len(i) else [],
+        'peak_correlation': pairs[strongest, np.arange(len(i))] if len(i) else [],
+    })
@@ -0,0 +1,310 @@
+"""
+Model evaluation and drift monitoring over scored batches.
+
+Every batch of predictions that comes with observed values (an uploaded
+sonde file, a stored export, ...) is reduced to a few numbers and appended
+to a log per model version:
+
+* per target, the count and the sums of errors, absolute errors and squared
+  errors, from which RMSE, MAE and bias follow for any run of batches
+  (online: nothing but the sums is kept);
+* per input feature, a histogram over the bins of a reference sample (the
+  deciles of the first batch seen by that version, or of the frame passed
+  as ``reference``), from which the population stability index (PSI)
+  against the reference follows for any run of batches.
+
+A batch costs one pass over its rows (``np.searchsorted`` and
+``np.bincount``) and one JSON line; the same batch content is recorded
+once per version, so reruns of a page do not count twice (the keys of a
+version's recorded batches are read from its log once per process).
+
+Parsed logs are cached per path with the size and modification time they
+had when read; a log that has only grown since (logs are append-only) is
+read from where the last read stopped, so the Real-Time Analysis page
+parses each new line once rather than every log on every rerun.
+
+Logs live in ``FLOWCAST_EVALUATION_DIR`` (default ``FlowCast/evaluation``)
+as ``<model>/<version>.jsonl`` plus a ``<version>.reference.json`` with the
+bin edges and reference counts.  The version is the start of the SHA-256 of
+the model file, so retraining starts a new history.
+"""
+import datetime
+import functools
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from flowcast import metrics, models, storage
+from flowcast.assets import APP_DIR
+
+EVALUATION_DIR = Path(os.environ.get("FLOWCAST_EVALUATION_DIR", APP_DIR / "evaluation"))
+
+# Monitored models: name -> (model path, input features, {observed column: predicted column}).
+MONITORED = {
+    'fish_kill': (models.FISH_KILL_MODEL, models.FISH_KILL_FEATURES, {'ODO mg/L': 'Predicted ODO mg/L'}),
+    'water_quality': (models.MULTI_OUTPUT_MODEL, models.WATER_QUALITY_FEATURES,
+                      {column: f'Predicted {column}' for column in models.WATER_QUALITY_TARGETS}),
+}
+
+VERSION_LENGTH = 12
+REFERENCE_BINS = 10
+# Floor for empty bin proportions in the PSI.
+PSI_EPSILON = 1e-4
+# Conventional PSI alert levels: moderate and significant shift.
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+_lock = threading.Lock()
+# Log path -> content keys of the batches in it, read on first use.
+_batches = {}
+# Log path -> ((st_size, st_mtime_ns), bytes parsed, records), see _read_log.
+_logs = {}
+
+
+# ===============================
+# Statistics
+# ===============================
+
+def error_sums(observed, predicted):
+    """``[n, Σ error, Σ |error|, Σ error²]`` over the rows where both values are present (error = predicted - observed)."""
+    error = np.asarray(predicted, dtype=float) - np.asarray(observed, dtype=float)
+    error = error[~np.isnan(error)]
+    return [int(len(error)), float(error.sum()), float(np.abs(error).sum()), float((error ** 2).sum())]
+
+
+def error_metrics(sums):
+    """RMSE, MAE and bias from (possibly accumulated) :func:`error_sums`; NaN without rows."""
+    n, total, absolute, squared = sums
+    if not n:
+        return {'rmse': np.nan, 'mae': np.nan, 'bias': np.nan}
+    return {'rmse': float(np.sqrt(squared / n)), 'mae': absolute / n, 'bias': total / n}
+
+
+def reference_edges(values, bins=REFERENCE_BINS):
+    """Interior bin edges at the quantiles of ``values`` (duplicates dropped; the outer bins are open)."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return []
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])).tolist()
+
+
+def histogram(values, edges):
+    """Counts of ``values`` in the bins delimited by ``edges`` (``len(edges) + 1`` bins; NaN ignored)."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1).tolist()
+
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    """Population stability index of the counts ``actual`` against ``expected`` (same bins)."""
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if not expected.sum() or not actual.sum():
+        return np.nan
+    p = np.maximum(expected / expected.sum(), epsilon)
+    q = np.maximum(actual / actual.sum(), epsilon)
+    return float(((q - p) * np.log(q / p)).sum())
+
+
+# ===============================
+# Logs
+# ===============================
+
+def _read_log(path):
+    """
+    Records of the JSONL log at ``path`` (empty if missing), parsed once per change.
+
+    The returned list is shared between callers and must not be modified.
+    Only complete lines are parsed; a line still being appended is read by
+    the next call.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return []
+    key = (stat.st_size, stat.st_mtime_ns)
+    cached = _logs.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[2]
+    # Append-only: a log at least as long as what was parsed only gained lines.
+    offset, records = (cached[1], cached[2]) if cached is not None and stat.st_size >= cached[1] else (0, [])
+    with open(path, 'rb') as fh:
+        fh.seek(offset)
+        data = fh.read()
+    end = data.rfind(b"\n") + 1
+    added = [json.loads(line) for line in data[:end].decode('utf-8').splitlines() if line.strip()]
+    if added:
+        records = records + added
+    _logs[path] = (key, offset + end, records)
+    return records
+
+
+@functools.lru_cache(maxsize=None)
+def _file_version(path, mtime_ns, size):
+    with open(path, 'rb') as fh:
+        return hashlib.sha256(fh.read()).hexdigest()[:VERSION_LENGTH]
+
+
+def model_version(path):
+    """Version id of the model file at ``path`` (hash of its content)."""
+    stat = os.stat(path)
+    return _file_version(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+class Monitor:
+    """
+    Evaluation log of one model (``name`` in :data:`MONITORED`).
+
+    ``version`` defaults to :func:`model_version` of the model file.
+    """
+
+    def __init__(self, name, version=None, root=None):
+        self.name = name
+        self.path, self.features, self.targets = MONITORED[name]
+        self.version = version or model_version(self.path)
+        self.directory = Path(root or EVALUATION_DIR) / name
+
+    @property
+    def log_path(self):
+        return self.directory / f"{self.version}.jsonl"
+
+    @property
+    def reference_path(self):
+        return self.directory / f"{self.version}.reference.json"
+
+    def reference(self):
+        """``{'edges': {feature: [...]}, 'counts': {feature: [...]}}``, or None before the first batch."""
+        if not self.reference_path.exists():
+            return None
+        return json.loads(self.reference_path.read_text())
+
+    def set_reference(self, frame):
+        """Bin the features of ``frame`` and store them as this version's drift reference."""
+        edges = {feature: reference_edges(frame[feature]) for feature in self.features if feature in frame.columns}
+        reference = {'edges': edges, 'counts': {f: histogram(frame[f], e) for f, e in edges.items()}}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.reference_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(reference))
+        os.replace(tmp, self.reference_path)
+        return reference
+
+    def _records(self):
+        return _read_log(self.log_path)
+
+    def _recorded_keys(self):
+        keys = _batches.get(self.log_path)
+        if keys is None:
+            keys = _batches[self.log_path] = {record['batch'] for record in self._records()}
+        return keys
+
+    def recorded(self, key):
+        """Whether the batch with content key ``key`` is already in the log."""
+        return key in self._recorded_keys()
+
+    def record(self, prediction_df, reference=None, time=None):
+        """
+        Add one scored batch (model inputs, observed targets and ``Predicted <target>`` columns).
+
+        ``reference`` (a frame with the model inputs) sets the drift
+        reference if this version has none yet; otherwise the batch itself
+        becomes the reference.  Returns False if the same batch content was
+        already recorded.
+        """
+        with metrics.timed("flowcast_evaluation_seconds", "Evaluation and drift bookkeeping time per batch.",
+                           model=self.name):
+            columns = [c for c in (*self.features, *self.targets, *self.targets.values())
+                       if c in prediction_df.columns]
+            key = storage.frame_key(prediction_df, columns)
+            with _lock:
+                if self.recorded(key):
+                    return False
+                stored = self.reference() or self.set_reference(prediction_df if reference is None else reference)
+                line = {
+                    'batch': key,
+                    'time': (time or datetime.datetime.now(datetime.timezone.utc)).isoformat(),
+                    'rows': len(prediction_df),
+                    'errors': {target: error_sums(prediction_df[target], prediction_df[predicted])
+                               for target, predicted in self.targets.items()
+                               if target in prediction_df.columns and predicted in prediction_df.columns},
+                    'histograms': {feature: histogram(prediction_df[feature], edges)
+                                   for feature, edges in stored['edges'].items() if feature in prediction_df.columns},
+                }
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, 'a', encoding='utf-8') as fh:
+                    fh.write(json.dumps(line) + "\n")
+                self._recorded_keys().add(key)
+        return True
+
+    def errors(self):
+        """Error metrics per batch and target with running totals (see :func:`errors_frame`)."""
+        return errors_frame(self._records())
+
+    def drift(self):
+        """PSI per batch and feature against the reference (see :func:`drift_frame`)."""
+        return drift_frame(self._records(), self.reference())
+
+
+def errors_frame(records):
+    """
+    Error metrics of logged batches, one row per batch and target.
+
+    Columns: ``Time``, ``Target``, ``Rows``, ``RMSE``, ``MAE``, ``Bias`` and
+    ``Running RMSE`` / ``Running MAE`` / ``Running Bias`` over all batches
+    so far.
+    """
+    rows = [(record['time'], target, *sums) for record in records for target, sums in record['errors'].items()]
+    df = pd.DataFrame(rows, columns=['Time', 'Target', 'Rows', 'sum', 'abs', 'sq'])
+    df['Time'] = pd.to_datetime(df['Time'], utc=True, format='ISO8601')
+    df[['Rows', 'sum', 'abs', 'sq']] = df[['Rows', 'sum', 'abs', 'sq']].astype(float)
+    running = df.groupby('Target')[['Rows', 'sum', 'abs', 'sq']].cumsum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for prefix, sums in (('', df), ('Running ', running)):
+            df[f'{prefix}RMSE'] = np.sqrt(sums['sq'] / sums['Rows'])
+            df[f'{prefix}MAE'] = sums['abs'] / sums['Rows']
+            df[f'{prefix}Bias'] = sums['sum'] / sums['Rows']
+    return df.drop(columns=['sum', 'abs', 'sq']).astype({'Rows': 'int64'})
+
+
+def drift_frame(records, reference):
+    """PSI of each logged batch and feature against ``reference``, and over all batches so far (``Running PSI``)."""
+    rows = []
+    totals = {}
+    for record in records:
+        for feature, counts in record['histograms'].items():
+            totals[feature] = np.add(totals.get(feature, 0), counts)
+            expected = reference['counts'][feature]
+            rows.append((record['time'], feature, sum(counts), psi(expected, counts), psi(expected, totals[feature])))
+    df = pd.DataFrame(rows, columns=['Time', 'Feature', 'Rows', 'PSI', 'Running PSI'])
+    df['Time'] = pd.to_datetime(df['Time'], utc=True, format='ISO8601')
+    return df
+
+
+def _started(log):
+    """Time of the first batch recorded in ``log`` (logs are append-only, so this does not change)."""
+    with open(log, encoding='utf-8') as fh:
+        first = fh.readline()
+    return pd.to_datetime(json.loads(first)['time'], utc=True) if first.strip() else None
+
+
+def versions(name, root=None):
+    """Recorded versions of model ``name``, by the time of their first batch (oldest first)."""
+    directory = Path(root or EVALUATION_DIR) / name
+    started = {log.stem: _started(log) for log in directory.glob("*.jsonl")} if directory.exists() else {}
+    return sorted((version for version in started if started[version] is not None), key=lambda v: (started[v], v))
+
+
+def history(name, root=None):
+    """``(errors, drift)`` frames of every recorded version of ``name``, with a ``Version`` column."""
+    errors, drift = [errors_frame([]).assign(Version='')], [drift_frame([], None).assign(Version='')]
+    for version in versions(name, root):
+        monitor = Monitor(name, version, root)
+        records = monitor._records()
+        errors.append(errors_frame(records).assign(Version=version))
+        drift.append(drift_frame(records, monitor.reference()).assign(Version=version))
+    return pd.concat(errors, ignore_index=True), pd.concat(drift, ignore_index=True)
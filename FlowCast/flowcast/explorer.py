@@ -0,0 +1,258 @@
+"""
+Server-side data explorer: filter, sort, choose columns, then fetch one page.
+
+The data stays on the server.  Each rerun runs two DuckDB queries where the
+data lives, ``count(*)`` of the matching rows and ``SELECT <columns> ...
+ORDER BY ... LIMIT <page rows> OFFSET ...``, and only that page reaches the
+browser, as Arrow (see :mod:`flowcast.tables`).  Filters are bound as
+parameters and column names are quoted, so nothing typed by a user becomes
+SQL.
+
+There are two kinds of source:
+
+* :meth:`Explorer.warehouse`: the Parquet observation store
+  (:mod:`flowcast.warehouse`), optionally restricted to some exports.
+  Filters are pushed into the scan.  A ``Timestamp`` filter also restricts
+  the ``month`` partitions that are read.  Files are written sorted by time
+  in row groups of :data:`flowcast.warehouse.ROW_GROUP_ROWS`, so the
+  row-group min/max statistics index them and DuckDB skips the groups that
+  cannot match.  ``ORDER BY`` with ``LIMIT`` keeps only the top rows instead
+  of sorting the archive.
+* :meth:`Explorer.frame`: an in-memory frame (an upload, a station
+  download), scanned in place by DuckDB without a copy.
+
+Sorting is made deterministic by breaking ties on columns that identify a
+row (``Timestamp`` and ``Source`` in the store; every column of a frame),
+so consecutive pages neither repeat nor skip rows.
+
+:func:`show_explorer` is the Streamlit component: column selection, sort,
+up to :data:`FILTER_ROWS` filters and a page selector.
+"""
+import collections
+import threading
+
+import pandas as pd
+
+from flowcast import metrics, tables, warehouse
+
+# Filter operators and their SQL (``{}`` is the quoted column); unary operators take no value.
+OPERATORS = {
+    '=': '{} = ?',
+    '≠': '{} <> ?',
+    '<': '{} < ?',
+    '≤': '{} <= ?',
+    '>': '{} > ?',
+    '≥': '{} >= ?',
+    'contains': 'contains(lower(CAST({} AS VARCHAR)), lower(?))',
+    'is missing': '{} IS NULL',
+    'is present': '{} IS NOT NULL',
+}
+UNARY = ('is missing', 'is present')
+# Operators on Timestamp that bound the month partitions from below and from above.
+LOWER_BOUNDS = ('=', '>', '≥')
+UPPER_BOUNDS = ('=', '<', '≤')
+
+FILTER_ROWS = 3
+FRAME_VIEW = "explored_frame"
+
+Filter = collections.namedtuple('Filter', ['column', 'op', 'value'])
+Filter.__doc__ = "Rows where ``column op value`` holds (``value`` is ignored by unary operators)."
+
+_local = threading.local()
+
+
+def kind(duckdb_type):
+    """``'number'``, ``'time'`` or ``'text'`` for a DuckDB column type."""
+    name = duckdb_type.upper()
+    if name.startswith(('TIMESTAMP', 'DATE')):
+        return 'time'
+    if name.startswith(('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT', 'UINTEGER',
+                        'UBIGINT', 'FLOAT', 'DOUBLE', 'DECIMAL', 'REAL')):
+        return 'number'
+    return 'text'
+
+
+def parse_value(column_kind, text):
+    """
+    Filter value typed as ``text`` for a column of ``column_kind``.
+
+    Raises
+    ------
+    ValueError
+        If ``text`` is not a number (number columns) or a date/time (time columns).
+    """
+    text = text.strip()
+    if column_kind == 'number':
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"{text!r} is not a number") from None
+    if column_kind == 'time':
+        try:
+            return pd.Timestamp(text).to_pydatetime()
+        except ValueError:
+            raise ValueError(f"{text!r} is not a date or time (e.g. 2024-03-15 08:30)") from None
+    return text
+
+
+def _frame_connection():
+    # One DuckDB connection per thread, as for the warehouse cursors.
+    con = getattr(_local, "connection", None)
+    if con is None:
+        import duckdb
+
+        con = _local.connection = duckdb.connect()
+    return con
+
+
+class Explorer:
+    """
+    Filtered, sorted pages of ``relation`` (a table or view name), queried with ``run(sql, params)``.
+
+    ``where`` and ``params`` restrict the rows for good (e.g. to some
+    exports); ``identity`` lists columns that tell rows apart, for
+    breaking sort ties (default: every column); ``partitioned`` means the
+    relation has the warehouse's ``month`` partition column.  Use
+    :meth:`warehouse` or :meth:`frame`.
+    """
+
+    def __init__(self, relation, run, where=(), params=(), identity=None, partitioned=False):
+        self.relation = relation
+        self.run = run
+        self.base_where = list(where)
+        self.base_params = list(params)
+        self.identity = identity
+        self.partitioned = partitioned
+        self._columns = None
+
+    @classmethod
+    def warehouse(cls, sources=None, root=None):
+        """The observation store, or only the exports ``sources``."""
+        where, params = [], []
+        if sources:
+            where.append(f"Source IN ({', '.join('?' * len(sources))})")
+            params.extend(sources)
+        run = lambda sql, params: warehouse.query_arrow(sql, params, root)
+        return cls(warehouse.TABLE, run, where, params, identity=['Timestamp', 'Source'], partitioned=True)
+
+    @classmethod
+    def frame(cls, frame):
+        """An in-memory pandas frame (its index is not shown)."""
+        def run(sql, params):
+            con = _frame_connection()
+            con.register(FRAME_VIEW, frame)
+            try:
+                return con.execute(sql, params).to_arrow_table()
+            finally:
+                con.unregister(FRAME_VIEW)
+        return cls(FRAME_VIEW, run)
+
+    def _query(self, sql, params):
+        with metrics.timed("flowcast_sql_seconds", "Warehouse SQL query time.", kind="explorer"):
+            return self.run(sql, params)
+
+    def columns(self):
+        """``{column: kind}`` of the relation, in order (see :func:`kind`)."""
+        if self._columns is None:
+            described = self._query(f"DESCRIBE SELECT * FROM {self.relation}", [])
+            self._columns = {name: kind(type_) for name, type_ in zip(described['column_name'].to_pylist(),
+                                                                      described['column_type'].to_pylist())}
+        return self._columns
+
+    def where(self, filters=()):
+        """SQL ``WHERE`` clause (or ``""``) and parameters for ``filters`` on top of the fixed restrictions."""
+        clauses, params = list(self.base_where), list(self.base_params)
+        columns = self.columns()
+        for f in filters:
+            if f.column not in columns:
+                raise ValueError(f"Unknown column {f.column!r}")
+            if f.op not in OPERATORS:
+                raise ValueError(f"Unknown operator {f.op!r}; expected one of {', '.join(OPERATORS)}")
+            clauses.append(OPERATORS[f.op].format(warehouse.quote(f.column)))
+            if f.op not in UNARY:
+                params.append(f.value)
+            if self.partitioned and f.column == 'Timestamp' and f.op in (*LOWER_BOUNDS, *UPPER_BOUNDS):
+                # Partition pruning: only the month directories that can hold matching rows are read.
+                month = pd.Timestamp(f.value).strftime(warehouse.MONTH_FORMAT)
+                if f.op in LOWER_BOUNDS:
+                    clauses.append("month >= ?")
+                    params.append(month)
+                if f.op in UPPER_BOUNDS:
+                    clauses.append("month <= ?")
+                    params.append(month)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def count(self, filters=()):
+        """Number of rows matching ``filters``."""
+        where, params = self.where(filters)
+        return self._query(f"SELECT count(*) AS n FROM {self.relation} {where}", params)['n'][0].as_py()
+
+    def page(self, columns=None, filters=(), sort=None, descending=False, number=0, page_rows=tables.PAGE_ROWS):
+        """
+        Page ``number`` (0-based) of the rows matching ``filters``, as a ``pyarrow.Table``.
+
+        ``columns`` selects and orders the columns (default: all).  Rows are
+        sorted on ``sort`` (nulls last; ties broken on the identity columns) or
+        kept in stored order.
+        """
+        available = self.columns()
+        columns = list(columns or available)
+        unknown = [c for c in [*columns, *([sort] if sort else [])] if c not in available]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(map(repr, unknown))}")
+        where, params = self.where(filters)
+        order = ""
+        if sort:
+            keys = [f"{warehouse.quote(sort)} {'DESC' if descending else 'ASC'} NULLS LAST"]
+            keys += [warehouse.quote(c) for c in (self.identity or available) if c != sort]
+            order = f"ORDER BY {', '.join(keys)}"
+        selected = ", ".join(warehouse.quote(c) for c in columns)
+        return self._query(f"SELECT {selected} FROM {self.relation} {where} {order} LIMIT ? OFFSET ?",
+                           [*params, page_rows, number * page_rows])
+
+
+def show_explorer(explorer, key, default_columns=None, page_rows=tables.PAGE_ROWS):
+    """
+    Explore ``explorer``'s rows: columns, sort, filters and a page selector.
+
+    ``key`` prefixes the widget keys and labels the rows-sent metric.
+    Returns the filters in effect.
+    """
+    import streamlit as st
+
+    kinds = explorer.columns()
+    names = list(kinds)
+    left, middle, right = st.columns([4, 2, 1])
+    shown = left.multiselect("Columns", names, default=[c for c in (default_columns or names) if c in kinds],
+                             key=f"{key}_columns")
+    sort = middle.selectbox("Sort by", [None, *names], format_func=lambda c: "(stored order)" if c is None else c,
+                            key=f"{key}_sort")
+    descending = right.toggle("Descending", key=f"{key}_descending")
+
+    filters = []
+    with st.expander("Filters"):
+        for i in range(FILTER_ROWS):
+            column_cell, op_cell, value_cell = st.columns([3, 2, 3])
+            column = column_cell.selectbox(f"Filter {i + 1}", [None, *names], key=f"{key}_filter{i}_column",
+                                           format_func=lambda c: "(none)" if c is None else c)
+            op = op_cell.selectbox("Operator", list(OPERATORS), key=f"{key}_filter{i}_op")
+            text = value_cell.text_input("Value", key=f"{key}_filter{i}_value", disabled=op in UNARY)
+            if column is None or (op not in UNARY and not text.strip()):
+                continue
+            try:
+                # 'contains' matches the text of any column
+                value = None if op in UNARY else parse_value('text' if op == 'contains' else kinds[column], text)
+            except ValueError as e:
+                st.error(f"{column}: {e}")
+                continue
+            filters.append(Filter(column, op, value))
+
+    total = explorer.count(filters)
+    number = tables.page_selector(total, key, page_rows)
+    rows = explorer.page(shown or names, filters, sort, descending, number, page_rows)
+    first = number * page_rows
+    st.caption(f"{total:,} matching row(s)" + (f"; rows {first + 1:,}–{first + rows.num_rows:,}" if total else ""))
+    metrics.count("flowcast_table_rows_sent_total", rows.num_rows, documentation="Table rows sent to browsers.",
+                  table=key)
+    st.dataframe(rows, hide_index=True)
+    return filters
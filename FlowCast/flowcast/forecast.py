@@ -0,0 +1,409 @@
+"""
+Short-horizon forecasting for buoy and sonde time series.
+
+Each station gets a damped-trend, additive-seasonal exponential smoothing
+model (Holt-Winters) on an hourly grid.  All stations are fitted together:
+the recursion runs once over time while every update is a NumPy operation
+over a ``(stations, candidates)`` array, so refreshing hundreds of stations
+costs about as much as refreshing one.
+
+Typical use::
+
+    engine = ForecastEngine()
+    engine.fit(values, station_ids, start)      # values: (stations, hours)
+    engine.update(new_values, station_ids)       # incremental, no refit
+    frame = engine.forecast_frame(horizon=48)    # 6-72 h with intervals
+"""
+import itertools
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Candidate smoothing parameters searched per station (alpha, beta, gamma).
+DEFAULT_ALPHAS = (0.1, 0.3, 0.5, 0.8)
+DEFAULT_BETAS = (0.01, 0.05, 0.15)
+DEFAULT_GAMMAS = (0.05, 0.2)
+
+# Two-sided normal quantiles for the supported interval levels.
+_Z_SCORES = {0.5: 0.674, 0.8: 1.282, 0.9: 1.645, 0.95: 1.960, 0.99: 2.576}
+
+# NDBC fills missing readings with these values instead of "MM" in some columns.
+NDBC_SENTINELS = (99.0, 999.0, 9999.0)
+
+MIN_HORIZON = 6
+MAX_HORIZON = 72
+
+
+# ===============================
+# Series preparation
+# ===============================
+
+def ndbc_timestamps(df):
+    """
+    Build UTC timestamps from the NDBC ``YY MM DD hh mm`` columns.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Frame returned by the NDBC realtime2 parser.
+
+    Returns
+    -------
+    pandas.DatetimeIndex
+    """
+    parts = df[['YY', 'MM', 'DD', 'hh', 'mm']].astype('Int64')
+    parts.columns = ['year', 'month', 'day', 'hour', 'minute']
+    return pd.DatetimeIndex(pd.to_datetime(parts, errors='coerce', utc=True))
+
+
+def to_hourly(series):
+    """
+    Resample an irregular, timestamp-indexed series onto an hourly grid.
+
+    NDBC "missing" sentinels (99, 999, 9999) are treated as gaps.
+    """
+    series = pd.to_numeric(series, errors='coerce')
+    series = series[series.index.notna()].sort_index()
+    series = series.mask(series.isin(NDBC_SENTINELS))
+    return series.resample('1h').mean()
+
+
+def hourly_matrix(series_by_station, end=None, hours=None):
+    """
+    Align several hourly series into a ``(stations, hours)`` matrix.
+
+    Parameters
+    ----------
+    series_by_station : dict
+        Mapping of station id to a timestamp-indexed ``pandas.Series``.
+    end : pandas.Timestamp, optional
+        Last hour of the grid.  Defaults to the latest observation.
+    hours : int, optional
+        Length of the grid.  Defaults to the span of all series.
+
+    Returns
+    -------
+    tuple
+        ``(values, station_ids, start)`` ready for :meth:`ForecastEngine.fit`.
+    """
+    hourly = {sid: to_hourly(s) for sid, s in series_by_station.items()}
+    hourly = {sid: s for sid, s in hourly.items() if not s.dropna().empty}
+    if not hourly:
+        return np.empty((0, 0)), [], None
+
+    if end is None:
+        end = max(s.index.max() for s in hourly.values())
+    if hours is None:
+        first = min(s.index.min() for s in hourly.values())
+        hours = int((end - first) / pd.Timedelta(hours=1)) + 1
+    grid = pd.date_range(end=end, periods=hours, freq='1h')
+
+    station_ids = list(hourly)
+    values = np.vstack([hourly[sid].reindex(grid).to_numpy(dtype=float) for sid in station_ids])
+    return values, station_ids, grid[0]
+
+
+# ===============================
+# Forecast engine
+# ===============================
+
+class ForecastEngine:
+    """
+    Vectorized Holt-Winters models for many stations at once.
+
+    Parameters
+    ----------
+    season_length : int
+        Seasonal period in hours (24 captures the diurnal cycle).
+    damping : float
+        Trend damping factor; keeps 72 h forecasts from running away.
+    refit_every : int
+        Number of hours absorbed through :meth:`update` before the smoothing
+        parameters of a station are searched again.
+    """
+
+    def __init__(self, season_length=24, damping=0.98, refit_every=168,
+                 alphas=DEFAULT_ALPHAS, betas=DEFAULT_BETAS, gammas=DEFAULT_GAMMAS):
+        self.season_length = season_length
+        self.damping = damping
+        self.refit_every = refit_every
+        self.candidates = np.array(list(itertools.product(alphas, betas, gammas)), dtype=float)
+
+        self.station_ids = []
+        self._rows = {}
+        self.params = np.empty((0, 3))
+        self.level = np.empty(0)
+        self.trend = np.empty(0)
+        self.season = np.empty((0, season_length))
+        self.sigma2 = np.empty(0)
+        self.n_obs = np.empty(0, dtype=int)
+        self.since_fit = np.empty(0, dtype=int)
+        self.next_time = None
+
+    # -----------------------------
+    # Core recursion
+    # -----------------------------
+    def _initial_state(self, values, phase=0):
+        """
+        Level, trend and seasonal indices from the first two seasons.
+
+        ``phase`` is the seasonal position of the first column (its hour for
+        a daily season), so the indices line up with :meth:`_run`.
+        """
+        m = self.season_length
+        head = values[:, :2 * m]
+        season = np.zeros((values.shape[0], m))
+        # Stations with an empty first day/season produce all-NaN slices here.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            level = np.nanmean(head[:, :m], axis=1)
+            second = np.nanmean(head[:, m:2 * m], axis=1)
+            trend = np.where(np.isfinite(second - level), (second - level) / m, 0.0)
+            level = np.where(np.isfinite(level), level, np.nanmean(values, axis=1))
+            for i in range(m):
+                season[:, (phase + i) % m] = np.nanmean(head[:, i::m], axis=1) - level
+        season = np.nan_to_num(season)
+        season -= season.mean(axis=1, keepdims=True)
+        return level, trend, season
+
+    def _run(self, values, params, level, trend, season, phase):
+        """
+        Run the smoothing recursion over ``values``.
+
+        ``params`` has shape ``(S, C, 3)`` and the state arrays ``(S, C)`` /
+        ``(S, C, m)`` so that several parameter candidates are evaluated in
+        the same pass.  Missing observations leave the state on its one-step
+        forecast.  Returns the updated state plus the sum of squared one-step
+        errors and the number of scored observations.
+        """
+        m = self.season_length
+        phi = self.damping
+        alpha, beta, gamma = params[..., 0], params[..., 1], params[..., 2]
+        sse = np.zeros(level.shape)
+        count = np.zeros(level.shape)
+        rows = np.arange(season.shape[0])[:, None]
+        cols = np.arange(season.shape[1])[None, :]
+
+        for t in range(values.shape[1]):
+            idx = (phase + t) % m
+            s_prev = season[rows, cols, idx]
+            fitted = level + phi * trend + s_prev
+            y = values[:, t][:, None]
+            observed = np.isfinite(y)
+            err = np.where(observed, y - fitted, 0.0)
+
+            new_level = level + phi * trend + alpha * err
+            trend = phi * trend + alpha * beta * err
+            season[rows, cols, idx] = s_prev + gamma * (1 - alpha) * err
+            level = new_level
+
+            sse += err * err
+            count += observed
+        return level, trend, season, sse, count
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def fit(self, values, station_ids, start):
+        """
+        Fit (or refit) models for the given stations.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Hourly observations, shape ``(stations, hours)``; NaN marks gaps.
+        station_ids : list
+            Station identifiers, one per row of ``values``.
+        start : pandas.Timestamp
+            Timestamp of the first column.
+
+        Returns
+        -------
+        ForecastEngine
+            ``self``, to allow chaining.
+        """
+        values = np.asarray(values, dtype=float)
+        n_stations, n_hours = values.shape
+        if n_stations == 0:
+            return self
+        if n_hours < 2 * self.season_length:
+            raise ValueError(f"At least {2 * self.season_length} hourly values are required to fit a model.")
+
+        n_cand = len(self.candidates)
+        start = pd.Timestamp(start)
+        phase = start.hour % self.season_length
+        level, trend, season = self._initial_state(values, phase)
+        params = np.broadcast_to(self.candidates, (n_stations, n_cand, 3))
+        level_c = np.repeat(level[:, None], n_cand, axis=1)
+        trend_c = np.repeat(trend[:, None], n_cand, axis=1)
+        season_c = np.repeat(season[:, None, :], n_cand, axis=1)
+
+        next_time = start + pd.Timedelta(hours=n_hours)
+        if self.next_time is not None and next_time != self.next_time and set(station_ids) != set(self.station_ids):
+            raise ValueError("All stations share one hourly clock; refit with history ending at the current hour.")
+        level_c, trend_c, season_c, sse, count = self._run(values, params, level_c, trend_c, season_c, phase)
+
+        best = np.argmin(sse / np.maximum(count, 1), axis=1)
+        pick = np.arange(n_stations)
+        self._store(
+            station_ids,
+            params=self.candidates[best],
+            level=level_c[pick, best],
+            trend=trend_c[pick, best],
+            season=season_c[pick, best],
+            sigma2=sse[pick, best] / np.maximum(count[pick, best] - 1, 1),
+            n_obs=count[pick, best].astype(int),
+        )
+        self.next_time = next_time
+        return self
+
+    def _store(self, station_ids, **state):
+        """Insert or overwrite per-station state rows."""
+        for sid in station_ids:
+            if sid not in self._rows:
+                self._rows[sid] = len(self.station_ids)
+                self.station_ids.append(sid)
+        grow = len(self.station_ids) - len(self.level)
+        if grow > 0:
+            m = self.season_length
+            self.params = np.vstack([self.params, np.zeros((grow, 3))])
+            self.level = np.concatenate([self.level, np.zeros(grow)])
+            self.trend = np.concatenate([self.trend, np.zeros(grow)])
+            self.season = np.vstack([self.season, np.zeros((grow, m))])
+            self.sigma2 = np.concatenate([self.sigma2, np.zeros(grow)])
+            self.n_obs = np.concatenate([self.n_obs, np.zeros(grow, dtype=int)])
+            self.since_fit = np.concatenate([self.since_fit, np.zeros(grow, dtype=int)])
+
+        rows = [self._rows[sid] for sid in station_ids]
+        for name, value in state.items():
+            getattr(self, name)[rows] = value
+        self.since_fit[rows] = 0
+
+    def update(self, values, station_ids):
+        """
+        Absorb new hourly observations without searching parameters again.
+
+        ``values`` continues the grid right after the last fitted/updated hour.
+        Stations missing from ``station_ids`` are advanced as if their
+        observations were missing, so every model stays on the same clock.
+        Returns the station ids whose models are due for a full refit.
+        """
+        given = np.asarray(values, dtype=float)
+        values = np.full((len(self.station_ids), given.shape[1]), np.nan)
+        values[[self._rows[sid] for sid in station_ids]] = given
+        rows = np.arange(len(self.station_ids))
+        phase = self.next_time.hour % self.season_length
+
+        level, trend, season, sse, count = self._run(
+            values,
+            self.params[rows][:, None, :],
+            self.level[rows][:, None],
+            self.trend[rows][:, None],
+            self.season[rows][:, None, :].copy(),
+            phase,
+        )
+        total = self.n_obs[rows] + count[:, 0]
+        self.sigma2[rows] = (self.sigma2[rows] * np.maximum(self.n_obs[rows] - 1, 0) + sse[:, 0]) / np.maximum(total - 1, 1)
+        self.level[rows] = level[:, 0]
+        self.trend[rows] = trend[:, 0]
+        self.season[rows] = season[:, 0]
+        self.n_obs[rows] = total.astype(int)
+        self.since_fit[rows] += values.shape[1]
+        self.next_time = self.next_time + pd.Timedelta(hours=values.shape[1])
+
+        return [self.station_ids[r] for r in rows if self.since_fit[r] >= self.refit_every]
+
+    def forecast(self, horizon=24, level=0.9, station_ids=None):
+        """
+        Point forecasts and prediction intervals.
+
+        Parameters
+        ----------
+        horizon : int
+            Number of hours ahead, between 6 and 72.
+        level : float
+            Interval coverage, one of 0.5, 0.8, 0.9, 0.95, 0.99.
+        station_ids : list, optional
+            Subset of stations.  Defaults to all fitted stations.
+
+        Returns
+        -------
+        dict
+            ``mean``, ``lower`` and ``upper`` arrays of shape
+            ``(stations, horizon)`` plus the matching ``station_ids``.
+        """
+        if not MIN_HORIZON <= horizon <= MAX_HORIZON:
+            raise ValueError(f"Forecast horizon must be between {MIN_HORIZON} and {MAX_HORIZON} hours.")
+        if level not in _Z_SCORES:
+            raise ValueError(f"Unsupported interval level {level}; choose one of {sorted(_Z_SCORES)}.")
+
+        station_ids = list(self.station_ids if station_ids is None else station_ids)
+        rows = np.array([self._rows[sid] for sid in station_ids], dtype=int)
+        m = self.season_length
+        phi = self.damping
+        steps = np.arange(1, horizon + 1)
+
+        # Cumulative damping: phi + phi^2 + ... + phi^h
+        damp = np.cumsum(phi ** steps)
+        phase = self.next_time.hour % m
+        season_idx = (phase + steps - 1) % m
+        mean = (self.level[rows, None] + damp[None, :] * self.trend[rows, None]
+                + self.season[rows][:, season_idx])
+
+        # Variance multipliers for additive Holt-Winters (Hyndman et al., class 1)
+        alpha = self.params[rows, 0][:, None]
+        beta = self.params[rows, 1][:, None]
+        gamma = self.params[rows, 2][:, None]
+        lag = steps[:-1]
+        # The seasonal term uses the same gamma * (1 - alpha) as the recursion in _run.
+        c = alpha * (1 + beta * np.cumsum(phi ** lag)[None, :]) + gamma * (1 - alpha) * (lag % m == 0)[None, :]
+        var = self.sigma2[rows, None] * np.concatenate(
+            [np.ones((len(rows), 1)), 1 + np.cumsum(c * c, axis=1)], axis=1
+        )
+        half = _Z_SCORES[level] * np.sqrt(var)
+        return {"station_ids": station_ids, "mean": mean, "lower": mean - half, "upper": mean + half}
+
+    def forecast_frame(self, horizon=24, level=0.9, station_ids=None):
+        """Long-format forecast: one row per station and hour ahead."""
+        result = self.forecast(horizon, level, station_ids)
+        times = pd.date_range(self.next_time, periods=horizon, freq='1h')
+        n = len(result["station_ids"])
+        return pd.DataFrame({
+            "Station": np.repeat(result["station_ids"], horizon),
+            "Timestamp": np.tile(times, n),
+            "Forecast": result["mean"].ravel(),
+            "Lower": result["lower"].ravel(),
+            "Upper": result["upper"].ravel(),
+        })
+
+
+def forecast_series(series, horizon=24, level=0.9, **engine_options):
+    """
+    Fit a single station and forecast it.
+
+    Convenience wrapper for the pages.
+
+    Parameters
+    ----------
+    series : pandas.Series
+        Observations indexed by timestamp.
+    horizon : int
+        Hours ahead (6-72).
+    level : float
+        Interval coverage.
+
+    Returns
+    -------
+    tuple
+        ``(history, forecast)`` where ``history`` is the hourly series the
+        model saw and ``forecast`` the frame from
+        :meth:`ForecastEngine.forecast_frame`, or ``(history, None)`` when
+        there is not enough data to fit a model.
+    """
+    history = to_hourly(series)
+    engine = ForecastEngine(**engine_options)
+    if history.dropna().shape[0] < 2 * engine.season_length:
+        return history, None
+    engine.fit(history.to_numpy(dtype=float)[None, :], ["series"], history.index[0])
+    return history, engine.forecast_frame(horizon, level).drop(columns="Station")
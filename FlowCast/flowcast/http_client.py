@@ -0,0 +1,375 @@
+"""
+Shared HTTP client for the NOAA, USGS and WQP APIs.
+
+All requests go through one ``aiohttp`` session living on a background event
+loop, so every page and every Streamlit session shares the same connection
+pool (HTTP/1.1 keep-alive, gzip/deflate decoding).  Requests get timeouts,
+retries with exponential backoff on 5xx/429 and transport errors, and a
+circuit breaker per upstream host so a dead API fails fast instead of
+stalling every rerun.
+
+Concurrent identical ``GET`` s (same URL, parameters and headers) are
+coalesced: while one is in flight, the others await the same request
+instead of sending their own, whichever thread or ``get_many`` call they
+come from (they all run on the client loop).  They are counted in
+``flowcast_http_coalesced_total`` by host.
+
+Async code can use :class:`AsyncHTTPClient` directly; page code calls the
+synchronous facade::
+
+    from flowcast import http_client
+
+    response = http_client.get(url, params={"format": "json"})
+    response.raise_for_status()
+    data = response.json()
+"""
+import asyncio
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from flowcast import metrics
+from flowcast.lazy import lazy_import
+
+# Deferred so that pages importing the fetchers do not pay for aiohttp until the first request.
+aiohttp = lazy_import("aiohttp")
+
+DEFAULT_TIMEOUT = float(os.environ.get("FLOWCAST_HTTP_TIMEOUT", 30))
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get("FLOWCAST_HTTP_CONNECT_TIMEOUT", 10))
+DEFAULT_RETRIES = int(os.environ.get("FLOWCAST_HTTP_RETRIES", 3))
+# Send every request to a replay server instead of the real hosts (see flowcast.replay).
+DEFAULT_UPSTREAM = os.environ.get("FLOWCAST_UPSTREAM") or None
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HTTPError(Exception):
+    """Raised for failed requests; ``status`` is None for transport errors."""
+
+    def __init__(self, message, status=None, url=None):
+        super().__init__(message)
+        self.status = status
+        self.url = url
+
+
+class CircuitOpenError(HTTPError):
+    """Raised without touching the network while a host's circuit is open."""
+
+
+class Response:
+    """Fully-read HTTP response (status, headers and body)."""
+
+    def __init__(self, status, headers, body, url, encoding=None):
+        self.status = status
+        self.status_code = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self):
+        return self.body.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPError(f"{self.status} error for url: {self.url}", status=self.status, url=self.url)
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are rejected for ``reset_timeout`` seconds.  The first request
+    after that is let through as a probe (half-open): success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class AsyncHTTPClient:
+    """
+    asyncio HTTP client with pooling, retries and circuit breaking.
+
+    Parameters
+    ----------
+    timeout : float
+        Total time budget per attempt, in seconds.
+    connect_timeout : float
+        Time allowed to establish a connection, in seconds.
+    retries : int
+        Extra attempts after a retryable failure (5xx, 429, transport error).
+    backoff : float
+        Base delay for exponential backoff; attempt ``n`` waits a random
+        time up to ``backoff * 2 ** n`` seconds, capped at ``max_backoff``.
+    pool_size, per_host : int
+        Connection pool limits (total and per upstream host).
+    failure_threshold, reset_timeout
+        Circuit breaker settings, see :class:`CircuitBreaker`.
+    upstream : str, optional
+        Base URL of a replay server; ``https://host/path`` is then requested
+        as ``{upstream}/host/path``.
+    recorder : callable, optional
+        Called as ``recorder(method, url, params, response)`` with every final
+        response, e.g. :class:`flowcast.replay.Recorder`.
+    coalesce : bool
+        Share one in-flight request between concurrent identical ``GET`` s.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=0.5, max_backoff=10.0, pool_size=100, per_host=10, keepalive=60.0,
+                 failure_threshold=5, reset_timeout=30.0, upstream=DEFAULT_UPSTREAM, recorder=None, coalesce=True):
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.keepalive = keepalive
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.recorder = recorder
+        self.coalesce = coalesce
+        self._session = None
+        self._breakers = {}
+        self._inflight = {}
+
+    def breaker(self, host):
+        """Circuit breaker for ``host`` (created on first use)."""
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self._breakers[host]
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host,
+                                             keepalive_timeout=self.keepalive, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                auto_decompress=True,
+                headers={"Accept-Encoding": "gzip, deflate", "User-Agent": "FlowCast"},
+            )
+        return self._session
+
+    def route(self, url):
+        """Actual URL to request, taking the replay upstream into account."""
+        if not self.upstream:
+            return url
+        parts = urlsplit(url)
+        return f"{self.upstream}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+    def _delay(self, attempt, response=None):
+        """Backoff delay for ``attempt``, honouring a numeric Retry-After header."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def request(self, method, url, params=None, headers=None, data=None):
+        """
+        Send a request and read the whole body.
+
+        Returns the final :class:`Response` (which may still carry an error
+        status once retries are exhausted) or raises :class:`HTTPError` for
+        transport failures and :class:`CircuitOpenError` when the host is
+        currently tripped.
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        session = await self.session()
+        target = self.route(url)
+        last_error = None
+        last_response = None
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                # Tripped while retrying: hand back the last error response if there is one.
+                if last_response is not None:
+                    return last_response
+                raise CircuitOpenError(f"Circuit open for {host}; skipping request.", url=url)
+            try:
+                async with session.request(method, target, params=params, headers=headers, data=data) as resp:
+                    body = await resp.read()
+                    response = Response(resp.status, dict(resp.headers), body, url, resp.charset)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                last_error = HTTPError(f"Request to {url} failed: {e!r}", url=url)
+                if attempt < self.retries:
+                    await asyncio.sleep(self._delay(attempt))
+                continue
+
+            if response.status in RETRY_STATUSES:
+                breaker.record_failure()
+                last_response = response
+                if attempt < self.retries:
+                    await asyncio.sleep(self._delay(attempt, response))
+                    continue
+                return self._record(method, url, params, response)
+
+            breaker.record_success()
+            return self._record(method, url, params, response)
+
+        raise last_error
+
+    def _record(self, method, url, params, response):
+        if self.recorder is not None:
+            self.recorder(method, url, params, response)
+        return response
+
+    async def get(self, url, params=None, headers=None):
+        """``GET`` ``url``; concurrent identical calls share one request (see ``coalesce``)."""
+        if not self.coalesce:
+            return await self.request("GET", url, params=params, headers=headers)
+        key = repr((url, sorted((params or {}).items()), sorted((headers or {}).items())))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.request("GET", url, params=params, headers=headers))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.count("flowcast_http_coalesced_total", documentation="GETs served by a concurrent identical GET.",
+                          host=urlsplit(url).netloc)
+        # Shielded so that one caller giving up does not cancel the request for the others.
+        return await asyncio.shield(task)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class HTTPClient:
+    """
+    Synchronous facade over :class:`AsyncHTTPClient`.
+
+    Runs the async client on a private event loop in a daemon thread, so it
+    can be called from Streamlit scripts (and from several sessions at once)
+    while all requests share a single connection pool.
+    """
+
+    def __init__(self, **options):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="flowcast-http", daemon=True)
+        self._thread.start()
+        self.client = AsyncHTTPClient(**options)
+
+    def run(self, coro):
+        """Run a coroutine on the client loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def request(self, method, url, params=None, headers=None, data=None):
+        return self.run(self.client.request(method, url, params=params, headers=headers, data=data))
+
+    def get(self, url, params=None, headers=None):
+        """``GET`` ``url``, sharing the request with concurrent identical calls (see :meth:`AsyncHTTPClient.get`)."""
+        return self.run(self.client.get(url, params=params, headers=headers))
+
+    def get_many(self, requests, headers=None):
+        """
+        ``GET`` each ``(url, params)`` concurrently (within the pool limits).
+
+        Returns, in order, the :class:`Response` or the exception raised for
+        each request.
+        """
+        async def gather():
+            return await asyncio.gather(*(self.client.get(url, params=params, headers=headers)
+                                          for url, params in requests), return_exceptions=True)
+        return self.run(gather())
+
+    def close(self):
+        if self._loop.is_closed() or not self._thread.is_alive():
+            return
+        self.run(self.client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide :class:`HTTPClient`, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            options = {}
+            if os.environ.get("FLOWCAST_RECORD_DIR"):
+                from flowcast.replay import Recorder
+                options["recorder"] = Recorder(os.environ["FLOWCAST_RECORD_DIR"])
+            _client = HTTPClient(**options)
+        return _client
+
+
+def configure(**options):
+    """Replace the process-wide client, e.g. to point it at a replay server."""
+    global _client
+    with _client_lock:
+        old, _client = _client, HTTPClient(**options)
+    if old is not None:
+        old.close()
+    return _client
+
+
+@atexit.register
+def _close_client():
+    if _client is not None:
+        _client.close()
+
+
+def get(url, params=None, headers=None):
+    """``GET`` through the shared client; see :meth:`AsyncHTTPClient.get`."""
+    return get_client().get(url, params=params, headers=headers)
+
+
+def get_many(requests, headers=None):
+    """Concurrent ``GET`` s through the shared client; see :meth:`HTTPClient.get_many`."""
+    return get_client().get_many(requests, headers=headers)
@@ -0,0 +1,204 @@
+"""
+Responsive, content-hashed variants of the photos in ``media/``.
+
+For every source image :func:`build_image` writes AVIF, WebP and JPEG
+variants (AVIF and WebP only where Pillow was built with them: AVIF needs
+Pillow 11.2 or later with libavif) at the widths in :data:`WIDTHS` (never upscaled) to
+``static/img/<name>-<width>.<hash>.<ext>`` and records them in
+``static/img/manifest.json``.  Pages render photos with :func:`show_image`,
+which emits a ``<picture>`` element so the browser downloads only the
+smallest format and width it can use.
+
+Variants are built ahead of a deployment with ``python -m flowcast.images``;
+a source missing from the manifest (or changed since) is built on first use.
+The manifest is read once per process, so rendering a page does not touch
+the file system.
+
+Because the file names change whenever the content does, the variants can be
+cached forever.  Streamlit's static serving sends no ``Cache-Control``
+header, so set it on the reverse proxy in front of the app, e.g. for nginx::
+
+    location /app/static/img/ {
+        proxy_pass http://flowcast;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+If static serving is disabled, :func:`show_image` falls back to
+``st.image`` with the largest WebP (or, without WebP, JPEG) variant.
+"""
+import functools
+import hashlib
+import html
+import json
+import os
+import threading
+from pathlib import Path
+
+from flowcast.assets import APP_DIR, STATIC_DIR, STATIC_URL
+
+MEDIA_DIR = APP_DIR / "media"
+IMAGE_DIR = STATIC_DIR / "img"
+MANIFEST = IMAGE_DIR / "manifest.json"
+
+WIDTHS = (480, 960, 1440)
+
+# (format, Pillow save options) from most to least preferred by the browser; JPEG is the fallback.
+FORMATS = (
+    ("avif", {"quality": 55, "speed": 8}),
+    ("webp", {"quality": 78, "method": 4}),
+    ("jpeg", {"quality": 80, "optimize": True, "progressive": True}),
+)
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+# Pillow feature names of the formats that depend on an optional codec.
+CODECS = {"avif": "avif", "webp": "webp"}
+
+_manifest_lock = threading.Lock()
+
+
+def _write_atomic(path, data):
+    tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _read_manifest():
+    try:
+        return json.loads(MANIFEST.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+@functools.lru_cache(maxsize=None)
+def available_formats():
+    """The entries of :data:`FORMATS` this Pillow build can write (always including JPEG)."""
+    from PIL import features
+
+    return tuple((fmt, options) for fmt, options in FORMATS if fmt not in CODECS or features.check(CODECS[fmt]))
+
+
+def _signature(path):
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def build_image(source):
+    """
+    Write all variants of ``source`` (a path relative to the app directory).
+
+    Returns the manifest entry: source dimensions, content hash and the list
+    of ``{"format", "width", "path"}`` variants, ``path`` being relative to
+    the static folder.
+    """
+    from PIL import Image, ImageOps
+
+    path = APP_DIR / source
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+    IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(path) as original:
+        # Phone photos are often stored sideways with an EXIF rotation flag.
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    widths = sorted({min(width, image.width) for width in WIDTHS})
+    variants = []
+    for width in widths:
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, options in available_formats():
+            relative = f"img/{path.stem}-{width}.{digest}.{'jpg' if fmt == 'jpeg' else fmt}"
+            target = STATIC_DIR / relative
+            if not target.exists():
+                tmp = target.with_suffix(f"{target.suffix}.{os.getpid()}.tmp")
+                resized.save(tmp, format=fmt.upper(), **options)
+                os.replace(tmp, target)
+            variants.append({"format": fmt, "width": width, "path": relative})
+
+    entry = {
+        "hash": digest,
+        "width": image.width,
+        "height": image.height,
+        "signature": _signature(path),
+        "variants": variants,
+    }
+    with _manifest_lock:
+        manifest = _read_manifest()
+        manifest[Path(source).as_posix()] = entry
+        _write_atomic(MANIFEST, json.dumps(manifest, indent=2).encode())
+    return entry
+
+
+def build_all():
+    """Build variants for every image in ``media/``; returns the manifest."""
+    for path in sorted(MEDIA_DIR.iterdir()):
+        if path.suffix.lower() in IMAGE_SUFFIXES:
+            build_image(path.relative_to(APP_DIR).as_posix())
+    return _read_manifest()
+
+
+@functools.lru_cache(maxsize=None)
+def variants(source):
+    """
+    Manifest entry of ``source``, building it if missing or outdated.
+
+    Returns ``None`` if the source image does not exist.  Cached per process.
+    """
+    path = APP_DIR / source
+    if not path.exists():
+        return None
+    entry = _read_manifest().get(Path(source).as_posix())
+    if entry is None or entry.get("signature") != _signature(path) or not all(
+            (STATIC_DIR / v["path"]).exists() for v in entry["variants"]):
+        entry = build_image(source)
+    return entry
+
+
+def picture_html(source, alt="", caption=None, sizes="(max-width: 768px) 100vw, 50vw"):
+    """``<picture>`` markup for ``source`` with a ``srcset`` per format."""
+    entry = variants(source)
+    by_format = {}
+    for variant in entry["variants"]:
+        by_format.setdefault(variant["format"], []).append(variant)
+
+    sources = []
+    # Only the formats that were built (the manifest may come from another Pillow build).
+    for fmt in [fmt for fmt, _ in FORMATS[:-1] if fmt in by_format]:
+        srcset = ", ".join(f"{STATIC_URL}/{v['path']} {v['width']}w" for v in by_format[fmt])
+        sources.append(f'<source type="image/{fmt}" srcset="{srcset}" sizes="{sizes}">')
+    fallback = by_format["jpeg"]
+    srcset = ", ".join(f"{STATIC_URL}/{v['path']} {v['width']}w" for v in fallback)
+    img = (f'<img src="{STATIC_URL}/{fallback[-1]["path"]}" srcset="{srcset}" sizes="{sizes}" '
+           f'width="{entry["width"]}" height="{entry["height"]}" alt="{html.escape(alt)}" loading="lazy" '
+           f'decoding="async">')
+    figcaption = f"<figcaption>{html.escape(caption)}</figcaption>" if caption else ""
+    return f'<figure class="flowcast-image"><picture>{"".join(sources)}{img}</picture>{figcaption}</figure>'
+
+
+def show_image(source, caption=None, alt=None, sizes="(max-width: 768px) 100vw, 50vw"):
+    """
+    Render ``source`` at the size the browser needs.
+
+    Shows an error and returns ``False`` if the image does not exist.
+    """
+    import streamlit as st
+
+    entry = variants(source)
+    if entry is None:
+        st.error(f"Image file not found: {source}")
+        return False
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(picture_html(source, alt if alt is not None else caption or "", caption, sizes),
+                    unsafe_allow_html=True)
+    else:
+        fmt = "webp" if any(v["format"] == "webp" for v in entry["variants"]) else "jpeg"
+        largest = [v for v in entry["variants"] if v["format"] == fmt][-1]
+        st.image(str(STATIC_DIR / largest["path"]), caption=caption, use_container_width=True)
+    return True
+
+
+if __name__ == "__main__":
+    for name, entry in build_all().items():
+        largest = [v for v in entry["variants"] if v["width"] == entry["variants"][-1]["width"]]
+        smallest = min((STATIC_DIR / v["path"]).stat().st_size for v in largest)
+        print(f"{name:<24} {(APP_DIR / name).stat().st_size / 1024:8.0f} KB -> "
+              f"{smallest / 1024:6.0f} KB at {largest[0]['width']}px")
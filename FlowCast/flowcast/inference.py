@@ -0,0 +1,521 @@
+"""
+Local model inference service with micro-batching.
+
+Scoring inside the Streamlit process means every worker process unpickles
+its own models and every session scores its rows on its own.
+:class:`InferenceServer` instead holds each model once, in a separate
+process, and serves predictions over localhost HTTP or a Unix socket::
+
+    python -m flowcast.inference serve --port 8765
+    python -m flowcast.inference serve --socket /tmp/flowcast-models.sock
+    export FLOWCAST_INFERENCE_URL=http://127.0.0.1:8765    # or unix:///tmp/flowcast-models.sock
+
+Requests that arrive while a batch is being formed (up to ``max_wait``
+seconds, or ``max_rows`` rows) are concatenated and scored with one
+``predict`` call, then split back per request.  Up to ``workers`` batches
+(default: one per core) are scored at a time on a thread pool; numpy and
+scikit-learn release the GIL while they compute.
+
+The protocol is deliberately small.  ``POST /predict/<model>`` takes a
+float array in ``.npy`` format, one row per sample and one column per
+feature of :data:`MODELS`, and returns the predictions the same way.
+``GET /stats`` returns request latency percentiles and batch sizes as JSON,
+``GET /metrics`` the Prometheus metrics of the server process.
+
+Pages go through :func:`model`, which returns a :class:`RemoteModel` (an
+object with the estimator's ``predict``) when ``FLOWCAST_INFERENCE_URL`` is
+set and the locally loaded model otherwise, so
+:func:`flowcast.models.assess_fish_kill` and
+:func:`flowcast.models.predict_water_quality` work unchanged.  If the
+service is unreachable or fails (a 5xx status) the client falls back to
+scoring in-process.
+``python -m flowcast.inference bench`` measures latency and throughput
+under concurrent clients.
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import http.client
+import io
+import json
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from flowcast import metrics, models
+
+# Served models: name -> (model path, feature columns in request order).
+MODELS = {
+    'fish_kill': (models.FISH_KILL_MODEL, models.FISH_KILL_FEATURES),
+    'water_quality': (models.MULTI_OUTPUT_MODEL, models.WATER_QUALITY_FEATURES),
+}
+
+DEFAULT_URL = os.environ.get("FLOWCAST_INFERENCE_URL") or None
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = float(os.environ.get("FLOWCAST_INFERENCE_TIMEOUT", 30))
+
+MAX_BATCH_ROWS = 65_536
+MAX_WAIT = 0.002
+# Request latencies kept for the /stats percentiles.
+LATENCY_WINDOW = 10_000
+
+NPY_TYPE = "application/x-npy"
+
+
+def to_npy(array):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def from_npy(data):
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+def model_name(path):
+    """Name in :data:`MODELS` of the model stored at ``path``."""
+    for name, (model_path, _) in MODELS.items():
+        if os.path.normpath(model_path) == os.path.normpath(path):
+            return name
+    raise KeyError(f"No served model is stored at {path}")
+
+
+# ===============================
+# Server
+# ===============================
+
+_Request = collections.namedtuple('_Request', ['features', 'future'])
+
+
+class InferenceServer:
+    """
+    Serve :data:`MODELS` with micro-batching.
+
+    Parameters
+    ----------
+    host, port : str, int
+        TCP address (``port=0`` picks a free port); ignored with ``path``.
+    path : str, optional
+        Unix socket to listen on instead of TCP.
+    workers : int, optional
+        Batches scored concurrently (default: number of cores).
+    max_rows : int
+        Rows at which a batch is closed without waiting.
+    max_wait : float
+        Seconds a batch stays open for more requests after the first one.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, path=None, workers=None, max_rows=MAX_BATCH_ROWS,
+                 max_wait=MAX_WAIT):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self._queues = {}
+        self._tasks = []
+        self._slots = None
+        self._pool = None
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    # --- scoring ---------------------------------------------------------
+
+    def _predict(self, name, features):
+        import pandas as pd
+
+        path, columns = MODELS[name]
+        # Feature names as at training time (the estimators warn on bare arrays).
+        predictions = models.load_model(path).predict(pd.DataFrame(features, columns=columns))
+        return np.asarray(predictions, dtype=float)
+
+    async def _score(self, name, batch):
+        try:
+            features = np.concatenate([request.features for request in batch])
+            # Timed by hand: metrics.timed keeps per-thread state and coroutines interleave on one thread.
+            start = time.perf_counter()
+            predictions = await self._loop.run_in_executor(self._pool, self._predict, name, features)
+            metrics.observe("flowcast_inference_batch_seconds", time.perf_counter() - start,
+                            "Inference batch scoring time.", model=name)
+        except Exception as e:  # handed to every waiting request
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        else:
+            start = 0
+            for request in batch:
+                end = start + len(request.features)
+                if not request.future.done():
+                    request.future.set_result(predictions[start:end])
+                start = end
+            self.batches += 1
+            self.rows += len(features)
+            metrics.observe("flowcast_inference_batch_rows", len(features), "Rows per inference batch.", model=name)
+        finally:
+            self._slots.release()
+
+    async def _batcher(self, name, queue):
+        while True:
+            batch = [await queue.get()]
+            rows = len(batch[0].features)
+            deadline = self._loop.time() + self.max_wait
+            while rows < self.max_rows:
+                try:
+                    request = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(request)
+                rows += len(request.features)
+            # Wait for a free worker; requests keep queueing (and batch up) meanwhile.
+            await self._slots.acquire()
+            self._loop.create_task(self._score(name, batch))
+
+    def _queue(self, name):
+        queue = self._queues.get(name)
+        if queue is None:
+            queue = self._queues[name] = asyncio.Queue()
+            self._tasks.append(self._loop.create_task(self._batcher(name, queue)))
+        return queue
+
+    # --- HTTP ------------------------------------------------------------
+
+    async def predict(self, request):
+        from aiohttp import web
+
+        start = time.perf_counter()
+        name = request.match_info["model"]
+        if name not in MODELS:
+            return web.Response(status=404, text=f"Unknown model {name!r}")
+        path, columns = MODELS[name]
+        if not os.path.exists(path):
+            return web.Response(status=503, text=f"Model file {path} not found")
+        try:
+            features = from_npy(await request.read()).astype(float, copy=False)
+        except ValueError as e:
+            return web.Response(status=400, text=f"Invalid .npy body: {e}")
+        if features.ndim != 2 or features.shape[1] != len(columns):
+            return web.Response(status=400, text=f"Expected an (n, {len(columns)}) array of {', '.join(columns)}")
+
+        future = self._loop.create_future()
+        await self._queue(name).put(_Request(features, future))
+        try:
+            predictions = await future
+        except Exception as e:
+            return web.Response(status=500, text=f"{type(e).__name__}: {e}")
+        elapsed = time.perf_counter() - start
+        self.requests += 1
+        self.latencies.append(elapsed)
+        metrics.observe("flowcast_inference_seconds", elapsed, "Inference request latency.", model=name)
+        return web.Response(body=to_npy(predictions), content_type=NPY_TYPE)
+
+    def stats(self):
+        """Requests, batches and p50/p99 request latency (over the last ``LATENCY_WINDOW`` requests)."""
+        latencies = np.fromiter(self.latencies, dtype=float)
+        p50, p99 = (float(p) * 1000 for p in np.percentile(latencies, [50, 99])) if len(latencies) else (None, None)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "rows": self.rows,
+            "requests_per_batch": self.requests / self.batches if self.batches else None,
+            "rows_per_batch": self.rows / self.batches if self.batches else None,
+            "p50_ms": p50,
+            "p99_ms": p99,
+            "workers": self.workers,
+        }
+
+    async def _stats(self, request):
+        from aiohttp import web
+        return web.json_response(self.stats())
+
+    async def _metrics(self, request):
+        from aiohttp import web
+        return web.Response(text=metrics.REGISTRY.render(), content_type="text/plain")
+
+    @property
+    def url(self):
+        return f"unix://{self.path}" if self.path else f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Load the models present on disk and start serving on a background thread; returns :attr:`url`."""
+        from aiohttp import web
+
+        for path, _ in MODELS.values():
+            if os.path.exists(path):
+                models.load_model(path)
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="flowcast-inference")
+            app = web.Application(client_max_size=2 ** 30)
+            app.router.add_post("/predict/{model}", self.predict)
+            app.router.add_get("/stats", self._stats)
+            app.router.add_get("/metrics", self._metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            if self.path:
+                if os.path.exists(self.path):
+                    os.unlink(self.path)  # left over from a previous run
+                site = web.UnixSite(self._runner, self.path)
+            else:
+                site = web.TCPSite(self._runner, self.host, self.port)
+            self._loop.run_until_complete(site.start())
+            if not self.path:
+                self.port = site._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="flowcast-inference", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    async def _shutdown(self):
+        await self._runner.cleanup()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._pool.shutdown()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ===============================
+# Client
+# ===============================
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class InferenceError(RuntimeError):
+    """The inference service answered with an error status."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class InferenceClient:
+    """
+    Synchronous client for :class:`InferenceServer`.
+
+    ``url`` is ``http://host:port`` or ``unix:///path/to.sock``.  Each
+    thread keeps its own keep-alive connection.
+    """
+
+    def __init__(self, url, timeout=DEFAULT_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            parts = urlsplit(self.url)
+            if parts.scheme == "unix":
+                connection = _UnixConnection(parts.path, self.timeout)
+            else:
+                connection = http.client.HTTPConnection(parts.hostname, parts.port or DEFAULT_PORT,
+                                                        timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _request(self, method, path, body=None, headers=None):
+        connection = self._connection()
+        for attempt in range(2):
+            try:
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # A kept-alive connection the server has closed; reconnect once.
+                connection.close()
+                if attempt:
+                    self._local.connection = None
+                    raise
+            except BaseException:
+                # Timed out or failed mid-request: the connection is in an unknown state, start afresh next time.
+                connection.close()
+                self._local.connection = None
+                raise
+        if response.status != 200:
+            raise InferenceError(response.status, data.decode(errors="replace"))
+        return data
+
+    def predict(self, name, features):
+        """Predictions of model ``name`` for ``features`` (rows x the model's feature columns)."""
+        body = to_npy(np.asarray(features, dtype=float))
+        return from_npy(self._request("POST", f"/predict/{name}", body, {"Content-Type": NPY_TYPE}))
+
+    def stats(self):
+        return json.loads(self._request("GET", "/stats"))
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class RemoteModel:
+    """
+    Stand-in for an estimator that scores through the inference service.
+
+    ``predict`` takes a frame with the model's feature columns.  When the
+    service cannot be reached or answers with a server error, the model at
+    ``path`` is loaded and used in-process instead; client errors (4xx)
+    are raised.
+    """
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self.name = model_name(path)
+
+    def predict(self, X):
+        _, columns = MODELS[self.name]
+        try:
+            with metrics.timed("flowcast_inference_client_seconds", "Inference round-trip time.", model=self.name):
+                return self.client.predict(self.name, X[columns].to_numpy(dtype=float))
+        except (OSError, http.client.HTTPException):
+            reason = "unreachable"
+        except InferenceError as e:
+            if e.status < 500:
+                raise
+            reason = "server_error"
+        metrics.count("flowcast_inference_fallbacks_total", documentation="Predictions scored in-process "
+                      "because the inference service was unreachable or failed.", model=self.name, reason=reason)
+        return models.load_model(self.path).predict(X)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def client(url=None):
+    """Shared :class:`InferenceClient` for ``url`` (default ``FLOWCAST_INFERENCE_URL``), or None if unset."""
+    url = url or DEFAULT_URL
+    if not url:
+        return None
+    with _clients_lock:
+        if url not in _clients:
+            _clients[url] = InferenceClient(url)
+        return _clients[url]
+
+
+def model(path, url=None):
+    """The model at ``path``: a :class:`RemoteModel` when an inference service is configured, else loaded here."""
+    shared = client(url)
+    if shared is None:
+        return models.load_model(path)
+    return RemoteModel(shared, path)
+
+
+# ===============================
+# Command line
+# ===============================
+
+def bench(url, name, n_requests, concurrency, rows, seed=0):
+    """Send ``n_requests`` requests of ``rows`` rows from ``concurrency`` threads; returns client-side stats."""
+    rng = np.random.default_rng(seed)
+    _, columns = MODELS[name]
+    features = rng.normal(size=(rows, len(columns))) + 5
+    remote = InferenceClient(url)
+    latencies = []
+
+    def call(_):
+        start = time.perf_counter()
+        remote.predict(name, features)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(call, range(n_requests)))
+    elapsed = time.perf_counter() - start
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {"throughput_rps": n_requests / elapsed, "rows_per_s": n_requests * rows / elapsed,
+            "p50_ms": p50, "p99_ms": p99}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m flowcast.inference", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command in ("serve", "bench"):
+        p = sub.add_parser(command)
+        p.add_argument("--port", type=int, default=DEFAULT_PORT)
+        p.add_argument("--socket", help="Listen on (or connect to) this Unix socket instead of TCP.")
+        p.add_argument("--workers", type=int, help="Batches scored concurrently (default: one per core).")
+        p.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS)
+        p.add_argument("--max-wait-ms", type=float, default=MAX_WAIT * 1000)
+    bench_p = sub.choices["bench"]
+    bench_p.add_argument("--model", choices=sorted(MODELS), default="fish_kill")
+    bench_p.add_argument("--requests", type=int, default=2000)
+    bench_p.add_argument("--concurrency", type=int, default=32)
+    bench_p.add_argument("--rows", type=int, default=100, help="Rows per request.")
+    args = parser.parse_args(argv)
+
+    server = InferenceServer(port=args.port if args.command == "serve" else 0, path=args.socket,
+                             workers=args.workers, max_rows=args.max_batch_rows, max_wait=args.max_wait_ms / 1000)
+    url = server.start()
+    if args.command == "serve":
+        print(f"Serving {', '.join(sorted(MODELS))} on {url}; export FLOWCAST_INFERENCE_URL={url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+        return 0
+
+    try:
+        result = bench(url, args.model, args.requests, args.concurrency, args.rows)
+        stats = server.stats()
+    finally:
+        server.stop()
+    print(f"{args.model}: {result['throughput_rps']:.0f} req/s ({result['rows_per_s']:.0f} rows/s), client p50 "
+          f"{result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms; server p50 {stats['p50_ms']:.1f} ms, "
+          f"p99 {stats['p99_ms']:.1f} ms, {stats['requests_per_batch']:.1f} requests per batch")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
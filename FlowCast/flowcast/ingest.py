@@ -0,0 +1,262 @@
+"""
+Fetchers and parsers for the upstream water-quality APIs.
+
+* NOAA NDBC realtime2 buoy files
+* USGS NWIS site service (RDB) and instantaneous values (JSON)
+* Water Quality Portal (WQP) stations (GeoJSON) and results (JSON)
+
+``fetch_*`` functions go through :mod:`flowcast.http_client` and raise
+:class:`flowcast.http_client.HTTPError` on failure; the ``parse_*``
+functions are pure and can be benchmarked or replayed offline.
+
+Concurrent identical fetches (several sessions opening the same station)
+are coalesced by :func:`flowcast.cache.coalesced`: one caller fetches and
+parses, the others get the same frame, which callers must therefore not
+modify in place.
+"""
+import io
+
+import pandas as pd
+
+from flowcast import cache, http_client, metrics
+
+NDBC_URL = "https://www.ndbc.noaa.gov/data/realtime2/{station_id}.txt"
+USGS_SITE_URL = "https://waterservices.usgs.gov/nwis/site/"
+USGS_IV_URL = "https://waterservices.usgs.gov/nwis/iv/"
+WQP_STATION_URL = "https://www.waterqualitydata.us/data/Station/search"
+WQP_RESULT_URL = "https://www.waterqualitydata.us/data/Result/search"
+
+NDBC_COLUMNS = ['YY', 'MM', 'DD', 'hh', 'mm', 'WDIR', 'WSPD', 'GST', 'WVHT', 'DPD', 'APD', 'MWD',
+                'PRES', 'ATMP', 'WTMP', 'DEWP', 'VIS', 'PTDY', 'TIDE']
+
+SOUTH_FLORIDA_BBOX = "-82.331,25.124,-80.031,26.947"
+WQP_DEFAULT_BBOX = "-82.3,24.5,-80.0,26.6"
+
+
+def safe_float_convert(value, default=0.0):
+    try:
+        numeric_part = ''.join(c for c in str(value) if c.isdigit() or c in '.-')
+        return float(numeric_part) if numeric_part else default
+    except (ValueError, TypeError):
+        return default
+
+
+# ===============================
+# NOAA NDBC
+# ===============================
+
+def parse_ndbc_realtime(text):
+    """
+    Parse an NDBC realtime2 standard meteorological file.
+
+    The two ``#`` header lines are skipped and ``MM`` (missing) becomes NaN.
+    """
+    if not text.strip():
+        return pd.DataFrame(columns=NDBC_COLUMNS)
+    return pd.read_csv(io.StringIO(text), sep=r'\s+', comment='#', header=None, names=NDBC_COLUMNS,
+                       na_values=['MM'], on_bad_lines='skip')
+
+
+@cache.coalesced("ndbc")
+@metrics.timed("flowcast_fetch_seconds", "Upstream fetch and parse time.", source="ndbc")
+def fetch_ndbc_station(station_id):
+    """Latest ~45 days of observations for an NDBC buoy."""
+    response = http_client.get(NDBC_URL.format(station_id=station_id))
+    response.raise_for_status()
+    return parse_ndbc_realtime(response.text)
+
+
+@cache.coalesced("ndbc_many")
+@metrics.timed("flowcast_fetch_seconds", "Upstream fetch and parse time.", source="ndbc_many")
+def fetch_ndbc_stations(station_ids):
+    """
+    Observations of several NDBC buoys, fetched concurrently.
+
+    Returns ``(frames, errors)``: dicts keyed by station id holding the
+    parsed frame or the :class:`~flowcast.http_client.HTTPError` of stations
+    that failed.
+    """
+    station_ids = list(dict.fromkeys(station_ids))
+    responses = http_client.get_many([(NDBC_URL.format(station_id=sid), None) for sid in station_ids])
+    frames, errors = {}, {}
+    for sid, response in zip(station_ids, responses):
+        try:
+            if isinstance(response, BaseException):
+                raise response
+            response.raise_for_status()
+            frames[sid] = parse_ndbc_realtime(response.text)
+        except http_client.HTTPError as e:
+            errors[sid] = e
+    return frames, errors
+
+
+# ===============================
+# USGS NWIS
+# ===============================
+
+def parse_usgs_sites(text):
+    """Parse the NWIS site service RDB (tab separated) response."""
+    lines = [line for line in text.split('\n') if line.strip() and not line.startswith('#')]
+    if len(lines) < 2:
+        return pd.DataFrame()
+    headers = lines[0].strip().split('\t')
+    sites = []
+    for line in lines[2:]:
+        values = line.strip().split('\t')
+        if len(values) == len(headers):
+            site_dict = dict(zip(headers, values))
+            site_entry = {
+                'Site ID': site_dict.get('site_no', '').strip(),
+                'Site Name': site_dict.get('station_nm', '').strip(),
+                'Latitude': safe_float_convert(site_dict.get('dec_lat_va')),
+                'Longitude': safe_float_convert(site_dict.get('dec_long_va')),
+                'State': site_dict.get('state_cd', '').strip(),
+                'County': site_dict.get('county_cd', '').strip()
+            }
+            if site_entry['Latitude'] != 0 and site_entry['Longitude'] != 0:
+                sites.append(site_entry)
+    return pd.DataFrame(sites)
+
+
+def usgs_sites_params(b_box=SOUTH_FLORIDA_BBOX):
+    """Query parameters of :func:`fetch_usgs_sites`."""
+    return {
+        "format": "rdb",
+        "bBox": b_box,
+        "siteStatus": "active",
+        "hasDataTypeCd": "qw",
+        "siteType": "ST,LK,SP"
+    }
+
+
+@cache.coalesced("usgs_sites")
+@metrics.timed("flowcast_fetch_seconds", "Upstream fetch and parse time.", source="usgs_sites")
+def fetch_usgs_sites(b_box=SOUTH_FLORIDA_BBOX):
+    """Active surface-water quality sites inside ``b_box``."""
+    response = http_client.get(USGS_SITE_URL, params=usgs_sites_params(b_box))
+    response.raise_for_status()
+    return parse_usgs_sites(response.text)
+
+
+def parse_usgs_iv(data):
+    """Flatten an NWIS instantaneous-values JSON payload into long format."""
+    readings = []
+    if 'value' in data and 'timeSeries' in data['value']:
+        for series in data['value']['timeSeries']:
+            parameter_name = series['variable']['variableName']
+            for value in series['values'][0]['value']:
+                readings.append({
+                    'Timestamp': value['dateTime'],
+                    'Parameter': parameter_name,
+                    'Value': safe_float_convert(value['value']),
+                    'Unit': series['variable']['unit']['unitCode']
+                })
+    return pd.DataFrame(readings)
+
+
+def usgs_iv_params(site_id, start_date, end_date, parameter_codes):
+    """Query parameters of :func:`fetch_usgs_water_quality`."""
+    return {
+        "format": "json",
+        "sites": site_id,
+        "startDT": start_date,
+        "endDT": end_date,
+        "parameterCd": ",".join(parameter_codes),
+        "siteStatus": "all"
+    }
+
+
+@cache.coalesced("usgs_iv")
+@metrics.timed("flowcast_fetch_seconds", "Upstream fetch and parse time.", source="usgs_iv")
+def fetch_usgs_water_quality(site_id, start_date, end_date, parameter_codes):
+    """Instantaneous values for ``parameter_codes`` at a USGS site."""
+    response = http_client.get(USGS_IV_URL, params=usgs_iv_params(site_id, start_date, end_date, parameter_codes))
+    response.raise_for_status()
+    return parse_usgs_iv(response.json())
+
+
+# ===============================
+# Water Quality Portal
+# ===============================
+
+def parse_wqp_stations(data):
+    """Flatten a WQP station GeoJSON payload."""
+    station_records = []
+    for feature in data.get("features", []):
+        props = feature.get("properties", {})
+        geom = feature.get("geometry", {})
+        coords = geom.get("coordinates", [None, None])
+
+        station_records.append({
+            "OrganizationID": props.get("organizationidentifier"),
+            "OrganizationName": props.get("organizationformalname"),
+            "StationID": props.get("stationidentifier"),
+            "StationName": props.get("stationname"),
+            "Latitude": coords[1],
+            "Longitude": coords[0],
+            "CountyName": props.get("countyname"),
+            "StateName": props.get("statename"),
+            "HUC": props.get("hydrologicunitcode")  # Hydrologic Unit Code
+        })
+    return pd.DataFrame(station_records)
+
+
+def wqp_stations_params(b_box=WQP_DEFAULT_BBOX):
+    """Query parameters of :func:`fetch_wqp_stations`."""
+    return {
+        "bBox": b_box,
+        "dataProfile": "station",
+        "mimeType": "geojson"
+    }
+
+
+@cache.coalesced("wqp_stations")
+@metrics.timed("flowcast_fetch_seconds", "Upstream fetch and parse time.", source="wqp_stations")
+def fetch_wqp_stations(b_box=WQP_DEFAULT_BBOX):
+    """
+    WQP stations within a bounding box ("minLon,minLat,maxLon,maxLat").
+
+    Only the bounding box is sent (no statecode) to avoid 406 errors.
+    """
+    response = http_client.get(WQP_STATION_URL, params=wqp_stations_params(b_box))
+    response.raise_for_status()
+    return parse_wqp_stations(response.json())
+
+
+def parse_wqp_results(data):
+    """Flatten a WQP result JSON payload."""
+    records = []
+    for r in data.get("results", []):
+        measure = r.get("ResultMeasure", {})
+        records.append({
+            "Organization": r.get("OrganizationIdentifier"),
+            "StationID": r.get("MonitoringLocationIdentifier"),
+            "CharacteristicName": r.get("CharacteristicName"),
+            "ResultValue": r.get("ResultMeasureValue"),
+            "ResultUnit": measure.get("MeasureUnitCode"),
+            "SampleFraction": r.get("ResultSampleFractionText"),
+            "ActivityType": r.get("ActivityTypeCode"),
+            "SampleCollectionDate": r.get("ActivityStartDate"),
+            "Latitude": r.get("LatitudeMeasure"),
+            "Longitude": r.get("LongitudeMeasure"),
+        })
+    return pd.DataFrame(records)
+
+
+def wqp_results_params(site_id, start_date, end_date):
+    """Query parameters of :func:`fetch_wqp_results`."""
+    return {
+        "siteid": site_id,
+        "startDateLo": start_date,
+        "startDateHi": end_date,
+        "mimeType": "json"
+    }
+
+
+@cache.coalesced("wqp_results")
+@metrics.timed("flowcast_fetch_seconds", "Upstream fetch and parse time.", source="wqp_results")
+def fetch_wqp_results(site_id, start_date, end_date):
+    """WQP measurement results for one site between two YYYY-MM-DD dates."""
+    response = http_client.get(WQP_RESULT_URL, params=wqp_results_params(site_id, start_date, end_date))
+    response.raise_for_status()
+    return parse_wqp_results(response.json())
@@ -0,0 +1,399 @@
+"""
+Continuous water-quality surfaces from sonde samples.
+
+The sonde samples lie along the boat track; :func:`surface` turns one
+parameter (``ODO mg/L``, ``Temp °C``, ``Depth m``, ...) into a regular
+latitude/longitude grid with either
+
+* inverse-distance weighting (``"idw"``) of the ``k`` nearest samples, or
+* ordinary kriging (``"kriging"``) on the ``k`` nearest samples, with an
+  exponential variogram fitted to the data; it also returns the kriging
+  variance of every cell.
+
+Samples are projected to local metres, samples at the same spot (within a
+metre, e.g. a vertical cast) are averaged, and a ``cKDTree`` answers the
+neighbour queries.  Cells farther than ``max_distance`` from any sample are
+left empty instead of being extrapolated, and are never computed.  Kriging
+solves one system per neighbour set rather than per cell: the grid is cut
+into blocks of ``KRIGING_BLOCK`` x ``KRIGING_BLOCK`` cells and every cell
+of a block uses the ``k`` samples nearest to the block's centre (with its
+own distances to them), so one ``(k+1) x (k+1)`` system serves up to 16
+cells.  ``block=None`` gives every cell its own nearest samples; it is
+about three times slower, and on the benchmark data the block
+surface differs from it by ~0.07 mg/L of dissolved oxygen on average (a
+tenth of the samples' standard deviation).
+
+Cost on one core, for a 500 x 500 grid from 30,000-50,000 samples: IDW
+takes ~0.45-0.55 s and kriging ~0.65-0.8 s with the default 16 neighbours
+(~2-2.4 s with ``block=None``).
+
+Surfaces are cached per dataset content, parameter, method and resolution.
+``processes`` splits the grid over worker processes for large grids.
+"""
+import collections
+import concurrent.futures
+import threading
+import warnings
+
+import numpy as np
+
+from flowcast import metrics, storage
+
+METHODS = ('idw', 'kriging')
+DEFAULT_NEIGHBOURS = {'idw': 12, 'kriging': 16}
+
+# Metres per degree of latitude; longitude degrees shrink with cos(latitude).
+METRES_PER_DEGREE = 111_320.0
+
+# Targets per batch of kriging systems (bounds the (targets, k+1, k+1) temporaries).
+KRIGING_CHUNK = 16_384
+# Grid cells along each side of the square blocks that share one kriging neighbour set.
+KRIGING_BLOCK = 4
+
+SURFACE_CACHE_SIZE = 16
+
+Surface = collections.namedtuple('Surface', ['lat', 'lon', 'values', 'variance'])
+Surface.__doc__ = "Grid axes (``lat`` ascending rows, ``lon`` columns), cell values and kriging variance (or None)."
+
+Variogram = collections.namedtuple('Variogram', ['nugget', 'sill', 'range'])
+Variogram.__doc__ = "Exponential variogram: ``nugget + sill * (1 - exp(-3 h / range))`` for ``h > 0``."
+
+_surfaces = collections.OrderedDict()
+_surfaces_lock = threading.Lock()
+
+
+# ===============================
+# Geometry
+# ===============================
+
+def project(lat, lon, origin):
+    """Local planar coordinates in metres around ``origin = (lat0, lon0)``."""
+    lat0, lon0 = origin
+    x = (np.asarray(lon, dtype=float) - lon0) * METRES_PER_DEGREE * np.cos(np.radians(lat0))
+    y = (np.asarray(lat, dtype=float) - lat0) * METRES_PER_DEGREE
+    return np.column_stack([x, y])
+
+
+def unproject(xy, origin):
+    """Inverse of :func:`project`: ``(lat, lon)`` arrays of local coordinates ``xy``."""
+    lat0, lon0 = origin
+    lat = xy[:, 1] / METRES_PER_DEGREE + lat0
+    lon = xy[:, 0] / (METRES_PER_DEGREE * np.cos(np.radians(lat0))) + lon0
+    return lat, lon
+
+
+def _row_keys(rows):
+    """One int64 per integer row (a multiplicative hash; collisions are practically impossible)."""
+    multipliers = np.random.default_rng(0).integers(1, 2 ** 62, rows.shape[1]) | 1
+    return (rows.astype(np.int64) * multipliers).sum(axis=1)
+
+
+def merge_duplicates(xy, values, tolerance=1.0):
+    """Average samples that fall within ``tolerance`` metres of each other on a snapped grid."""
+    _, first, inverse, counts = np.unique(_row_keys(np.round(xy / tolerance)), return_index=True,
+                                          return_inverse=True, return_counts=True)
+    if len(first) == len(xy):
+        return xy, values
+    merged_xy = np.column_stack([np.bincount(inverse, weights=xy[:, i]) / counts for i in range(2)])
+    return merged_xy, np.bincount(inverse, weights=values) / counts
+
+
+# ===============================
+# Interpolators
+# ===============================
+
+def idw(tree, values, targets, k=12, power=2.0, max_distance=np.inf):
+    """
+    Inverse-distance weighted mean of the ``k`` nearest samples at each target.
+
+    Only samples within ``max_distance`` count; targets without any are NaN.
+    """
+    k = min(k, len(values))
+    dist, idx = tree.query(targets, k=k, distance_upper_bound=max_distance)
+    if k == 1:
+        dist, idx = dist[:, None], idx[:, None]
+    found = np.isfinite(dist)
+    with np.errstate(divide='ignore'):
+        weights = np.where(found, 1.0 / dist ** power, 0.0)
+    exact = dist[:, 0] == 0
+    weights[exact] = 0.0
+    weights[exact, 0] = 1.0
+    neighbours = values[np.where(found, idx, 0)]
+    with np.errstate(invalid='ignore'):
+        return (weights * neighbours).sum(axis=1) / weights.sum(axis=1)
+
+
+def semivariance(h, variogram):
+    """Exponential variogram model at distances ``h`` (0 at ``h == 0``)."""
+    h = np.asarray(h, dtype=float)
+    # In place on one temporary: these arrays hold k² entries per neighbour set.
+    gamma = np.multiply(h, -3.0 / variogram.range)
+    np.exp(gamma, out=gamma)
+    gamma *= -variogram.sill
+    gamma += variogram.nugget + variogram.sill
+    gamma[h <= 0] = 0.0
+    return gamma
+
+
+def fit_variogram(xy, values, n_lags=15, max_points=1000, seed=0):
+    """
+    Fit an exponential :class:`Variogram` to the empirical semivariogram.
+
+    At most ``max_points`` samples (chosen at random) are paired; lags cover
+    half the largest pair distance.  Sill and nugget are bounded by twice the
+    sample variance and the range by the lag span, so a trend-dominated
+    semivariogram does not fit as an unbounded line.
+    """
+    from scipy.optimize import curve_fit
+    from scipy.spatial.distance import pdist
+
+    if len(values) > max_points:
+        chosen = np.random.default_rng(seed).choice(len(values), max_points, replace=False)
+        xy, values = xy[chosen], values[chosen]
+    h = pdist(xy)
+    gamma = 0.5 * pdist(values[:, None], 'sqeuclidean')
+    variance = float(np.var(values)) or 1e-12
+    if not len(h) or h.max() == 0:
+        return Variogram(0.0, variance, 1.0)
+
+    edges = np.linspace(0, h.max() / 2, n_lags + 1)
+    bins = np.digitize(h, edges) - 1
+    inside = (bins >= 0) & (bins < n_lags)
+    counts = np.bincount(bins[inside], minlength=n_lags)
+    sums = np.bincount(bins[inside], weights=gamma[inside], minlength=n_lags)
+    filled = counts > 0
+    lags = ((edges[:-1] + edges[1:]) / 2)[filled]
+    empirical = sums[filled] / counts[filled]
+
+    def model(lag, nugget, sill, range_):
+        return nugget + sill * (1.0 - np.exp(-3.0 * lag / range_))
+
+    guess = (min(empirical[0], variance), variance, edges[-1] / 2 or 1.0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            (nugget, sill, range_), _ = curve_fit(
+                model, lags, empirical, p0=guess, sigma=1 / np.sqrt(counts[filled]),
+                bounds=([0, 1e-12, 1e-6], [2 * variance, 2 * variance, 2 * edges[-1]]), maxfev=2000)
+    except (RuntimeError, ValueError):
+        nugget, sill, range_ = guess
+    return Variogram(float(nugget), float(max(sill, 1e-12)), float(max(range_, 1e-6)))
+
+
+def _kriging_weights(xy, sets, inverse, dist, variogram):
+    """
+    Kriging weights (and Lagrange multiplier) for targets using neighbour set ``sets[inverse]``.
+
+    ``dist`` holds each target's distances to the samples of its set.
+    """
+    k = sets.shape[1]
+    # [Γ 1; 1ᵀ 0] for every neighbour set.
+    dx = xy[sets, 0][:, :, None] - xy[sets, 0][:, None, :]
+    dy = xy[sets, 1][:, :, None] - xy[sets, 1][:, None, :]
+    dx *= dx
+    dy *= dy
+    dx += dy
+    pair_dist = np.sqrt(dx, out=dx)
+    systems = np.ones((len(sets), k + 1, k + 1))
+    systems[:, :k, :k] = semivariance(pair_dist, variogram)
+    systems[:, k, k] = 0.0
+    rhs = np.ones((len(dist), k + 1))
+    rhs[:, :k] = semivariance(dist, variogram)
+    try:
+        inverses = np.linalg.inv(systems)
+    except np.linalg.LinAlgError:
+        inverses = np.linalg.pinv(systems)
+    return _solve_per_set(inverses, inverse, rhs), rhs
+
+
+def _solve_per_set(inverses, inverse, rhs):
+    """
+    ``inverses[inverse[t]] @ rhs[t]`` for every target ``t``.
+
+    When sets are shared by a handful of targets each (kriging blocks), the
+    targets are packed per set and multiplied in one batched matmul, which
+    avoids copying a ``(k+1) x (k+1)`` matrix per target.
+    """
+    counts = np.bincount(inverse, minlength=len(inverses))
+    width = counts.max()
+    if len(inverses) * width > 2 * len(rhs):
+        # Too uneven to pack without mostly padding.
+        return np.einsum('tij,tj->ti', inverses[inverse], rhs)
+    order = np.argsort(inverse, kind='stable')
+    sets = inverse[order]
+    slots = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+    packed = np.zeros((len(inverses), width, rhs.shape[1]))
+    packed[sets, slots] = rhs[order]
+    solved = np.empty_like(rhs)
+    solved[order] = np.matmul(packed, inverses.transpose(0, 2, 1))[sets, slots]
+    return solved
+
+
+def _block_neighbours(tree, xy, targets, k, block):
+    """
+    Distances, neighbour sets and set of each target, shared within blocks of ``block`` metres.
+
+    Every target in a square block uses the ``k`` samples nearest to the
+    block's centre, so the block needs one kriging system; distances are
+    still those of each target.
+    """
+    corners = np.floor(targets / block)
+    _, first, inverse = np.unique(_row_keys(corners), return_index=True, return_inverse=True)
+    _, sets = tree.query((corners[first] + 0.5) * block, k=k)
+    sets = sets.reshape(len(first), k)
+    # Gather one coordinate at a time and work in place: (targets, k) arrays.
+    dx = xy[sets, 0][inverse]
+    dx -= targets[:, 0, None]
+    dy = xy[sets, 1][inverse]
+    dy -= targets[:, 1, None]
+    dx *= dx
+    dy *= dy
+    dx += dy
+    return np.sqrt(dx, out=dx), sets, inverse
+
+
+def ordinary_kriging(tree, xy, values, targets, variogram, k=16, block=None):
+    """
+    Ordinary kriging estimate and variance at each target from its ``k`` nearest samples.
+
+    The kriging matrix depends only on which samples are used, so it is
+    inverted once per distinct neighbour set and shared by every target
+    with that set.  With ``block`` (metres), targets in the same square
+    block share the ``k`` samples nearest to its centre (see
+    :func:`_block_neighbours`), which leaves far fewer sets to invert.
+    Targets are solved in batches of ``KRIGING_CHUNK``; grid cells are in
+    row order, so neighbouring cells share a batch.
+    """
+    k = min(k, len(values))
+    estimate = np.empty(len(targets))
+    variance = np.empty(len(targets))
+    for start in range(0, len(targets), KRIGING_CHUNK):
+        part = slice(start, start + KRIGING_CHUNK)
+        if block:
+            dist, sets, inverse = _block_neighbours(tree, xy, targets[part], k, block)
+        else:
+            dist, idx = tree.query(targets[part], k=k)
+            if k == 1:
+                dist, idx = dist[:, None], idx[:, None]
+            # Sort neighbours by sample index so equal sets compare equal.
+            order = np.argsort(idx, axis=1)
+            idx = np.take_along_axis(idx, order, axis=1)
+            dist = np.take_along_axis(dist, order, axis=1)
+            _, first, inverse = np.unique(_row_keys(idx), return_index=True, return_inverse=True)
+            sets = idx[first]
+        weights, rhs = _kriging_weights(xy, sets, inverse, dist, variogram)
+        estimate[part] = (weights[:, :k] * values[sets][inverse]).sum(axis=1)
+        variance[part] = (weights * rhs).sum(axis=1)
+    return estimate, np.maximum(variance, 0.0)
+
+
+# ===============================
+# Surfaces
+# ===============================
+
+def _interpolate(xy, values, targets, method, k, power, variogram, max_distance, block=None):
+    """Estimate (and kriging variance) at ``targets``; NaN beyond ``max_distance`` of every sample."""
+    from scipy.spatial import cKDTree
+
+    tree = cKDTree(xy)
+    if method == 'idw':
+        return idw(tree, values, targets, k, power, max_distance), None
+    estimate = np.full(len(targets), np.nan)
+    variance = np.full(len(targets), np.nan)
+    nearest, _ = tree.query(targets, k=1, distance_upper_bound=max_distance)
+    inside = np.isfinite(nearest)
+    if inside.any():
+        estimate[inside], variance[inside] = ordinary_kriging(tree, xy, values, targets[inside], variogram, k,
+                                                                      block)
+    return estimate, variance
+
+
+def interpolate(lat, lon, values, resolution=200, method='idw', k=None, power=2.0, max_distance=None,
+                processes=None, block=KRIGING_BLOCK):
+    """
+    Grid ``values`` sampled at ``lat``/``lon``.
+
+    Parameters
+    ----------
+    resolution : int or (int, int)
+        Grid cells along latitude and longitude.
+    method : {"idw", "kriging"}
+    k : int, optional
+        Neighbours per cell (default 12 for IDW, 16 for kriging).
+    power : float
+        IDW distance exponent.
+    max_distance : float, optional
+        Cells farther than this many metres from every sample are NaN.
+        Defaults to a tenth of the sampled area's diagonal.
+    processes : int, optional
+        Split the grid over this many worker processes.
+    block : int, optional
+        Kriging: cells along each side of the square blocks that share one
+        neighbour set (0 or None: every cell uses its own ``k`` nearest
+        samples).
+
+    Returns
+    -------
+    Surface
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}, not {method!r}")
+    ny, nx = (resolution, resolution) if np.isscalar(resolution) else resolution
+    lat, lon, values = (np.asarray(a, dtype=float) for a in (lat, lon, values))
+    valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnan(values))
+    lat, lon, values = lat[valid], lon[valid], values[valid]
+    if not len(values):
+        raise ValueError("No samples with coordinates and a value to interpolate.")
+
+    origin = (float(lat.mean()), float(lon.mean()))
+    xy, values = merge_duplicates(project(lat, lon, origin), values)
+    lat_axis = np.linspace(lat.min(), lat.max(), ny)
+    lon_axis = np.linspace(lon.min(), lon.max(), nx)
+    grid_lon, grid_lat = np.meshgrid(lon_axis, lat_axis)
+    cells = project(grid_lat.ravel(), grid_lon.ravel(), origin)
+
+    if max_distance is None:
+        max_distance = 0.1 * float(np.hypot(*np.ptp(xy, axis=0))) or 1.0
+    k = k or DEFAULT_NEIGHBOURS[method]
+    variogram = fit_variogram(xy, values) if method == 'kriging' else None
+    # Block side in metres, from the larger cell side.
+    spacing = max(np.ptp(cells[:, 0]) / max(nx - 1, 1), np.ptp(cells[:, 1]) / max(ny - 1, 1))
+    block = block * spacing if block and method == 'kriging' and spacing > 0 else None
+
+    with metrics.timed("flowcast_interpolation_seconds", "Surface interpolation time.", method=method):
+        if processes and processes > 1:
+            chunks = np.array_split(cells, processes)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+                results = list(pool.map(_interpolate, [xy] * processes, [values] * processes, chunks,
+                                        [method] * processes, [k] * processes, [power] * processes,
+                                        [variogram] * processes, [max_distance] * processes,
+                                        [block] * processes))
+            estimate = np.concatenate([part for part, _ in results])
+            variance = None if method == 'idw' else np.concatenate([part for _, part in results])
+        else:
+            estimate, variance = _interpolate(xy, values, cells, method, k, power, variogram, max_distance, block)
+
+    return Surface(lat_axis, lon_axis, estimate.reshape(ny, nx).astype('float32'),
+                   None if variance is None else variance.reshape(ny, nx).astype('float32'))
+
+
+def surface(df, column, method='idw', resolution=200, **options):
+    """
+    :func:`interpolate` ``df[column]`` over ``df``'s ``Latitude``/``Longitude``.
+
+    Results are cached per content of those columns, method, resolution and
+    ``options``; the returned arrays are shared and must not be modified.
+    """
+    key = (storage.frame_key(df, ['Latitude', 'Longitude', column]), column, method, resolution,
+           tuple(sorted(options.items())))
+    with _surfaces_lock:
+        cached = _surfaces.get(key)
+        if cached is not None:
+            _surfaces.move_to_end(key)
+            return cached
+    result = interpolate(df['Latitude'], df['Longitude'], df[column], resolution, method, **options)
+    with _surfaces_lock:
+        _surfaces[key] = result
+        while len(_surfaces) > SURFACE_CACHE_SIZE:
+            _surfaces.popitem(last=False)
+    return result
@@ -0,0 +1,38 @@
+"""
+Deferred imports for heavy optional libraries.
+
+``lazy_import("folium")`` returns a module object right away but only runs
+the module's code on first attribute access, so a page can name a heavy
+library at the top of the script and still pay for it only in the branch
+that actually draws a map or loads a model::
+
+    folium = lazy_import("folium")
+
+    def display_buoy_map(...):
+        buoy_map = folium.Map(...)   # folium is imported here
+
+Modules that are already imported are returned as-is.  Measure the effect
+with ``python -m benchmarks.importtime``.
+"""
+import importlib.util
+import sys
+import threading
+
+_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """Return module ``name``, deferring its execution until first use."""
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
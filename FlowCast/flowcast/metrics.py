@@ -0,0 +1,260 @@
+"""
+In-process runtime metrics with a Prometheus text endpoint.
+
+Timings are collected with :func:`timed` (a decorator or context manager)
+and :func:`instrument`, counters with :func:`count`.  Everything is kept
+in histograms/counters inside the Streamlit server process; set
+``FLOWCAST_METRICS_PORT`` to expose them at ``http://<host>:<port>/metrics``
+in the Prometheus text format.
+
+Setting ``FLOWCAST_METRICS=0`` disables collection: decorators then return
+the original function untouched and context managers do nothing, so the
+instrumentation costs nothing in production builds that do not want it.
+
+Examples::
+
+    @metrics.timed("flowcast_fetch_seconds", source="ndbc")
+    def fetch_ndbc_station(station_id): ...
+
+    with metrics.timed("flowcast_rerun_seconds", page="dashboard"):
+        render_API()
+
+    plotly_chart = metrics.instrument(st.plotly_chart, "flowcast_figure_render_seconds", page="dashboard")
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("FLOWCAST_METRICS", "1") != "0"
+
+# Upper bounds (seconds) for latency histograms.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        """``{label key: (bucket counts, sum, count)}`` copy."""
+        with self._lock:
+            return {key: (list(counts), total, n) for key, (counts, total, n) in self._series.items()}
+
+    def render(self):
+        lines = []
+        for key, (counts, total, n) in self.snapshot().items():
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {n}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, one series per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation=""):
+        self.name = name
+        self.documentation = documentation
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._series)
+
+    def render(self):
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self.snapshot().items()]
+
+
+class Registry:
+    """Named metrics of the process."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, documentation, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **kwargs)
+            return metric
+
+    def histogram(self, name, documentation="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, buckets=buckets)
+
+    def counter(self, name, documentation=""):
+        return self._get(Counter, name, documentation)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            if metric.documentation:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _NullTimer:
+    """Stand-in returned by :func:`timed` while metrics are disabled."""
+
+    def __call__(self, func):
+        return func
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self._starts = threading.local()
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.histogram.observe(time.perf_counter() - start, **self.labels)
+        return wrapper
+
+    def __enter__(self):
+        stack = getattr(self._starts, "stack", None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._starts.stack.pop(), **self.labels)
+        return False
+
+
+def timed(name, documentation="", **labels):
+    """
+    Time a function (as a decorator) or a block (as a context manager).
+
+    Durations go to the histogram ``name`` with the given labels.
+    """
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(REGISTRY.histogram(name, documentation), labels)
+
+
+def instrument(func, name, documentation="", **labels):
+    """Timed wrapper around an existing callable, e.g. ``st.plotly_chart``."""
+    return timed(name, documentation, **labels)(func)
+
+
+def count(name, amount=1, documentation="", **labels):
+    """Increment counter ``name``."""
+    if ENABLED:
+        REGISTRY.counter(name, documentation).inc(amount, **labels)
+
+
+def observe(name, value, documentation="", **labels):
+    """Record ``value`` in histogram ``name``."""
+    if ENABLED:
+        REGISTRY.histogram(name, documentation).observe(value, **labels)
+
+
+# ===============================
+# Prometheus endpoint
+# ===============================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve ``/metrics`` on a daemon thread (once per process)."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="flowcast-metrics", daemon=True).start()
+        return _server
+
+
+if ENABLED and os.environ.get("FLOWCAST_METRICS_PORT"):
+    try:
+        start_http_server(int(os.environ["FLOWCAST_METRICS_PORT"]), os.environ.get("FLOWCAST_METRICS_HOST", "127.0.0.1"))
+    except OSError:
+        # Another process (e.g. a second Streamlit worker) already owns the port.
+        pass
@@ -0,0 +1,106 @@
+"""
+Loading and scoring of the trained water-quality models.
+
+Models are loaded once per process and shared by every page and session.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from flowcast import metrics
+
+FISH_KILL_MODEL = 'models/data.pkl'
+MULTI_OUTPUT_MODEL = 'models/multi_output_model.pkl'
+
+FISH_KILL_FEATURES = ['Depth m', 'Temp °C', 'pH', 'ODO mg/L']
+WATER_QUALITY_FEATURES = ['Latitude', 'Longitude', 'Depth m', 'Temp °C', 'pH', 'ODO mg/L']
+WATER_QUALITY_TARGETS = ['Depth m', 'Temp °C', 'pH', 'ODO mg/L']
+
+# Predicted dissolved oxygen thresholds (mg/L) for the fish-kill risk levels.
+HIGH_RISK_ODO = 4
+MODERATE_RISK_ODO = 6
+
+# Predicted conditions that mark a zone as critical for fish.
+CRITICAL_LOW_ODO = 4
+CRITICAL_HIGH_TEMP = 30
+CRITICAL_LOW_PH = 6.5
+
+
+@functools.lru_cache(maxsize=None)
+@metrics.timed("flowcast_model_load_seconds", "Model unpickling time (cache misses only).")
+def load_model(path):
+    """Unpickle a model with joblib; cached per path."""
+    from joblib import load
+    return load(path)
+
+
+def risk_levels(predicted_odo):
+    """Map predicted ODO values to 'High' / 'Moderate' / 'Low' risk labels ('Unknown' where missing)."""
+    predicted_odo = np.asarray(predicted_odo, dtype=float)
+    return np.select(
+        [np.isnan(predicted_odo), predicted_odo < HIGH_RISK_ODO, predicted_odo < MODERATE_RISK_ODO],
+        ['Unknown', 'High', 'Moderate'],
+        default='Low',
+    )
+
+
+def _predict(model, inputs):
+    """``model.predict`` on the complete rows of ``inputs``; rows with a missing input get NaN."""
+    complete = inputs.notna().all(axis=1).to_numpy()
+    if complete.all():
+        return np.asarray(model.predict(inputs))
+    predictions = np.asarray(model.predict(inputs[complete])) if complete.any() else None
+    shape = (len(inputs),) if predictions is None or predictions.ndim == 1 else (len(inputs), predictions.shape[1])
+    result = np.full(shape, np.nan)
+    if predictions is not None:
+        result[complete] = predictions
+    return result
+
+
+@metrics.timed("flowcast_model_predict_seconds", "Model scoring time.", model="fish_kill")
+def assess_fish_kill(df, model):
+    """
+    Score fish-kill risk for every row of ``df``.
+
+    Returns a copy of ``df`` with ``Predicted ODO mg/L`` and ``Risk Level``
+    columns added; rows with a missing input are not scored.
+    """
+    result = df.copy()
+    result['Predicted ODO mg/L'] = _predict(model, df[FISH_KILL_FEATURES])
+    result['Risk Level'] = risk_levels(result['Predicted ODO mg/L'])
+    return result
+
+
+@metrics.timed("flowcast_model_predict_seconds", "Model scoring time.", model="water_quality")
+def predict_water_quality(df, model):
+    """
+    Run the multi-output model on ``df``.
+
+    Returns a copy of ``df`` with a ``Predicted <target>`` column for each of
+    :data:`WATER_QUALITY_TARGETS` (NaN for rows with a missing input).
+    """
+    predictions = _predict(model, df[WATER_QUALITY_FEATURES])
+    result = df.copy()
+    for i, col in enumerate(WATER_QUALITY_TARGETS):
+        result[f'Predicted {col}'] = predictions[:, i]
+    return result
+
+
+def critical_masks(prediction_df):
+    """
+    Boolean masks of rows with critical predicted conditions.
+
+    Returns a dict keyed ``'low_odo'``, ``'high_temp'`` and ``'low_ph'``.
+    """
+    return {
+        'low_odo': prediction_df['Predicted ODO mg/L'] < CRITICAL_LOW_ODO,
+        'high_temp': prediction_df['Predicted Temp °C'] > CRITICAL_HIGH_TEMP,
+        'low_ph': prediction_df['Predicted pH'] < CRITICAL_LOW_PH,
+    }
+
+
+def critical_zones(prediction_df):
+    """Rows of ``prediction_df`` meeting any of the critical thresholds."""
+    masks = critical_masks(prediction_df)
+    return prediction_df[masks['low_odo'] | masks['high_temp'] | masks['low_ph']]
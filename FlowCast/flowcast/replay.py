@@ -0,0 +1,404 @@
+"""
+Record/replay of upstream API traffic for offline runs and benchmarks.
+
+Recording: point the shared client at a fixture directory and use the app
+(or ``python -m flowcast.replay record``); every response is stored as a
+``<key>.json`` metadata file plus a ``<key>.body`` payload, grouped by host.
+
+Replaying: :class:`ReplayServer` serves those fixtures from localhost with
+configurable latency, error rate and payload scaling.  The HTTP client is
+routed to it with ``FLOWCAST_UPSTREAM=http://127.0.0.1:<port>`` (or
+:func:`flowcast.http_client.configure`), so the real fetchers in
+:mod:`flowcast.ingest` run end to end without the network::
+
+    python -m flowcast.replay record --out fixtures/http
+    python -m flowcast.replay serve --fixtures fixtures/http --latency 0.05 --scale 10
+    python -m flowcast.replay bench --fixtures fixtures/http --requests 500 --baseline bench.json
+
+Without recorded fixtures, ``--synthetic`` serves generated ones for every
+scenario instead (see :func:`flowcast.synthetic.store_api_fixtures`)::
+
+    python -m flowcast.replay bench --synthetic --latency 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from aiohttp import web
+
+# Response headers worth keeping in a fixture.
+KEPT_HEADERS = ("Content-Type",)
+
+
+def fixture_key(method, url, params=None):
+    """
+    Stable key for a request: method, host, path and sorted query string.
+
+    ``params`` are merged with any query already present in ``url``.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in params.items()]
+    canonical = f"{method.upper()} {parts.netloc}{parts.path}?{urlencode(sorted(query))}"
+    return parts.netloc, hashlib.sha1(canonical.encode()).hexdigest()[:20], canonical
+
+
+def write_fixture(directory, method, url, body, status=200, headers=None, params=None):
+    """Store ``body`` as the response to a request, in the layout :class:`ReplayServer` serves."""
+    host, key, canonical = fixture_key(method, url, params)
+    folder = Path(directory) / host
+    meta = {
+        "request": canonical,
+        "status": status,
+        "headers": {k: v for k, v in (headers or {}).items() if k in KEPT_HEADERS},
+    }
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"{key}.body").write_bytes(body)
+    (folder / f"{key}.json").write_text(json.dumps(meta, indent=2))
+
+
+class Recorder:
+    """Response hook for :class:`flowcast.http_client.AsyncHTTPClient` that writes fixtures."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, params, response):
+        with self._lock:
+            write_fixture(self.directory, method, url, response.body, response.status, dict(response.headers.items()),
+                          params)
+
+
+# ===============================
+# Payload scaling
+# ===============================
+
+def _is_leaf_records(value):
+    """A list of dicts whose items hold no further record lists."""
+    return (isinstance(value, list) and len(value) > 0 and all(isinstance(v, dict) for v in value)
+            and not any(isinstance(x, list) and x and isinstance(x[0], dict) for v in value for x in v.values()))
+
+
+def _scale_list(items, factor):
+    n = max(1, round(len(items) * factor))
+    return [items[i % len(items)] for i in range(n)]
+
+
+def _scale_json(value, factor):
+    if _is_leaf_records(value):
+        return _scale_list(value, factor)
+    if isinstance(value, dict):
+        return {k: _scale_json(v, factor) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_scale_json(v, factor) for v in value]
+    return value
+
+
+def scale_payload(body, content_type, factor):
+    """
+    Grow (or shrink) a recorded payload by ``factor``.
+
+    JSON payloads repeat their innermost record lists (WQP features/results,
+    USGS values); text payloads (NDBC, RDB) repeat their data lines while
+    keeping comment and header lines.
+    """
+    if factor == 1:
+        return body
+    if "json" in content_type:
+        return json.dumps(_scale_json(json.loads(body), factor)).encode()
+
+    lines = body.decode("utf-8", errors="replace").splitlines()
+    head = [line for line in lines if line.startswith("#")]
+    data = [line for line in lines if line.strip() and not line.startswith("#")]
+    if "tab-separated" in content_type or (data and "\t" in data[0]):
+        # RDB: column header and format line precede the records.
+        head, data = head + data[:2], data[2:]
+    if not data:
+        return body
+    return "\n".join(head + _scale_list(data, factor)).encode() + b"\n"
+
+
+# ===============================
+# Replay server
+# ===============================
+
+class ReplayServer:
+    """
+    Local stub serving recorded fixtures.
+
+    Requests arrive as ``/<host>/<path>?<query>`` (see
+    :meth:`flowcast.http_client.AsyncHTTPClient.route`).
+
+    Parameters
+    ----------
+    directory : str or Path
+        Fixture directory produced by :class:`Recorder`.
+    latency : float
+        Added delay per response, in seconds.
+    jitter : float
+        Uniform random extra delay, up to this many seconds.
+    error_rate : float
+        Fraction of requests answered with ``503``.
+    payload_scale : float
+        Factor applied with :func:`scale_payload`.
+    seed : int, optional
+        Seed for the latency/error randomness.
+    """
+
+    def __init__(self, directory, latency=0.0, jitter=0.0, error_rate=0.0, payload_scale=1.0, seed=None,
+                 host="127.0.0.1", port=0):
+        self.directory = Path(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload_scale = payload_scale
+        self.host = host
+        self.port = port
+        self.hits = {}
+        self.errors = 0
+        self.missing = 0
+        self._random = random.Random(seed)
+        self._bodies = {}
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def _load(self, host, key):
+        """Fixture body (already scaled) and metadata, cached in memory."""
+        if (host, key) not in self._bodies:
+            meta_file = self.directory / host / f"{key}.json"
+            if not meta_file.exists():
+                return None
+            meta = json.loads(meta_file.read_text())
+            content_type = meta["headers"].get("Content-Type", "")
+            body = scale_payload((self.directory / host / f"{key}.body").read_bytes(), content_type,
+                                 self.payload_scale)
+            self._bodies[(host, key)] = (meta, body)
+        return self._bodies[(host, key)]
+
+    async def handle(self, request):
+        host, _, path = request.path.lstrip("/").partition("/")
+        params = dict(request.query)
+        _, key, canonical = fixture_key(request.method, f"https://{host}/{path}", params)
+
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="injected error")
+
+        fixture = self._load(host, key)
+        if fixture is None:
+            self.missing += 1
+            return web.Response(status=404, text=f"No fixture for {canonical}")
+        meta, body = fixture
+        self.hits[canonical] = self.hits.get(canonical, 0) + 1
+        return web.Response(status=meta["status"], body=body, headers=meta["headers"])
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def requests(self):
+        return sum(self.hits.values()) + self.errors + self.missing
+
+    def start(self):
+        """Start serving on a background thread; returns the base URL."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            app = web.Application()
+            app.router.add_route("*", "/{tail:.*}", self.handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, self.host, self.port)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="flowcast-replay", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ===============================
+# Command line
+# ===============================
+
+# Requests issued by ``record`` and ``bench``: (name, fetcher, args).
+def scenarios():
+    from flowcast import ingest
+    return [
+        ("ndbc", ingest.fetch_ndbc_station, ("41122",)),
+        ("usgs_sites", ingest.fetch_usgs_sites, ()),
+        ("usgs_iv", ingest.fetch_usgs_water_quality,
+         ("02290829", "2024-10-01", "2024-10-08", ["00010", "00300", "00400", "00095"])),
+        ("wqp_stations", ingest.fetch_wqp_stations, ()),
+        ("wqp_results", ingest.fetch_wqp_results, ("USGS-02323500", "2023-01-01", "2023-01-31")),
+    ]
+
+
+def record(out):
+    from flowcast import http_client
+    client = http_client.configure(upstream=None, recorder=Recorder(out))
+    for name, fetch, args in scenarios():
+        try:
+            rows = len(fetch(*args))
+            print(f"{name}: recorded {rows} rows")
+        except http_client.HTTPError as e:
+            print(f"{name}: failed ({e})")
+    client.close()
+
+
+def bench(fixtures, n_requests, concurrency, latency, error_rate, scale, seed):
+    """
+    Run every scenario ``n_requests`` times against a replay server; returns per-scenario stats.
+
+    Every request is a full fetch: the fetchers' and the client's coalescing
+    (which would fold concurrent identical requests into one) are bypassed.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from flowcast import http_client
+
+    results = {}
+    with ReplayServer(fixtures, latency=latency, error_rate=error_rate, payload_scale=scale, seed=seed) as server:
+        client = http_client.configure(upstream=server.url, backoff=0.01, pool_size=concurrency, per_host=concurrency,
+                                       failure_threshold=10 ** 9, coalesce=False)
+        for name, fetch, args in scenarios():
+            fetch = getattr(fetch, "__wrapped__", fetch)
+
+            def timed(_):
+                start = time.perf_counter()
+                try:
+                    rows = len(fetch(*args))
+                except http_client.HTTPError:
+                    rows = None
+                return time.perf_counter() - start, rows
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as pool:
+                samples = list(pool.map(timed, range(n_requests)))
+            elapsed = time.perf_counter() - start
+
+            latencies = sorted(s[0] for s in samples)
+            failures = sum(1 for s in samples if s[1] is None)
+            results[name] = {
+                "throughput_rps": n_requests / elapsed,
+                "p50_ms": 1000 * latencies[len(latencies) // 2],
+                "p99_ms": 1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+                "rows": next((s[1] for s in samples if s[1] is not None), 0),
+                "failures": failures,
+            }
+        client.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m flowcast.replay", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Fetch the canned scenarios from the real APIs and store fixtures.")
+    rec.add_argument("--out", default="fixtures/http")
+
+    for name in ("serve", "bench"):
+        p = sub.add_parser(name)
+        p.add_argument("--fixtures", default="fixtures/http")
+        p.add_argument("--latency", type=float, default=0.0)
+        p.add_argument("--error-rate", type=float, default=0.0)
+        p.add_argument("--scale", type=float, default=1.0)
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--synthetic", action="store_true",
+                       help="Serve synthetic fixtures of every scenario (flowcast.synthetic) instead of --fixtures.")
+    serve = sub.choices["serve"]
+    serve.add_argument("--port", type=int, default=8700)
+    serve.add_argument("--jitter", type=float, default=0.0)
+    bench_p = sub.choices["bench"]
+    bench_p.add_argument("--requests", type=int, default=200)
+    bench_p.add_argument("--concurrency", type=int, default=16)
+    bench_p.add_argument("--output", help="Write results as JSON to this file.")
+    bench_p.add_argument("--baseline", help="Compare against a previous --output file.")
+    bench_p.add_argument("--max-regression", type=float, default=0.2,
+                         help="Allowed relative throughput drop before failing (default 0.2).")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record(args.out)
+        return 0
+
+    if args.synthetic:
+        from flowcast import synthetic
+
+        generated = tempfile.TemporaryDirectory(prefix="flowcast-fixtures-")
+        synthetic.store_api_fixtures(generated.name, args.seed)
+        args.fixtures = generated.name
+
+    if args.command == "serve":
+        server = ReplayServer(args.fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                              payload_scale=args.scale, seed=args.seed, port=args.port)
+        print(f"Replaying {args.fixtures} on {server.start()}; export FLOWCAST_UPSTREAM={server.url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+        return 0
+
+    results = bench(args.fixtures, args.requests, args.concurrency, args.latency, args.error_rate, args.scale,
+                    args.seed)
+    for name, stats in results.items():
+        print(f"{name:>14}: {stats['throughput_rps']:8.1f} req/s  p50 {stats['p50_ms']:7.1f} ms  "
+              f"p99 {stats['p99_ms']:7.1f} ms  rows {stats['rows']}  failures {stats['failures']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    # A scenario whose every request failed has no fixture (or a stale one); its numbers mean nothing.
+    unanswered = [name for name, stats in results.items() if stats["failures"] == args.requests]
+    if unanswered:
+        print(f"No successful request in: {', '.join(unanswered)} (missing fixtures?)")
+        return 1
+
+    if args.baseline and os.path.exists(args.baseline):
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = [
+            name for name, stats in results.items()
+            if name in baseline
+            and stats["throughput_rps"] < baseline[name]["throughput_rps"] * (1 - args.max_regression)
+        ]
+        if regressions:
+            print(f"Throughput regression in: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
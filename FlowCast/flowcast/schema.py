@@ -0,0 +1,134 @@
+"""
+Compact in-memory schema for sonde observations.
+
+The exports hold ~24 columns that pandas reads as float64 plus two string
+columns for the date and the time of day.  :func:`compact_frame` converts a
+parsed export to:
+
+* ``float32`` for the sensor channels (the sondes report 3-5 significant
+  digits, well inside float32's ~7),
+* one ``Timestamp`` column (``datetime64[ns]``, stored as int64) instead of
+  the ``Date``/``Time`` strings,
+* categorical ``Station``/``Deployment`` ids when given,
+* no redundant channels (:data:`REDUNDANT_COLUMNS`, derivable from the
+  others) or pandas index columns, unless asked to keep them.
+
+Latitude and longitude stay float64: float32 would round them to ~0.2 m,
+which is visible on the zoomed-in maps.
+
+``python -m flowcast.schema FILE ...`` prints the per-column memory report.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from flowcast.storage import SONDE_NUMERIC_COLUMNS, read_sonde_csv
+
+# Channels that can be recomputed from others: non-linear compensated
+# conductivity, the raw pH electrode voltage and the ODO calibration value.
+REDUNDANT_COLUMNS = ('nLF Cond µS/cm', 'pH mV', 'ODO % CB')
+
+COORDINATE_COLUMNS = ('Latitude', 'Longitude')
+SENSOR_COLUMNS = tuple(c for c in SONDE_NUMERIC_COLUMNS if c not in COORDINATE_COLUMNS)
+
+# (date column, time column) pairs used by the exports.
+DATE_TIME_COLUMNS = (('Date', 'Time'), ('Date (MM/DD/YYYY)', 'Time (HH:mm:ss)'))
+TIMESTAMP_FORMAT = '%m/%d/%Y %H:%M:%S'
+
+
+def compact_dtypes(columns):
+    """``read_csv`` dtypes that parse sensor channels straight to float32."""
+    dtypes = {}
+    for column in columns:
+        if column in SENSOR_COLUMNS:
+            dtypes[column] = 'float32'
+        elif column in COORDINATE_COLUMNS:
+            dtypes[column] = 'float64'
+    return dtypes
+
+
+def compact_columns(columns, keep=()):
+    """``columns`` without redundant channels and index columns, except those in ``keep``."""
+    return [c for c in columns
+            if c in keep or (c not in REDUNDANT_COLUMNS and not str(c).startswith('Unnamed:'))]
+
+
+def combine_timestamp(df):
+    """
+    Replace the date and time string columns of ``df`` by one ``Timestamp``.
+
+    Frames without a time column get the date at midnight.  Returns a new frame.
+    """
+    for date_column, time_column in DATE_TIME_COLUMNS:
+        if date_column not in df.columns:
+            continue
+        if time_column in df.columns:
+            text = df[date_column].astype(str) + ' ' + df[time_column].astype(str)
+            stamps = pd.to_datetime(text, format=TIMESTAMP_FORMAT, errors='coerce')
+            drop = [date_column, time_column]
+        else:
+            stamps = pd.to_datetime(df[date_column], errors='coerce')
+            drop = [date_column]
+        df = df.drop(columns=drop)
+        df.insert(0, 'Timestamp', stamps.astype('datetime64[ns]'))
+        return df
+    return df
+
+
+def compact_frame(df, keep=(), station=None, deployment=None):
+    """
+    Convert a parsed sonde export to the compact schema.
+
+    ``keep`` names redundant columns to retain; ``station`` and
+    ``deployment`` add constant categorical id columns.
+    """
+    df = df[compact_columns(df.columns, keep)]
+    df = df.astype(compact_dtypes(df.columns))
+    df = combine_timestamp(df)
+    for name, value in (('Station', station), ('Deployment', deployment)):
+        if value is not None:
+            df[name] = pd.Categorical([value] * len(df))
+    return df
+
+
+def concat_compact(frames):
+    """Stack compact frames, keeping ``Station``/``Deployment`` categorical."""
+    frames = list(frames)
+    combined = pd.concat(frames, ignore_index=True)
+    for name in ('Station', 'Deployment'):
+        if all(name in df.columns for df in frames) and frames:
+            combined[name] = pd.api.types.union_categoricals([df[name] for df in frames])
+    return combined
+
+
+def memory_report(original, compact):
+    """
+    Deep memory usage per column of ``original`` and ``compact`` (bytes).
+
+    Columns merged into ``Timestamp`` or dropped show 0 on the compact side;
+    the ``Total`` row sums each side.
+    """
+    before = original.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'original': before, 'compact': after}).fillna(0).astype('int64')
+    report.loc['Total'] = report.sum()
+    report['ratio'] = (report['compact'] / report['original'].replace(0, np.nan)).round(3)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m flowcast.schema", description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+", help="Sonde CSV exports.")
+    parser.add_argument("--keep", action="append", default=[], help="Redundant column to keep (repeatable).")
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        original = read_sonde_csv(path)
+        report = memory_report(original, compact_frame(original, keep=args.keep))
+        print(f"{path}\n{report.to_string()}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,320 @@
+"""
+Reading of sonde exports: the shipped default dataset and user uploads.
+
+Uploads are parsed once: :func:`load_upload` keys each file by the SHA-256
+of its content and keeps the parsed frame in :data:`DATASETS`, a
+size-bounded LRU shared by every session in the process, so reruns (and
+other users uploading the same file) reuse the frame instead of parsing the
+CSV again.  Frames are evicted when the cache exceeds
+``FLOWCAST_DATASET_CACHE_MB`` or when the machine's available memory drops
+below ``FLOWCAST_MIN_AVAILABLE_MB``.
+
+Parsing goes through :func:`ingest_csv`, which checks the header for the
+required columns before reading any data, reads only the requested columns
+with explicit dtypes, streams the file in chunks (reporting progress) and
+counts nulls per column as the chunks arrive.  With ``compact=True`` the
+frame uses the reduced schema of :mod:`flowcast.schema` (float32 channels,
+one ``Timestamp`` column, no redundant channels), built chunk by chunk.
+"""
+import collections
+import functools
+import hashlib
+import io
+import os
+import threading
+
+import pandas as pd
+
+from flowcast import metrics
+
+DEFAULT_DATASET = 'data/oct25-2024.csv'
+
+# Columns every Data Analysis chart relies on.
+REQUIRED_COLUMNS = ['Depth m', 'Temp °C', 'pH', 'ODO mg/L']
+
+# Known sonde export columns and their types; anything else is inferred.
+SONDE_TEXT_COLUMNS = ('Date', 'Time', 'Date (MM/DD/YYYY)', 'Time (HH:mm:ss)')
+SONDE_NUMERIC_COLUMNS = (
+    'Latitude', 'Longitude', 'Chlorophyll RFU', 'Cond µS/cm', 'Depth m', 'nLF Cond µS/cm', 'ODO % sat', 'ODO % CB',
+    'ODO mg/L', 'Pressure psi a', 'Sal psu', 'SpCond µS/cm', 'TAL PC RFU', 'TDS mg/L', 'Turbidity FNU', 'TSS mg/L',
+    'pH', 'pH mV', 'Temp °C', 'Vertical Position m', 'Altitude m', 'Barometer mmHg',
+)
+
+CHUNK_ROWS = 200_000
+
+Dataset = collections.namedtuple('Dataset', ['frame', 'null_counts'])
+Dataset.__doc__ = "A parsed sonde file and its per-column null counts."
+
+
+class MissingColumnsError(ValueError):
+    """The file lacks required columns; ``missing`` lists them in order."""
+
+    def __init__(self, missing):
+        self.missing = list(missing)
+        super().__init__(f"Missing column(s): {', '.join(self.missing)}")
+
+
+def sonde_dtypes(columns):
+    """``read_csv`` dtypes for the known sonde columns among ``columns``."""
+    dtypes = {}
+    for column in columns:
+        if column in SONDE_TEXT_COLUMNS:
+            dtypes[column] = object
+        elif column in SONDE_NUMERIC_COLUMNS:
+            dtypes[column] = 'float64'
+    return dtypes
+
+
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def read_header(source):
+    """Column names of a CSV path or file object (the file position is restored)."""
+    if _is_path(source):
+        return list(pd.read_csv(source, nrows=0).columns)
+    position = source.tell()
+    try:
+        return list(pd.read_csv(source, nrows=0).columns)
+    finally:
+        source.seek(position)
+
+
+def ingest_csv(source, columns=None, required=REQUIRED_COLUMNS, chunksize=CHUNK_ROWS, progress=None, compact=False):
+    """
+    Parse a sonde CSV into a :class:`Dataset`.
+
+    Parameters
+    ----------
+    source : str, path or binary file object
+    columns : list of str, optional
+        Columns to keep (plus ``required``); all columns when omitted.
+    required : list of str
+        Columns that must be present.  Checked against the header before
+        any data is parsed.
+    chunksize : int
+        Rows per parsed chunk.
+    progress : callable, optional
+        Called with the fraction of the file read after each chunk.
+    compact : bool
+        Parse to the compact schema (see :mod:`flowcast.schema`).  Redundant
+        channels are dropped unless named in ``columns`` or ``required``.
+
+    Raises
+    ------
+    MissingColumnsError
+        If the header lacks a required column.
+    ValueError
+        If a known numeric column holds non-numeric values.
+    """
+    if _is_path(source):
+        with open(source, 'rb') as fh:
+            return ingest_csv(fh, columns, required, chunksize, progress, compact)
+
+    header = read_header(source)
+    missing = [column for column in required if column not in header]
+    if missing:
+        raise MissingColumnsError(missing)
+    wanted = None if columns is None else set(columns) | set(required)
+    usecols = [column for column in header if wanted is None or column in wanted]
+    dtypes = sonde_dtypes(usecols)
+    convert = None
+    if compact:
+        from flowcast import schema
+
+        usecols = schema.compact_columns(usecols, keep=wanted or ())
+        dtypes = {column: dtype for column, dtype in dtypes.items() if column in usecols}
+        dtypes.update(schema.compact_dtypes(usecols))
+        convert = schema.combine_timestamp
+
+    start = source.tell()
+    total = source.seek(0, os.SEEK_END) - start
+    source.seek(start)
+
+    chunks = []
+    null_counts = None
+    reader = pd.read_csv(source, usecols=usecols, dtype=dtypes, chunksize=chunksize)
+    for chunk in reader:
+        if convert is not None:
+            chunk = convert(chunk)
+        chunks.append(chunk)
+        counts = chunk.isna().sum()
+        null_counts = counts if null_counts is None else null_counts + counts
+        if progress is not None and total:
+            progress(min((source.tell() - start) / total, 1.0))
+
+    if not chunks:
+        empty = pd.DataFrame(columns=usecols)
+        return Dataset(empty, pd.Series(0, index=empty.columns, dtype='int64'))
+    frame = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    return Dataset(frame, null_counts)
+
+
+def read_sonde_csv(source, columns=None):
+    """Read a sonde export from a path or a binary file object."""
+    return ingest_csv(source, columns, required=()).frame
+
+
+@functools.lru_cache(maxsize=None)
+def load_default_dataset(path=DEFAULT_DATASET):
+    """
+    The default sonde dataset as a :class:`Dataset`, read once per process.
+
+    The frame is shared between sessions; callers must not modify it in place.
+    """
+    return ingest_csv(path)
+
+
+def missing_columns(df, columns=REQUIRED_COLUMNS):
+    """Names in ``columns`` that ``df`` lacks, in order."""
+    return [column for column in columns if column not in df.columns]
+
+
+def available_memory():
+    """Bytes of memory available to new allocations, or ``None`` if unknown (non-Linux)."""
+    try:
+        with open("/proc/meminfo") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class DatasetCache:
+    """
+    Thread-safe LRU of parsed frames keyed by content hash.
+
+    ``max_bytes`` bounds the deep memory usage of the cached frames; on each
+    insertion least recently used frames are also evicted while available
+    system memory is below ``min_available_bytes``.  Cached frames are shared
+    and must not be modified in place.
+    """
+
+    def __init__(self, max_bytes, min_available_bytes=0):
+        self.max_bytes = max_bytes
+        self.min_available_bytes = min_available_bytes
+        self._frames = collections.OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __contains__(self, key):
+        return key in self._frames
+
+    def get(self, key):
+        with self._lock:
+            df = self._frames.get(key)
+            if df is not None:
+                self._frames.move_to_end(key)
+            return df
+
+    def put(self, key, df):
+        """Cache ``df`` (a frame, or a :class:`Dataset` sized by its frame)."""
+        size = int(getattr(df, 'frame', df).memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._frames:
+                self.nbytes -= self._sizes[key]
+            self._frames[key] = df
+            self._frames.move_to_end(key)
+            self._sizes[key] = size
+            self.nbytes += size
+            self._evict()
+        return df
+
+    def get_or_parse(self, key, parse):
+        """Frame for ``key``, calling ``parse()`` and caching the result on a miss."""
+        df = self.get(key)
+        if df is not None:
+            metrics.count("flowcast_dataset_cache_hits_total", documentation="Uploads served from the dataset cache.")
+            return df
+        metrics.count("flowcast_dataset_cache_misses_total", documentation="Uploads parsed.")
+        # Parsing happens outside the lock; two sessions racing on the same new
+        # upload both parse it and the second result replaces the first.
+        return self.put(key, parse())
+
+    def _under_pressure(self):
+        if not self.min_available_bytes:
+            return False
+        available = available_memory()
+        return available is not None and available < self.min_available_bytes
+
+    def _evict(self):
+        # The most recent entry is kept even if it alone exceeds the budget.
+        while len(self._frames) > 1 and (self.nbytes > self.max_bytes or self._under_pressure()):
+            key, _ = self._frames.popitem(last=False)
+            self.nbytes -= self._sizes.pop(key)
+            metrics.count("flowcast_dataset_cache_evictions_total", documentation="Frames evicted from the dataset cache.")
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+
+DATASETS = DatasetCache(
+    max_bytes=int(os.environ.get("FLOWCAST_DATASET_CACHE_MB", 512)) * 2 ** 20,
+    min_available_bytes=int(os.environ.get("FLOWCAST_MIN_AVAILABLE_MB", 256)) * 2 ** 20,
+)
+
+
+def content_key(data):
+    """Cache key of an upload's raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def frame_key(df, columns):
+    """Cache key of the content of ``df[columns]`` (for results derived from an already parsed frame)."""
+    hashed = pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def upload_key(uploaded_file, session=None):
+    """
+    :func:`content_key` of an upload.
+
+    ``session`` (e.g. ``st.session_state``) remembers the key per upload so
+    reruns do not hash the file again.
+    """
+    keys = None if session is None else session.setdefault("flowcast_upload_keys", {})
+    file_id = getattr(uploaded_file, "file_id", None)
+    key = keys.get(file_id) if keys is not None and file_id else None
+    if key is None:
+        key = content_key(uploaded_file.getvalue())
+        if keys is not None and file_id:
+            keys[file_id] = key
+    return key
+
+
+def load_upload(uploaded_file, session=None, columns=None, required=REQUIRED_COLUMNS, progress=None,
+                cache=DATASETS, compact=False):
+    """
+    :class:`Dataset` of an uploaded CSV, parsed only the first time its content is seen.
+
+    ``session`` is passed to :func:`upload_key`.  ``columns``, ``required``,
+    ``progress`` and ``compact`` are passed to :func:`ingest_csv`; each
+    column selection and schema is cached separately.  The returned frame is
+    shared; do not modify it in place.
+
+    Raises
+    ------
+    MissingColumnsError
+        If the file lacks a ``required`` column.
+    """
+    key = upload_key(uploaded_file, session)
+
+    def parse():
+        buffer = io.BytesIO(uploaded_file.getvalue())
+        return ingest_csv(buffer, columns, required, progress=progress, compact=compact)
+
+    selection = '*' if columns is None else ','.join(sorted(set(columns) | set(required)))
+    dataset = cache.get_or_parse(f"{key}:{selection}{':compact' if compact else ''}", parse)
+    missing = missing_columns(dataset.frame, required)
+    if missing:
+        raise MissingColumnsError(missing)
+    return dataset
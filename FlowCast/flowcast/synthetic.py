@@ -0,0 +1,587 @@
+"""
+Seeded synthetic sonde surveys and buoy records for demos and load tests.
+
+Every series is built with whole-array NumPy operations (cumulative sums,
+``scipy.signal.lfilter`` for autocorrelated noise), so millions of rows take
+seconds, and the same seed always gives the same data.
+
+Sonde surveys (:func:`survey`) follow a boat around a bay:
+
+* the track alternates transits (about 2 m/s, slowly turning heading) and
+  stations where the sonde is lowered to the bottom and raised again; it
+  stays inside a square ``2 * AREA_HALF_WIDTH`` wide around ``origin``
+  (positions are folded back at the edges);
+* between stations the sonde hangs out of the water (negative depth), as in
+  the real exports;
+* temperature follows the season, the time of day and depth; dissolved
+  oxygen follows the saturation at that temperature and salinity, times a
+  diurnal photosynthesis cycle, and drops in a few hypoxic patches; pH
+  moves with the oxygen saturation; conductivity, TDS and pressure are
+  derived as the sonde derives them;
+* sensor dropouts are runs of missing values (NaN) at ``missing`` of the
+  readings.
+
+Surveys come out in the compact schema of :mod:`flowcast.schema` and are
+written per survey day to the observation store (:func:`store_sonde`) or
+as sonde export CSVs (:func:`write_sonde_csv`).
+
+Buoy records (:func:`buoy_series`) have the NDBC realtime2 columns: wind,
+waves (reported hourly, ``MM`` in between), pressure with a semidiurnal
+tide, diurnal air and water temperatures.  :func:`store_ndbc_fixture`
+writes them as replay fixtures, so :func:`flowcast.ingest.fetch_ndbc_station`
+reads them through :class:`flowcast.replay.ReplayServer`.  USGS site, NWIS
+instantaneous-value and WQP station/result payloads are generated the same
+way, and :func:`store_api_fixtures` writes a fixture for every request of
+the replay scenarios, so ``python -m flowcast.replay bench`` runs offline.
+
+``python -m flowcast.synthetic sonde --rows 10000000`` fills the store;
+``python -m flowcast.synthetic buoy 41122 42036 --fixtures fixtures/http``
+writes buoy fixtures and ``python -m flowcast.synthetic api --fixtures
+fixtures/http`` those of the replay scenarios.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from flowcast import metrics, schema
+from flowcast.interpolation import unproject
+from flowcast.storage import SONDE_NUMERIC_COLUMNS
+
+ORIGIN = (25.906, -80.134)
+# Half width (m) of the square the boat stays in.
+AREA_HALF_WIDTH = 3000.0
+
+SONDE_INTERVAL = '5s'
+SURVEY_START = '2024-03-01 08:00'
+# A survey day: 08:00-17:00 at 5 s.
+SURVEY_ROWS = 6480
+
+# Mean readings per transit and per station.
+TRANSIT_READINGS = 180
+STATION_READINGS = 48
+BOAT_SPEED = 2.0
+# Heading change (radians) per reading, standard deviation.
+TURN_RATE = 0.05
+# Depth (m) reported while the sonde hangs out of the water.
+OUT_OF_WATER_DEPTH = -1.2
+
+HYPOXIC_PATCHES = 3
+HYPOXIC_RADIUS = (100.0, 250.0)
+
+# Share of readings lost to sensor dropouts, and the mean dropout length.
+MISSING_RATE = 0.002
+DROPOUT_READINGS = 12
+
+# Decimals written to sonde export CSVs (coordinates keep 5, like the exports).
+EXPORT_DECIMALS = {column: 5 if column in schema.COORDINATE_COLUMNS else 3 for column in SONDE_NUMERIC_COLUMNS}
+
+BUOY_INTERVAL = '10min'
+BUOY_END = '2024-10-31 23:50'
+
+# Decimals of each realtime2 column (None: integer).
+NDBC_DECIMALS = {
+    'YY': None, 'MM': None, 'DD': None, 'hh': None, 'mm': None, 'WDIR': None, 'WSPD': 1, 'GST': 1, 'WVHT': 2,
+    'DPD': 0, 'APD': 1, 'MWD': None, 'PRES': 1, 'ATMP': 1, 'WTMP': 1, 'DEWP': 1, 'VIS': 1, 'PTDY': 1, 'TIDE': 1,
+}
+NDBC_HEADER = ("#YY  MM DD hh mm WDIR WSPD GST  WVHT   DPD   APD MWD   PRES  ATMP  WTMP  DEWP  VIS PTDY  TIDE\n"
+               "#yr  mo dy hr mn degT m/s  m/s     m   sec   sec degT   hPa  degC  degC  degC  nmi  hPa    ft\n")
+
+
+# ===============================
+# Building blocks
+# ===============================
+
+def red_noise(rng, n, scale, rho):
+    """AR(1) noise of standard deviation ``scale`` and lag-one correlation ``rho``."""
+    from scipy.signal import lfilter
+
+    white = rng.normal(0, scale * np.sqrt(1 - rho ** 2), n)
+    # Start in the stationary distribution rather than at zero.
+    return lfilter([1.0], [1.0, -rho], white, zi=[rho * rng.normal(0, scale)])[0]
+
+
+def fold(values, half_width):
+    """Reflect ``values`` into ``[-half_width, half_width]`` (a triangle wave)."""
+    period = 4 * half_width
+    return np.abs(np.mod(values + half_width, period) - 2 * half_width) - half_width
+
+
+def dropouts(rng, n, rate=MISSING_RATE, length=DROPOUT_READINGS):
+    """Boolean mask of ``n`` readings with runs of about ``length`` lost readings covering ``rate`` of them."""
+    starts = np.flatnonzero(rng.random(n) < rate / length)
+    ends = np.minimum(starts + rng.geometric(1 / length, len(starts)), n)
+    edges = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(edges, starts, 1)
+    np.add.at(edges, ends, -1)
+    return np.cumsum(edges[:-1]) > 0
+
+
+def oxygen_saturation(temp, sal):
+    """Dissolved oxygen (mg/L) at saturation for temperature (°C) and salinity (psu)."""
+    fresh = 14.652 - 0.41022 * temp + 0.007991 * temp ** 2 - 0.000077774 * temp ** 3
+    return fresh * (1 - 0.00535 * sal)
+
+
+def _segments(rng, n):
+    """Segment number of every reading; even segments are transits, odd ones stations."""
+    means = np.array([TRANSIT_READINGS, STATION_READINGS])
+    count = 2 * n // means.sum() + 8
+    lengths = rng.geometric(1 / np.tile(means, count // 2 + 1)[:count])
+    while lengths.sum() < n:
+        lengths = np.concatenate([lengths, rng.geometric(1 / np.tile(means, 4))])
+    return np.repeat(np.arange(len(lengths)), lengths)[:n], lengths
+
+
+# ===============================
+# Sonde surveys
+# ===============================
+
+def survey(rows=SURVEY_ROWS, seed=0, start=SURVEY_START, interval=SONDE_INTERVAL, origin=ORIGIN,
+           missing=MISSING_RATE, keep=()):
+    """
+    One synthetic sonde survey of ``rows`` readings ``interval`` apart from ``start``.
+
+    ``seed`` is anything :func:`numpy.random.default_rng` accepts.  Returns a
+    compact-schema frame (``Timestamp``, float64 coordinates, float32
+    channels); ``keep`` names redundant channels to include.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+    step = pd.Timedelta(interval)
+    index = np.arange(rows)
+    hours = start.hour + start.minute / 60 + index * step.total_seconds() / 3600
+    season = np.sin(2 * np.pi * (start.dayofyear - 120) / 365)
+
+    # Track: transits and stations, heading as a random walk, folded into the survey area.
+    segment, lengths = _segments(rng, rows)
+    moving = segment % 2 == 0
+    phase = (index - (np.cumsum(lengths) - lengths)[segment] + 0.5) / lengths[segment]
+    heading = rng.uniform(0, 2 * np.pi) + np.cumsum(rng.normal(0, TURN_RATE, rows))
+    speed = np.where(moving, np.clip(rng.normal(BOAT_SPEED, 0.3, rows), 0.5, None), 0.05)
+    distance = speed * step.total_seconds()
+    x = fold(rng.uniform(-AREA_HALF_WIDTH, AREA_HALF_WIDTH) + np.cumsum(distance * np.cos(heading)),
+             AREA_HALF_WIDTH)
+    y = fold(rng.uniform(-AREA_HALF_WIDTH, AREA_HALF_WIDTH) + np.cumsum(distance * np.sin(heading)),
+             AREA_HALF_WIDTH)
+    lat, lon = unproject(np.column_stack([x + rng.normal(0, 2, rows), y + rng.normal(0, 2, rows)]), origin)
+
+    # Depth: out of the water in transit, down to the bottom and back up at stations.
+    bottom = 3.0 + 1.5 * np.sin(x / 900) * np.cos(y / 1300)
+    depth = np.where(moving, OUT_OF_WATER_DEPTH, bottom * (1 - np.abs(2 * phase - 1))) + rng.normal(0, 0.02, rows)
+    z = np.clip(depth, 0, None)
+
+    # Water: season, time of day, depth and place, plus slow sensor noise.
+    temp = (26 + 4 * season + 0.8 * np.sin(2 * np.pi * (hours - 9) / 24) - 0.35 * z
+            + 0.3 * np.sin(x / 1700 + y / 2300) + red_noise(rng, rows, 0.08, 0.995))
+    sal = 32 + 1.5 * np.sin(y / 2000) + 0.25 * z + red_noise(rng, rows, 0.15, 0.995)
+    saturation = (1.02 + 0.12 * np.sin(2 * np.pi * (hours - 10) / 24) - 0.05 * z
+                  + red_noise(rng, rows, 0.03, 0.99))
+    centres = rng.uniform(-AREA_HALF_WIDTH, AREA_HALF_WIDTH, (HYPOXIC_PATCHES, 2))
+    radii = rng.uniform(*HYPOXIC_RADIUS, HYPOXIC_PATCHES)
+    for (cx, cy), radius, severity in zip(centres, radii, rng.uniform(0.4, 0.7, HYPOXIC_PATCHES)):
+        saturation *= 1 - severity * np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / radius ** 2)
+    odo = oxygen_saturation(temp, sal) * saturation
+    ph = 8.1 + 0.5 * (saturation - 1) - 0.01 * z + red_noise(rng, rows, 0.01, 0.99)
+    spcond = sal / 0.649 * 1000
+    chlorophyll = np.exp(0.8 + 0.15 * z + red_noise(rng, rows, 0.6, 0.995)) - 0.1
+    # Turbidity spikes when a cast touches the bottom.
+    turbidity = (np.exp(1.5 + red_noise(rng, rows, 1.2, 0.99))
+                 + np.where(moving, 0, 200 * np.exp(-((phase - 0.5) / 0.05) ** 2)))
+
+    channels = {
+        'Latitude': lat,
+        'Longitude': lon,
+        'Chlorophyll RFU': chlorophyll,
+        'Cond µS/cm': spcond * (1 + 0.0191 * (temp - 25)),
+        'Depth m': depth,
+        'nLF Cond µS/cm': spcond * 0.9955,
+        'ODO % sat': 100 * saturation,
+        'ODO % CB': 100 * saturation + rng.normal(0, 0.1, rows),
+        'ODO mg/L': odo,
+        'Pressure psi a': depth / 0.7031,
+        'Sal psu': sal,
+        'SpCond µS/cm': spcond,
+        'TAL PC RFU': 0.7 * chlorophyll + rng.normal(0, 0.2, rows),
+        'TDS mg/L': spcond * 0.65,
+        'Turbidity FNU': turbidity,
+        'TSS mg/L': np.zeros(rows),
+        'pH': ph,
+        'pH mV': -59.16 * (ph - 7) * (temp + 273.15) / 298.15 - 7,
+        'Temp °C': temp,
+        'Vertical Position m': depth + 0.06,
+        'Altitude m': rng.normal(-1.6, 4.5, rows),
+        'Barometer mmHg': 765.4 + 0.4 * np.sin(4 * np.pi * hours / 24) + red_noise(rng, rows, 0.3, 0.9999),
+    }
+    if missing:
+        gps = dropouts(rng, rows, missing)
+        for column in ('Latitude', 'Longitude'):
+            channels[column] = np.where(gps, np.nan, channels[column])
+        for column in schema.SENSOR_COLUMNS:
+            channels[column] = np.where(dropouts(rng, rows, missing), np.nan, channels[column])
+
+    columns = schema.compact_columns(SONDE_NUMERIC_COLUMNS, keep)
+    dtypes = schema.compact_dtypes(columns)
+    df = pd.DataFrame({column: np.asarray(channels[column], dtype=dtypes[column]) for column in columns})
+    df.insert(0, 'Timestamp', start.as_unit('ns').to_datetime64() + index * step.as_unit('ns').to_timedelta64())
+    return df
+
+
+def surveys(n_rows, seed=0, start=SURVEY_START, rows_per_survey=SURVEY_ROWS, **options):
+    """
+    ``(number, survey start, frame)`` for consecutive daily surveys totalling ``n_rows`` readings.
+
+    Survey ``i`` is seeded with ``(seed, i)``, so any survey can be rebuilt
+    on its own and the data does not depend on how many are generated.
+    ``options`` go to :func:`survey`.
+    """
+    start = pd.Timestamp(start)
+    for number, first in enumerate(range(0, n_rows, rows_per_survey)):
+        day = start + pd.Timedelta(days=number)
+        yield number, day, survey(min(rows_per_survey, n_rows - first), (seed, number), day, **options)
+
+
+def sonde_track(n_rows, seed=0, **options):
+    """:func:`surveys` of ``n_rows`` readings in total as one frame."""
+    return pd.concat([frame for _, _, frame in surveys(n_rows, seed, **options)], ignore_index=True)
+
+
+def export_frame(df):
+    """A compact survey in the sonde export layout (``Date``/``Time`` strings instead of ``Timestamp``)."""
+    # ISO strings are formatted in C; slicing them is much faster than strftime.
+    iso = pd.Series(np.datetime_as_string(df['Timestamp'].to_numpy(), unit='s'), index=df.index)
+    df = df.drop(columns='Timestamp')
+    df.insert(2, 'Date', iso.str[5:7] + '/' + iso.str[8:10] + '/' + iso.str[:4])
+    df.insert(3, 'Time', iso.str[11:19])
+    return df
+
+
+@metrics.timed("flowcast_synthetic_seconds", "Synthetic data generation and write time.", kind="sonde")
+def store_sonde(n_rows, seed=0, root=None, **options):
+    """
+    Write :func:`surveys` to the observation store, one source per survey; returns the source ids.
+
+    Source ids are derived from the generation parameters, so surveys
+    already stored are skipped without being generated.
+    """
+    from flowcast import storage, warehouse
+
+    sources = []
+    rows_per_survey = options.pop('rows_per_survey', SURVEY_ROWS)
+    start = pd.Timestamp(options.pop('start', SURVEY_START))
+    for first in range(0, n_rows, rows_per_survey):
+        number = first // rows_per_survey
+        rows = min(rows_per_survey, n_rows - first)
+        day = start + pd.Timedelta(days=number)
+        spec = f"synthetic sonde {seed} {number} {rows} {day.isoformat()} {sorted(options.items())}"
+        source = warehouse.source_id(storage.content_key(spec.encode()))
+        if not warehouse.has_source(source, root):
+            warehouse.store_frame(survey(rows, (seed, number), day, **options), source, root)
+        sources.append(source)
+    return sources
+
+
+@metrics.timed("flowcast_synthetic_seconds", "Synthetic data generation and write time.", kind="sonde_csv")
+def write_sonde_csv(path, n_rows, seed=0, **options):
+    """Write :func:`surveys` as one sonde export CSV (all channels) at ``path``."""
+    options.setdefault('keep', schema.REDUNDANT_COLUMNS)
+    for number, _, frame in surveys(n_rows, seed, **options):
+        # Rounded to the sonde's reporting precision (and float64, which prints shortest round-trip digits).
+        frame = frame.astype({c: 'float64' for c in frame.columns if c != 'Timestamp'}).round(EXPORT_DECIMALS)
+        export_frame(frame).to_csv(path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+    return path
+
+
+# ===============================
+# Buoy records
+# ===============================
+
+def buoy_series(n_rows, seed=0, end=BUOY_END, interval=BUOY_INTERVAL, missing=MISSING_RATE):
+    """
+    Synthetic NDBC standard meteorological records, newest first like the realtime2 files.
+
+    Returns a frame with the columns of
+    :func:`flowcast.ingest.parse_ndbc_realtime`, NaN where the file has ``MM``.
+    """
+    from flowcast.ingest import NDBC_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range(end=end, periods=n_rows, freq=interval)
+    hours = ((stamps - stamps[0]) / pd.Timedelta(hours=1)).to_numpy() + stamps[0].hour
+    day_of_year = stamps.dayofyear.to_numpy()
+    season = np.sin(2 * np.pi * (day_of_year - 120) / 365)
+
+    wspd = np.clip(5 + 2 * np.sin(2 * np.pi * (hours - 14) / 24) + red_noise(rng, n_rows, 2.5, 0.995), 0, None)
+    wdir = np.mod(110 + np.degrees(red_noise(rng, n_rows, 0.8, 0.999)), 360)
+    wvht = 0.2 + 0.12 * wspd + red_noise(rng, n_rows, 0.1, 0.99)
+    pres = 1015 + 0.8 * np.sin(4 * np.pi * (hours - 10) / 24) + red_noise(rng, n_rows, 4, 0.9999)
+    atmp = 25 + 4 * season + 2 * np.sin(2 * np.pi * (hours - 9) / 24) + red_noise(rng, n_rows, 0.8, 0.995)
+    wtmp = 26.5 + 3.5 * season + 0.4 * np.sin(2 * np.pi * (hours - 10) / 24) + red_noise(rng, n_rows, 0.2, 0.999)
+    steps_3h = int(pd.Timedelta(hours=3) / pd.Timedelta(interval))
+    values = {
+        'YY': stamps.year, 'MM': stamps.month, 'DD': stamps.day, 'hh': stamps.hour, 'mm': stamps.minute,
+        'WDIR': np.round(wdir),
+        'WSPD': wspd,
+        'GST': wspd * rng.uniform(1.15, 1.5, n_rows),
+        'WVHT': np.clip(wvht, 0.05, None),
+        'DPD': np.clip(4 + 0.4 * wspd + rng.normal(0, 1, n_rows), 2, None),
+        'APD': np.clip(3.5 + 0.3 * wspd + rng.normal(0, 0.5, n_rows), 2, None),
+        'MWD': np.round(np.mod(wdir + rng.normal(0, 20, n_rows), 360)),
+        'PRES': pres,
+        'ATMP': atmp,
+        'WTMP': wtmp,
+        'DEWP': atmp - np.clip(3 + red_noise(rng, n_rows, 1.5, 0.99), 0.5, None),
+        'VIS': np.full(n_rows, np.nan),
+        'PTDY': pres - np.concatenate([np.full(min(steps_3h, n_rows), np.nan), pres[:-steps_3h or None]])[:n_rows],
+        'TIDE': np.full(n_rows, np.nan),
+    }
+    df = pd.DataFrame(values)[NDBC_COLUMNS]
+    # Waves are reported once an hour; dropouts blank whole records.
+    df.loc[stamps.minute != 40, ['WVHT', 'DPD', 'APD', 'MWD']] = np.nan
+    if missing:
+        df.loc[dropouts(rng, n_rows, missing), 'WDIR':'DEWP'] = np.nan
+    for column, decimals in NDBC_DECIMALS.items():
+        df[column] = df[column].round(decimals or 0)
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def ndbc_text(df):
+    """A realtime2 file for :func:`buoy_series` output (``MM`` for missing values)."""
+    fields = []
+    for column, decimals in NDBC_DECIMALS.items():
+        values = df[column]
+        if decimals is None:
+            text = values.astype('Int64').astype(str)
+            if column in ('MM', 'DD', 'hh', 'mm'):
+                text = text.str.zfill(2)
+        else:
+            text = values.map(f'{{:.{decimals}f}}'.format, na_action='ignore')
+        fields.append(text.where(values.notna(), 'MM'))
+    if not len(df):
+        return NDBC_HEADER
+    return NDBC_HEADER + fields[0].str.cat(fields[1:], sep=' ').str.cat(sep='\n') + '\n'
+
+
+@metrics.timed("flowcast_synthetic_seconds", "Synthetic data generation and write time.", kind="buoy")
+def store_ndbc_fixture(directory, station_id, n_rows, seed=0, **options):
+    """Write a :func:`buoy_series` as the replay fixture of ``station_id``'s realtime2 file."""
+    from flowcast.ingest import NDBC_URL
+    from flowcast.replay import write_fixture
+
+    text = ndbc_text(buoy_series(n_rows, seed, **options))
+    write_fixture(directory, "GET", NDBC_URL.format(station_id=station_id), text.encode(),
+                  headers={"Content-Type": "text/plain"})
+    return len(text)
+
+
+# ===============================
+# USGS and WQP payloads
+# ===============================
+
+# NWIS parameter code -> (variable name, unit, typical value, noise scale).
+USGS_PARAMETERS = {
+    '00010': ("Temperature, water, &#176;C", "deg C", 26.0, 1.5),
+    '00095': ("Specific conductance, water, unfiltered, microsiemens per centimeter at 25&#176;C", "uS/cm @25C",
+              48000.0, 1500.0),
+    '00300': ("Dissolved oxygen, water, unfiltered, milligrams per liter", "mg/l", 6.5, 1.0),
+    '00400': ("pH, water, unfiltered, field, standard units", "std units", 8.0, 0.15),
+}
+USGS_IV_INTERVAL = '15min'
+WQP_CHARACTERISTICS = {
+    # name -> (unit, typical value, spread)
+    'Temperature, water': ('deg C', 25.0, 3.0),
+    'Dissolved oxygen (DO)': ('mg/L', 6.5, 1.5),
+    'pH': ('std units', 8.0, 0.3),
+    'Salinity': ('PSS', 33.0, 3.0),
+    'Total Nitrogen, mixed forms': ('mg/L', 0.6, 0.2),
+    'Phosphorus': ('mg/L', 0.03, 0.01),
+}
+
+
+def _bbox_points(rng, n, b_box):
+    """``n`` random (lat, lon) inside ``b_box`` ("minLon,minLat,maxLon,maxLat")."""
+    min_lon, min_lat, max_lon, max_lat = (float(v) for v in b_box.split(','))
+    return np.round(rng.uniform(min_lat, max_lat, n), 6), np.round(rng.uniform(min_lon, max_lon, n), 6)
+
+
+def usgs_sites_rdb(n_sites, seed=0, b_box=None):
+    """An NWIS site service RDB (tab separated) response with ``n_sites`` sites in ``b_box``."""
+    from flowcast.ingest import SOUTH_FLORIDA_BBOX
+
+    rng = np.random.default_rng(seed)
+    lat, lon = _bbox_points(rng, n_sites, b_box or SOUTH_FLORIDA_BBOX)
+    numbers = np.sort(rng.choice(np.arange(2_280_000, 2_300_000), n_sites, replace=False))
+    kinds = rng.choice(['ST', 'LK', 'SP'], n_sites, p=[0.8, 0.15, 0.05])
+    counties = rng.choice(['011', '021', '043', '051', '071', '086', '087', '099'], n_sites)
+    rows = [f"USGS\t{number:08d}\tSYNTHETIC {kind} SITE {i + 1} NR MIAMI, FL\t{kind}\t{la}\t{lo}\t12\t{county}"
+            for i, (number, kind, la, lo, county) in enumerate(zip(numbers, kinds, lat, lon, counties))]
+    return ("# Synthetic NWIS site service response (flowcast.synthetic)\n#\n"
+            "agency_cd\tsite_no\tstation_nm\tsite_tp_cd\tdec_lat_va\tdec_long_va\tstate_cd\tcounty_cd\n"
+            "5s\t15s\t50s\t7s\t16s\t16s\t2s\t3s\n" + "\n".join(rows) + "\n")
+
+
+def usgs_iv_payload(site_id, start_date, end_date, parameter_codes, seed=0, interval=USGS_IV_INTERVAL):
+    """An NWIS instantaneous-values JSON payload: one series per parameter code between two dates."""
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range(start_date, end_date, freq=interval, tz='Etc/GMT+5', inclusive='left')
+    hours = ((stamps - stamps[0]) / pd.Timedelta(hours=1)).to_numpy() + stamps[0].hour
+    times = stamps.strftime('%Y-%m-%dT%H:%M:%S.000-05:00')
+    series = []
+    for code in parameter_codes:
+        name, unit, typical, scale = USGS_PARAMETERS.get(code, (f"Parameter {code}", "", 1.0, 0.1))
+        values = typical + scale * (np.sin(2 * np.pi * (hours - 15) / 24) + red_noise(rng, len(stamps), 0.5, 0.99))
+        series.append({
+            "sourceInfo": {"siteCode": [{"value": site_id, "agencyCode": "USGS"}]},
+            "variable": {"variableCode": [{"value": code}], "variableName": name, "unit": {"unitCode": unit}},
+            "values": [{"value": [{"value": f"{v:.2f}", "qualifiers": ["P"], "dateTime": t}
+                                  for v, t in zip(values, times)]}],
+        })
+    return {"value": {"timeSeries": series}}
+
+
+def wqp_stations_geojson(n_stations, seed=0, b_box=None):
+    """A WQP Station GeoJSON payload with ``n_stations`` stations in ``b_box``."""
+    from flowcast.ingest import WQP_DEFAULT_BBOX
+
+    rng = np.random.default_rng(seed)
+    lat, lon = _bbox_points(rng, n_stations, b_box or WQP_DEFAULT_BBOX)
+    organizations = [("USGS-FL", "USGS Florida Water Science Center"), ("21FLMIAM", "Miami-Dade County DERM"),
+                     ("21FLSFWM", "South Florida Water Management District")]
+    features = []
+    for i, (la, lo) in enumerate(zip(lat, lon)):
+        org_id, org_name = organizations[rng.integers(len(organizations))]
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [float(lo), float(la)]},
+            "properties": {
+                "organizationidentifier": org_id,
+                "organizationformalname": org_name,
+                "stationidentifier": f"{org_id}-{i + 1:05d}",
+                "stationname": f"Synthetic station {i + 1}",
+                "countyname": "Miami-Dade County",
+                "statename": "Florida",
+                "hydrologicunitcode": f"030902{rng.integers(0, 10 ** 6):06d}",
+            },
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def wqp_results_payload(site_id, start_date, end_date, n_results, seed=0):
+    """A WQP Result JSON payload with ``n_results`` measurements at ``site_id`` between two dates."""
+    rng = np.random.default_rng(seed)
+    names = list(WQP_CHARACTERISTICS)
+    days = pd.date_range(start_date, end_date, freq='D')
+    picks = rng.integers(0, len(names), n_results)
+    dates = np.sort(rng.choice(days.strftime('%Y-%m-%d'), n_results))
+    results = []
+    for pick, date in zip(picks, dates):
+        unit, typical, spread = WQP_CHARACTERISTICS[names[pick]]
+        results.append({
+            "OrganizationIdentifier": site_id.split('-')[0],
+            "MonitoringLocationIdentifier": site_id,
+            "CharacteristicName": names[pick],
+            "ResultMeasureValue": f"{max(typical + spread * rng.normal(), 0):.3g}",
+            "ResultMeasure": {"MeasureUnitCode": unit},
+            "ResultSampleFractionText": "Total",
+            "ActivityTypeCode": "Sample-Routine",
+            "ActivityStartDate": date,
+            "LatitudeMeasure": ORIGIN[0],
+            "LongitudeMeasure": ORIGIN[1],
+        })
+    return {"results": results}
+
+
+@metrics.timed("flowcast_synthetic_seconds", "Synthetic data generation and write time.", kind="api")
+def store_api_fixtures(directory, seed=0, buoy_rows=6480):
+    """
+    Write replay fixtures for every request of :func:`flowcast.replay.scenarios`; returns their count.
+
+    With them, ``python -m flowcast.replay bench`` (or ``serve``) runs
+    without the network.  The request parameters come from the same
+    builders the fetchers in :mod:`flowcast.ingest` use; a scenario without
+    a generator here raises ``ValueError``.
+    """
+    from flowcast import ingest
+    from flowcast.replay import scenarios, write_fixture
+
+    args = {name: arguments for name, _, arguments in scenarios()}
+    unknown = sorted(set(args) - {'ndbc', 'usgs_sites', 'usgs_iv', 'wqp_stations', 'wqp_results'})
+    if unknown:
+        raise ValueError(f"No synthetic fixture for scenario(s): {', '.join(unknown)}")
+    (station,) = args['ndbc']
+    store_ndbc_fixture(directory, station, buoy_rows, (seed, 0))
+
+    write_fixture(directory, "GET", ingest.USGS_SITE_URL, usgs_sites_rdb(150, (seed, 1)).encode(),
+                  headers={"Content-Type": "text/plain"}, params=ingest.usgs_sites_params(*args['usgs_sites']))
+    site, start, end, codes = args['usgs_iv']
+    write_fixture(directory, "GET", ingest.USGS_IV_URL,
+                  json.dumps(usgs_iv_payload(site, start, end, codes, (seed, 2))).encode(),
+                  headers={"Content-Type": "application/json"}, params=ingest.usgs_iv_params(*args['usgs_iv']))
+
+    write_fixture(directory, "GET", ingest.WQP_STATION_URL, json.dumps(wqp_stations_geojson(400, (seed, 3))).encode(),
+                  headers={"Content-Type": "application/json"},
+                  params=ingest.wqp_stations_params(*args['wqp_stations']))
+    site, start, end = args['wqp_results']
+    write_fixture(directory, "GET", ingest.WQP_RESULT_URL,
+                  json.dumps(wqp_results_payload(site, start, end, 600, (seed, 4))).encode(),
+                  headers={"Content-Type": "application/json"},
+                  params=ingest.wqp_results_params(*args['wqp_results']))
+    return len(args)
+
+
+# ===============================
+# Command line
+# ===============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m flowcast.synthetic", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("sonde", help="Generate sonde surveys into the observation store (or a CSV export).")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--start", default=SURVEY_START)
+    p.add_argument("--rows-per-survey", type=int, default=SURVEY_ROWS)
+    p.add_argument("--missing", type=float, default=MISSING_RATE)
+    p.add_argument("--root", help="Observation store directory (default FLOWCAST_WAREHOUSE_DIR).")
+    p.add_argument("--csv", help="Write one sonde export CSV here instead of storing.")
+
+    p = sub.add_parser("buoy", help="Generate NDBC buoy records as replay fixtures.")
+    p.add_argument("stations", nargs="+")
+    p.add_argument("--rows", type=int, default=6480, help="Records per station (default: 45 days at 10 min).")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--missing", type=float, default=MISSING_RATE)
+    p.add_argument("--fixtures", default="fixtures/http")
+
+    p = sub.add_parser("api", help="Generate replay fixtures for every request of the replay scenarios.")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--fixtures", default="fixtures/http")
+
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    if args.command == "sonde":
+        options = dict(start=args.start, rows_per_survey=args.rows_per_survey, missing=args.missing)
+        if args.csv:
+            write_sonde_csv(args.csv, args.rows, args.seed, **options)
+            target = args.csv
+        else:
+            target = f"{len(store_sonde(args.rows, args.seed, args.root, **options))} surveys"
+        rows = args.rows
+    elif args.command == "api":
+        count = store_api_fixtures(args.fixtures, args.seed)
+        print(f"{count} scenario fixtures -> {args.fixtures} in {time.perf_counter() - started:.1f} s")
+        return 0
+    else:
+        for i, station in enumerate(args.stations):
+            store_ndbc_fixture(args.fixtures, station, args.rows, (args.seed, i), missing=args.missing)
+        target = f"{len(args.stations)} fixtures in {args.fixtures}"
+        rows = args.rows * len(args.stations)
+    elapsed = time.perf_counter() - started
+    print(f"{rows:,} rows -> {target} in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
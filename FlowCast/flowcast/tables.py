@@ -0,0 +1,111 @@
+"""
+Tables for display: Arrow end to end, one page at a time.
+
+``st.dataframe(frame)`` converts the whole pandas frame to Arrow and sends
+all of it over the websocket on every rerun (~95 MB for a million-row
+survey).  :func:`show_table` sends only the visible page instead:
+
+* Arrow tables (e.g. from :func:`flowcast.warehouse.query_arrow`) are cut
+  with a zero-copy :meth:`pyarrow.Table.slice`;
+* pandas frames are cut with ``iloc`` (a view) and only those rows are
+  converted, so no second copy of a large frame is ever held;
+
+and Streamlit writes the page's Arrow table to IPC directly, without a
+pandas round trip: ~50 KB for a 500-row page, whatever the size of the
+data.  Rows sent are counted in ``flowcast_table_rows_sent_total`` by table.
+"""
+import io
+import math
+
+import pandas as pd
+
+from flowcast import metrics
+from flowcast.lazy import lazy_import
+
+pa = lazy_import("pyarrow")
+
+PAGE_ROWS = 500
+
+
+def to_arrow(frame):
+    """Arrow table of a pandas frame; object columns Arrow cannot type (e.g. numbers and 'N/A') become text."""
+    try:
+        return pa.Table.from_pandas(frame)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        text = {column: str for column in frame.columns if frame[column].dtype == object}
+        return pa.Table.from_pandas(frame.astype(text))
+
+
+def csv_bytes(table):
+    """CSV export of an Arrow table, written by Arrow."""
+    from pyarrow import csv
+
+    sink = io.BytesIO()
+    csv.write_csv(table, sink)
+    return sink.getvalue()
+
+
+def num_rows(data):
+    """Row count of an Arrow table or a pandas frame."""
+    return data.num_rows if isinstance(data, pa.Table) else len(data)
+
+
+def page_count(rows, page_rows=PAGE_ROWS):
+    """Number of pages of ``page_rows`` needed for ``rows`` rows (at least 1)."""
+    return max(1, math.ceil(rows / page_rows))
+
+
+def page(data, number, page_rows=PAGE_ROWS, columns=None):
+    """
+    Page ``number`` (0-based) of an Arrow table or a pandas frame, as an Arrow table.
+
+    ``columns`` restricts (and orders) the columns; only the page's rows are
+    copied, if any.
+    """
+    start = number * page_rows
+    if isinstance(data, pa.Table):
+        rows = data.slice(start, page_rows)
+        return rows if columns is None else rows.select(list(columns))
+    rows = data.iloc[start:start + page_rows]
+    return to_arrow(rows if columns is None else rows[list(columns)])
+
+
+def page_selector(rows, key, page_rows=PAGE_ROWS):
+    """
+    Page number input for ``rows`` rows (shown only with more than one page); returns the 0-based page.
+
+    A page kept in the session beyond the last one (the data shrank) is
+    moved to the last page.
+    """
+    import streamlit as st
+
+    pages = page_count(rows, page_rows)
+    if pages == 1:
+        return 0
+    state = f"{key}_page"
+    if st.session_state.get(state, 1) > pages:
+        st.session_state[state] = pages
+    return st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, key=state) - 1
+
+
+def show_table(data, key, columns=None, page_rows=PAGE_ROWS, **kwargs):
+    """
+    Show ``data`` one page at a time, with a page selector when there is more than one page.
+
+    ``data`` is an Arrow table or a pandas frame; ``columns`` restricts the
+    columns shown and other keyword arguments go to ``st.dataframe``.
+    ``key`` identifies the page selector and labels the rows-sent metric.
+    """
+    import streamlit as st
+
+    if not isinstance(data, (pa.Table, pd.DataFrame)):
+        data = pd.DataFrame(data)
+    total = num_rows(data)
+    number = page_selector(total, key, page_rows)
+    rows = page(data, number, page_rows, columns)
+    if total > page_rows:
+        first = number * page_rows
+        st.caption(f"Rows {first + 1:,}–{first + rows.num_rows:,} of {total:,}")
+    metrics.count("flowcast_table_rows_sent_total", rows.num_rows, documentation="Table rows sent to browsers.",
+                  table=key)
+    st.dataframe(rows, **kwargs)
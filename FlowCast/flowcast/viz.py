@@ -0,0 +1,292 @@
+"""
+Plotly figure builders used by the pages.
+
+Every function takes plain DataFrames and returns a figure, so the same
+charts can be produced from a notebook, a report job or the benchmarks.
+Plotly itself is imported on first use.
+"""
+from flowcast.lazy import lazy_import
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+
+# ===============================
+# Data Analysis
+# ===============================
+
+def depth_temperature_scatter(df):
+    return px.scatter(
+        df, x="Depth m", y="Temp °C", size="pH", color="ODO mg/L", color_continuous_scale=px.colors.sequential.ice
+    )
+
+
+def observation_map(df):
+    return px.scatter_mapbox(
+        df, lat="Latitude", lon="Longitude", hover_data=["Depth m", "Temp °C", "ODO mg/L"],
+        color="ODO mg/L", zoom=10, mapbox_style="carto-positron"
+    )
+
+
+def surface_heatmap(surface, df, column, variance=False):
+    """
+    Interpolated ``column`` surface (see :mod:`flowcast.interpolation`) with the sample track on top.
+
+    ``variance`` shows the kriging variance instead of the estimate.
+    """
+    z = surface.variance if variance else surface.values
+    fig = go.Figure(go.Heatmap(
+        x=surface.lon, y=surface.lat, z=z, colorscale="Viridis" if variance else "Blues",
+        colorbar=dict(title="Variance" if variance else column), hoverongaps=False,
+    ))
+    fig.add_trace(go.Scattergl(
+        x=df["Longitude"], y=df["Latitude"], mode="markers", name="Samples",
+        marker=dict(size=3, color="black", opacity=0.4), hoverinfo="skip",
+    ))
+    fig.update_layout(
+        xaxis_title="Longitude", yaxis=dict(title="Latitude", scaleanchor="x"), showlegend=False,
+        template="plotly_white", margin=dict(l=10, r=10, t=30, b=10), height=550,
+    )
+    return fig
+
+
+def cast_profiles(layers, column):
+    """``column`` against depth for every cast (depth increasing downwards)."""
+    fig = px.line(layers, x=column, y="Depth m", color=layers["Cast"].astype(str), markers=True,
+                  labels={"color": "Cast"}, template="plotly_white")
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(height=500, margin=dict(l=10, r=10, t=30, b=10))
+    return fig
+
+
+def odo_line(df):
+    return px.line(df, x=df.index, y="ODO mg/L")
+
+
+def depth_3d_scatter(df):
+    return px.scatter_3d(
+        df, x="Longitude", y="Latitude", z="Depth m", color="ODO mg/L",
+        color_continuous_scale=px.colors.sequential.ice
+    )
+
+
+# ===============================
+# Predictive Analysis
+# ===============================
+
+def actual_vs_predicted(prediction_df, column):
+    """Scatter of ``column`` against ``Predicted <column>`` with the identity line."""
+    predicted = prediction_df[f'Predicted {column}']
+    actual = prediction_df[column]
+    fig = px.scatter(
+        x=actual,
+        y=predicted,
+        labels={"x": f"Actual {column}", "y": f"Predicted {column}"},
+        title=f"Actual vs Predicted {column}",
+        template="plotly_white",
+    )
+    fig.add_shape(
+        type="line",
+        x0=actual.min(), y0=actual.min(),
+        x1=actual.max(), y1=actual.max(),
+        line=dict(color="Red", dash="dash"),
+    )
+    return fig
+
+
+def critical_zone_map(zones):
+    """Risk zone outlines from :func:`flowcast.zoning.risk_zones`, shaded by severity."""
+    from plotly.colors import sample_colorscale
+    from flowcast.zoning import CONDITIONS
+
+    top = max(float(zones['Severity'].max()), 1e-9)
+    colors = sample_colorscale("Reds", list(0.35 + 0.65 * zones['Severity'] / top))
+    fig = go.Figure()
+    for zone, color in zip(zones.to_dict('records'), colors):
+        conditions = ", ".join(name for key, name in CONDITIONS.items() if zone[key])
+        fig.add_trace(go.Scattermapbox(
+            lat=zone['Polygon'][:, 0], lon=zone['Polygon'][:, 1], mode="lines", fill="toself", fillcolor=color,
+            line=dict(color=color, width=2), opacity=0.6, name=f"Zone {zone['Zone']}", hoverinfo="text",
+            text=(f"Zone {zone['Zone']}: {conditions}<br>{zone['Samples']} readings, {zone['Area km²']:.3f} km²"
+                  f"<br>Min predicted ODO {zone['Min Predicted ODO mg/L']:.2f} mg/L"),
+        ))
+    fig.update_layout(
+        mapbox=dict(style="carto-positron", zoom=11,
+                    center=dict(lat=float(zones['Latitude'].mean()), lon=float(zones['Longitude'].mean()))),
+        title="Prone Areas to Potential Fish Kills", margin=dict(l=0, r=0, t=40, b=0), height=550,
+    )
+    return fig
+
+
+def risk_level_map(df):
+    return px.scatter_mapbox(
+        df,
+        lat="Latitude",
+        lon="Longitude",
+        color="Risk Level",
+        color_discrete_map={
+            "Low": "green",
+            "Moderate": "yellow",
+            "High": "red",
+            "Unknown": "gray",
+        },
+        hover_data=["Depth m", "Temp °C", "pH", "Predicted ODO mg/L"],
+        zoom=8,
+        mapbox_style="carto-positron",
+    )
+
+
+def evaluation_trends(errors, metric="RMSE"):
+    """Per-batch and running ``metric`` of each target over time (see :func:`flowcast.evaluation.history`)."""
+    fig = px.line(errors, x="Time", y=f"Running {metric}", color="Target", line_dash="Version", markers=True,
+                  hover_data=["Rows", metric], template="plotly_white")
+    fig.update_layout(height=400, margin=dict(l=10, r=10, t=30, b=10), yaxis_title=metric)
+    return fig
+
+
+def drift_trends(drift):
+    """PSI of each feature over time with the moderate and significant drift levels."""
+    from flowcast.evaluation import PSI_MODERATE, PSI_SIGNIFICANT
+
+    fig = px.line(drift, x="Time", y="PSI", color="Feature", line_dash="Version", markers=True,
+                  hover_data=["Rows", "Running PSI"], template="plotly_white")
+    fig.add_hline(y=PSI_MODERATE, line=dict(color="orange", dash="dot"), annotation_text="Moderate")
+    fig.add_hline(y=PSI_SIGNIFICANT, line=dict(color="red", dash="dot"), annotation_text="Significant")
+    fig.update_layout(height=400, margin=dict(l=10, r=10, t=30, b=10))
+    return fig
+
+
+# ===============================
+# Comparative Analysis
+# ===============================
+
+def depth_map(month_data, month):
+    return px.scatter_mapbox(
+        month_data,
+        lat='Latitude',
+        lon='Longitude',
+        color='Depth m',
+        size='Depth m',
+        color_continuous_scale="Viridis",
+        size_max=15,
+        zoom=6,
+        mapbox_style="carto-positron",
+        title=f"Geo-Depth Map for {month}",
+    )
+
+
+def monthly_average_bars(monthly_avg, columns):
+    return px.bar(
+        monthly_avg,
+        x='Month',
+        y=columns,
+        title="Key Parameters",
+        template="plotly_white",
+        barmode='group',
+    )
+
+
+def correlation_heatmap(corr, month):
+    fig = px.imshow(
+        corr,
+        text_auto=".2f",
+        color_continuous_scale="icefire",
+        labels={"color": "Correlation"},
+        title=f"Correlation Between Parameters in {month}",
+    )
+    fig.update_layout(
+        autosize=True,
+        margin=dict(l=10, r=10, t=40, b=10),
+        font=dict(size=10),
+    )
+    return fig
+
+
+def parameter_box(month_data, column, month):
+    return px.box(
+        month_data,
+        y=column,
+        title=f"Distribution of {column} in {month}",
+        template="plotly_white",
+        labels={column: column},
+    )
+
+
+# ===============================
+# Time series and forecasts
+# ===============================
+
+def add_forecast_band(fig, forecast, line_color, band_color, level=0.9):
+    """Add the forecast line and its prediction-interval band to ``fig``."""
+    fig.add_trace(go.Scatter(x=forecast['Timestamp'], y=forecast['Upper'], mode='lines',
+                             line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=forecast['Timestamp'], y=forecast['Lower'], mode='lines', fill='tonexty',
+                             fillcolor=band_color, line=dict(width=0), name=f'{level:.0%} interval'))
+    fig.add_trace(go.Scatter(x=forecast['Timestamp'], y=forecast['Forecast'], mode='lines', name='Forecast',
+                             line=dict(color=line_color, dash='dash')))
+    return fig
+
+
+def forecast_chart(history, forecast, name, y_title):
+    """Observed history followed by the forecast and its interval."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=history.index, y=history.values, mode='lines', name=name,
+                             line=dict(color='#005f73')))
+    add_forecast_band(fig, forecast, '#0a9396', 'rgba(10, 147, 150, 0.25)')
+    fig.update_layout(template="plotly_white", height=400, yaxis_title=y_title,
+                      margin=dict(l=10, r=10, t=30, b=10))
+    return fig
+
+
+def site_map(sites_df):
+    """Monitoring sites as markers, centered on their mean position."""
+    fig = go.Figure(go.Scattermapbox(
+        lat=sites_df['Latitude'],
+        lon=sites_df['Longitude'],
+        mode='markers',
+        marker=go.scattermapbox.Marker(size=10, color='royalblue'),
+        text=sites_df['Site Name'],
+        hoverinfo='text'
+    ))
+    fig.update_layout(
+        mapbox=dict(
+            style="carto-positron",
+            center={"lat": sites_df['Latitude'].mean(), "lon": sites_df['Longitude'].mean()},
+            zoom=8
+        ),
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=500
+    )
+    return fig
+
+
+# ===============================
+# Station comparison
+# ===============================
+
+def station_small_multiples(aligned_df, y_title, columns=4):
+    """One small line chart per station (columns of ``aligned_df``) sharing the time and value axes."""
+    long = aligned_df.rename_axis('Time').reset_index().melt(id_vars='Time', var_name='Station', value_name=y_title)
+    rows = -(-aligned_df.shape[1] // columns)
+    fig = px.line(long, x='Time', y=y_title, facet_col='Station', facet_col_wrap=columns, render_mode='webgl',
+                  facet_row_spacing=min(0.08, 0.5 / max(rows, 1)), template="plotly_white")
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=", 1)[-1]))
+    fig.update_traces(line=dict(color='#005f73', width=1))
+    fig.update_layout(height=max(300, 180 * rows), margin=dict(l=10, r=10, t=30, b=10))
+    return fig
+
+
+def station_overlay(aligned_df, y_title):
+    """All stations on one chart."""
+    fig = px.line(aligned_df, render_mode='webgl', template="plotly_white")
+    fig.update_layout(height=400, yaxis_title=y_title, xaxis_title=None, legend_title_text='Station',
+                      margin=dict(l=10, r=10, t=30, b=10))
+    return fig
+
+
+def correlation_matrix_heatmap(matrix, title):
+    """Station-by-station correlation matrix."""
+    fig = px.imshow(matrix, text_auto=".2f", zmin=-1, zmax=1, color_continuous_scale="RdBu_r",
+                    labels={"color": "Correlation"}, title=title)
+    fig.update_layout(autosize=True, margin=dict(l=10, r=10, t=40, b=10), font=dict(size=10))
+    return fig
@@ -0,0 +1,290 @@
+"""
+Parquet observation store with an embedded SQL engine (DuckDB).
+
+Sonde exports are stored once, in the compact schema of :mod:`flowcast.schema`,
+as Parquet files partitioned by month::
+
+    warehouse/month=2024-03/<source>.parquet
+
+``<source>`` is the start of the export's content hash (see
+:func:`flowcast.storage.content_key`), so storing the same file twice is a
+no-op; every row carries it in a ``Source`` column.
+
+:func:`query` runs SQL over the ``observations`` view, which DuckDB scans
+straight from the Parquet files.  Filters on ``month`` skip whole partitions,
+other predicates and the selected columns are pushed into the scan (row
+groups are skipped on their min/max statistics), and aggregations run on all
+cores, spilling to ``warehouse/.tmp`` beyond ``FLOWCAST_SQL_MEMORY_MB``.
+Nothing is loaded into pandas except the result, and :func:`query_arrow`
+(or ``arrow=True``) skips pandas altogether for results that are only
+displayed (see :mod:`flowcast.tables`).
+
+The Comparative Analysis section is built on :func:`monthly_averages`,
+:func:`correlations` and :func:`month_rows`; the Data Query page runs
+ad-hoc SQL.  ``FLOWCAST_WAREHOUSE_DIR`` moves the store.
+"""
+import functools
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from flowcast import metrics, storage
+from flowcast.assets import APP_DIR
+
+WAREHOUSE_DIR = Path(os.environ.get("FLOWCAST_WAREHOUSE_DIR", APP_DIR / "warehouse"))
+MEMORY_LIMIT_MB = int(os.environ.get("FLOWCAST_SQL_MEMORY_MB", 1024))
+TABLE = "observations"
+
+SOURCE_ID_LENGTH = 16
+# Rows per Parquet row group: the unit DuckDB skips on min/max statistics.
+ROW_GROUP_ROWS = 64 * 1024
+MONTH_FORMAT = '%Y-%m'
+MONTH_LABEL_FORMAT = '%B %Y'
+# Statement types run_sql accepts (DESCRIBE, SHOW, SUMMARIZE and PRAGMA parse as SELECT).
+READ_ONLY_STATEMENTS = ('SELECT', 'EXPLAIN')
+
+_lock = threading.Lock()
+_databases = {}
+_local = threading.local()
+
+
+def quote(name):
+    """Quote a column name for SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _files(root):
+    return root.glob("month=*/*.parquet")
+
+
+def _create_view(con, root):
+    if any(_files(root)):
+        pattern = (root / "month=*" / "*.parquet").as_posix().replace("'", "''")
+        con.execute(
+            f"CREATE OR REPLACE VIEW {TABLE} AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true, "
+            f"hive_types = {{'month': VARCHAR}}, union_by_name = true)")
+        return True
+    # Placeholder until the first file is stored, so queries fail on columns rather than on the glob.
+    con.execute(f"CREATE OR REPLACE VIEW {TABLE} AS "
+                f"SELECT NULL::TIMESTAMP AS Timestamp, NULL::VARCHAR AS Source, NULL::VARCHAR AS month WHERE false")
+    return False
+
+
+def _connect(root):
+    """A new DuckDB connection with the ``observations`` view over ``root``; returns ``(connection, has_files)``."""
+    import duckdb
+
+    con = duckdb.connect()
+    con.execute(f"SET threads = {os.cpu_count() or 1}")
+    con.execute(f"SET memory_limit = '{MEMORY_LIMIT_MB}MB'")
+    con.execute(f"SET temp_directory = '{(root / '.tmp').as_posix()}'")
+    return con, _create_view(con, root)
+
+
+def _database(root):
+    """``[connection, has_files]`` of the in-process DuckDB database over ``root``, created once."""
+    with _lock:
+        database = _databases.get(root)
+        if database is None:
+            database = _databases[root] = list(_connect(root))
+        elif not database[1] and any(_files(root)):
+            # Files written by another process (or replica) since the view was created.
+            database[1] = _create_view(database[0], root)
+        return database
+
+
+def _cursor(root):
+    # DuckDB connections are not safe to share between threads; each
+    # Streamlit script thread gets its own cursor on the shared database.
+    con, _ = _database(root)
+    cursors = getattr(_local, "cursors", None)
+    if cursors is None:
+        cursors = _local.cursors = {}
+    cursor = cursors.get(root)
+    if cursor is None:
+        cursor = cursors[root] = con.cursor()
+    return cursor
+
+
+def query(sql, params=None, root=None):
+    """Result of ``sql`` (which may read the ``observations`` view) as a frame."""
+    root = Path(root or WAREHOUSE_DIR)
+    with metrics.timed("flowcast_sql_seconds", "Warehouse SQL query time.", kind="app"):
+        return _cursor(root).execute(sql, params).df()
+
+
+def query_arrow(sql, params=None, root=None):
+    """Result of ``sql`` as a ``pyarrow.Table`` (no pandas conversion)."""
+    root = Path(root or WAREHOUSE_DIR)
+    with metrics.timed("flowcast_sql_seconds", "Warehouse SQL query time.", kind="app"):
+        return _cursor(root).execute(sql, params).to_arrow_table()
+
+
+def run_sql(sql, max_rows=10_000, root=None, arrow=False):
+    """
+    Run one user-supplied read-only statement; returns ``(frame of at most max_rows rows, truncated)``.
+
+    With ``arrow=True`` the result is a ``pyarrow.Table`` instead of a frame.
+
+    Only queries are run (``SELECT``/``WITH``/``FROM``, ``DESCRIBE``,
+    ``SHOW``, ``SUMMARIZE``, ``EXPLAIN``, see :data:`READ_ONLY_STATEMENTS`);
+    anything else, ``COPY ... TO`` and ``ATTACH`` included, is rejected
+    before it runs.  Each call also gets its own database that can read only
+    the store, so a query cannot touch other files or other users' queries.
+
+    Raises
+    ------
+    duckdb.Error
+        If the statement is invalid or not permitted
+        (``duckdb.PermissionException`` when it is not a single query).
+    """
+    import duckdb
+
+    statements = duckdb.extract_statements(sql)
+    if len(statements) != 1:
+        raise duckdb.PermissionException(f"Expected one statement, got {len(statements)}.")
+    if statements[0].type.name not in READ_ONLY_STATEMENTS:
+        raise duckdb.PermissionException(f"Only queries are allowed, not {statements[0].type.name} statements.")
+    root = Path(root or WAREHOUSE_DIR)
+    con, _ = _connect(root)
+    try:
+        con.execute("SET allowed_directories = ?", [[f"{root.as_posix()}/"]])
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+        with metrics.timed("flowcast_sql_seconds", "Warehouse SQL query time.", kind="ad_hoc"):
+            limited = con.sql(sql).limit(max_rows + 1)
+            result = limited.to_arrow_table() if arrow else limited.df()
+    finally:
+        con.close()
+    return result[:max_rows], len(result) > max_rows
+
+
+def columns(root=None):
+    """Column names of the ``observations`` view."""
+    return list(query(f"DESCRIBE {TABLE}", root=root)['column_name'])
+
+
+def source_id(key):
+    """Source id of an export with content key ``key``."""
+    return key[:SOURCE_ID_LENGTH]
+
+
+def has_source(source, root=None):
+    """Whether the export ``source`` is already stored."""
+    root = Path(root or WAREHOUSE_DIR)
+    return any(root.glob(f"month=*/{source}.parquet"))
+
+
+def store_frame(frame, source, root=None):
+    """
+    Store a compact-schema frame as export ``source``; returns the files written.
+
+    Rows without a timestamp are dropped; each month is written sorted by
+    time, so the row-group statistics on ``Timestamp`` are tight ranges.
+
+    Raises
+    ------
+    ValueError
+        If ``frame`` has no ``Timestamp`` column (the export had no date column).
+    """
+    root = Path(root or WAREHOUSE_DIR)
+    if 'Timestamp' not in frame.columns:
+        raise ValueError("The uploaded data must include a 'Date' or 'Date (MM/DD/YYYY)' column.")
+    frame = frame[frame['Timestamp'].notna()]
+    codes, months = pd.factorize(frame['Timestamp'].dt.to_period('M'))
+    written = []
+    for i, month in enumerate(months):
+        part = frame[codes == i].sort_values('Timestamp', kind='stable').assign(Source=source)
+        path = root / f"month={month.strftime(MONTH_FORMAT)}" / f"{source}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        # Microsecond timestamps read as DuckDB's TIMESTAMP type.
+        part.to_parquet(tmp, index=False, coerce_timestamps='us', row_group_size=ROW_GROUP_ROWS)
+        os.replace(tmp, path)
+        written.append(path)
+    return written
+
+
+@functools.lru_cache(maxsize=None)
+def store_file(path, root=None):
+    """Store the sonde export at ``path`` (once per process); returns its source id."""
+    with open(path, 'rb') as fh:
+        source = source_id(storage.content_key(fh.read()))
+    if not has_source(source, root):
+        store_frame(storage.ingest_csv(path, required=(), compact=True).frame, source, root)
+    return source
+
+
+def store_upload(uploaded_file, session=None, progress=None, root=None):
+    """Store an uploaded export unless already stored; returns its source id."""
+    source = source_id(storage.upload_key(uploaded_file, session))
+    if not has_source(source, root):
+        dataset = storage.load_upload(uploaded_file, session, required=(), progress=progress, compact=True)
+        store_frame(dataset.frame, source, root)
+    return source
+
+
+def _month_start(label):
+    return pd.to_datetime(label, format=MONTH_LABEL_FORMAT)
+
+
+def _filters(sources, start, end, root):
+    """SQL ``WHERE`` clause and parameters selecting ``sources`` in ``[start, end]`` at non-negative depth."""
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end) + pd.Timedelta(days=1)
+    clauses = [
+        f"Source IN ({', '.join('?' * len(sources))})",
+        # Partition pruning: only the month directories in range are read.
+        "month BETWEEN ? AND ?",
+        "Timestamp >= ? AND Timestamp < ?",
+    ]
+    params = [*sources, start.strftime(MONTH_FORMAT), (end - pd.Timedelta(days=1)).strftime(MONTH_FORMAT),
+              start.to_pydatetime(), end.to_pydatetime()]
+    if 'Depth m' in columns(root):
+        clauses.append(f"{quote('Depth m')} >= 0")
+    return " AND ".join(clauses), params
+
+
+def monthly_averages(sources, parameters, start, end, root=None):
+    """
+    Mean of each of ``parameters`` per month for the exports ``sources``.
+
+    Returns a frame with a ``Month`` label ("March 2024") and one column per
+    parameter, in calendar order; the SQL counterpart of
+    :func:`flowcast.analytics.monthly_averages`.
+    """
+    where, params = _filters(sources, start, end, root)
+    averages = ", ".join(f"avg({quote(p)}) AS {quote(p)}" for p in parameters)
+    df = query(f"SELECT date_trunc('month', Timestamp) AS month_start, {averages} FROM {TABLE} "
+               f"WHERE {where} GROUP BY month_start ORDER BY month_start", params, root)
+    df.insert(0, 'Month', df.pop('month_start').dt.strftime(MONTH_LABEL_FORMAT))
+    return df
+
+
+def _month_filters(sources, month, root):
+    start = _month_start(month)
+    return _filters(sources, start, start + pd.offsets.MonthEnd(0), root)
+
+
+def correlations(sources, parameters, month, root=None):
+    """Pearson correlation matrix of ``parameters`` in ``month`` (a ``Month`` label)."""
+    where, params = _month_filters(sources, month, root)
+    pairs = [(a, b) for i, a in enumerate(parameters) for b in parameters[i + 1:]]
+    if not pairs:
+        return pd.DataFrame(1.0, index=parameters, columns=parameters)
+    values = query(f"SELECT {', '.join(f'corr({quote(a)}, {quote(b)})' for a, b in pairs)} FROM {TABLE} "
+                   f"WHERE {where}", params, root).iloc[0].to_numpy()
+    matrix = pd.DataFrame(1.0, index=parameters, columns=parameters)
+    for (a, b), value in zip(pairs, values):
+        matrix.loc[a, b] = matrix.loc[b, a] = value
+    return matrix
+
+
+def month_rows(sources, month, columns, root=None, arrow=False):
+    """Observations of ``sources`` in ``month`` (a ``Month`` label), restricted to ``columns``; Arrow if ``arrow``."""
+    where, params = _month_filters(sources, month, root)
+    selected = ", ".join(quote(c) for c in ['Timestamp', *columns])
+    return (query_arrow if arrow else query)(f"SELECT {selected} FROM {TABLE} WHERE {where} ORDER BY Timestamp", params, root)
+
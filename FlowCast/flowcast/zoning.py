@@ -0,0 +1,234 @@
+"""
+Fish-kill risk zones: spatial clusters of readings with critical predicted conditions.
+
+Counting breaching rows overstates risk wherever the boat lingers: one slow
+pass through a hypoxic patch yields hundreds of rows.  :func:`risk_zones`
+instead clusters the breaching readings (any of
+:func:`flowcast.models.critical_masks`) with DBSCAN and describes each
+cluster as one zone: its outline, area, first and last reading, the
+conditions breached and how severe they got.
+
+DBSCAN runs on a grid-hash index.  Readings are first snapped to cells a
+quarter of ``radius`` wide and each occupied cell becomes one weighted
+point, so a stationary cast or a slow pass costs no more than a single
+reading; the density of a point is the number of readings within
+``radius``.  Neighbour candidates are then looked up in the 3 x 3 block of
+``radius``-wide cells around each point (a sorted array of cell keys and
+``np.searchsorted``), which bounds the work per point and needs no
+pairwise distance matrix.  Core points within ``radius`` of each other form
+one cluster (``scipy.sparse.csgraph.connected_components``); non-core
+points join a neighbouring cluster or are left out as isolated readings.
+
+A zone's outline is the convex hull of its points buffered by half the
+radius, so it has an area even for points along a line.
+"""
+import numpy as np
+import pandas as pd
+
+from flowcast import metrics
+from flowcast.interpolation import project, unproject
+from flowcast.models import CRITICAL_HIGH_TEMP, CRITICAL_LOW_ODO, CRITICAL_LOW_PH, critical_masks
+
+# Readings within this many metres are neighbours.
+ZONE_RADIUS = 50.0
+# Readings (the point itself included) within ZONE_RADIUS that make a point a zone core.
+ZONE_MIN_SAMPLES = 5
+
+# Readings closer than ZONE_RADIUS / THINNING are merged into one weighted point.
+THINNING = 4
+# Vertices of the polygon that buffers each point of a zone outline.
+BUFFER_VERTICES = 8
+
+CONDITIONS = {
+    'low_odo': f'Low ODO (< {CRITICAL_LOW_ODO} mg/L)',
+    'high_temp': f'High temperature (> {CRITICAL_HIGH_TEMP} °C)',
+    'low_ph': f'Low pH (< {CRITICAL_LOW_PH})',
+}
+
+
+# ===============================
+# Clustering
+# ===============================
+
+def _cell_keys(cells):
+    """One int64 per integer cell, ordered by row then column."""
+    cells = cells - cells.min(axis=0) + 1
+    width = int(cells[:, 1].max()) + 2
+    return cells[:, 0] * width + cells[:, 1], width
+
+
+def thin(xy, size):
+    """
+    Merge points that share a ``size``-wide grid cell.
+
+    Returns ``(centres, weights, inverse)``: the mean position and number of
+    points of each occupied cell, and the cell of every input point.
+    """
+    keys, _ = _cell_keys(np.floor(xy / size).astype(np.int64))
+    _, inverse, weights = np.unique(keys, return_inverse=True, return_counts=True)
+    centres = np.column_stack([np.bincount(inverse, weights=xy[:, i]) / weights for i in range(2)])
+    return centres, weights, inverse
+
+
+def neighbour_pairs(xy, radius):
+    """
+    All ordered pairs ``(i, j)`` of points at most ``radius`` apart, ``i == j`` included.
+
+    Uses a grid hash of ``radius``-wide cells: only the 3 x 3 cells around
+    each point are searched.
+    """
+    n = len(xy)
+    keys, width = _cell_keys(np.floor(xy / radius).astype(np.int64))
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    rows, cols = [], []
+    for offset in (dx * width + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+        lo = np.searchsorted(sorted_keys, keys + offset, 'left')
+        counts = np.searchsorted(sorted_keys, keys + offset, 'right') - lo
+        i = np.repeat(np.arange(n), counts)
+        within = np.arange(len(i)) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(lo, counts) + within]
+        close = ((xy[i] - xy[j]) ** 2).sum(axis=1) <= radius ** 2
+        rows.append(i[close])
+        cols.append(j[close])
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def dbscan(xy, radius, min_samples, weights=None):
+    """
+    DBSCAN cluster labels of ``xy`` (metres); ``-1`` marks noise.
+
+    ``weights`` counts each point as that many samples towards the density
+    of its neighbours (see :func:`thin`).  Labels are numbered from 0.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n = len(xy)
+    labels = np.full(n, -1)
+    if not n:
+        return labels
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    i, j = neighbour_pairs(xy, radius)
+    core = np.bincount(i, weights=weights[j], minlength=n) >= min_samples
+    if not core.any():
+        return labels
+
+    linked = core[i] & core[j]
+    graph = coo_matrix((np.ones(linked.sum(), dtype=bool), (i[linked], j[linked])), shape=(n, n))
+    _, components = connected_components(graph, directed=False)
+    _, labels[core] = np.unique(components[core], return_inverse=True)
+    # Border points take the cluster of (one of) their core neighbours.
+    border = ~core[i] & core[j]
+    labels[i[border]] = labels[j[border]]
+    return labels
+
+
+# ===============================
+# Zones
+# ===============================
+
+def _outline(xy, radius):
+    """Convex hull of ``xy`` buffered by ``radius / 2``; returns ``(vertices, area in m²)``."""
+    from scipy.spatial import ConvexHull
+
+    angles = np.linspace(0, 2 * np.pi, BUFFER_VERTICES, endpoint=False)
+    ring = radius / 2 * np.column_stack([np.cos(angles), np.sin(angles)])
+    if len(xy) > 2:
+        xy = xy[ConvexHull(xy).vertices] if np.linalg.matrix_rank(xy - xy[0]) == 2 else xy
+    buffered = (xy[:, None, :] + ring[None, :, :]).reshape(-1, 2)
+    hull = ConvexHull(buffered)
+    vertices = buffered[hull.vertices]
+    return np.vstack([vertices, vertices[:1]]), hull.volume
+
+
+def _severity(zones):
+    """Worst breach of each zone relative to its threshold (0 = at the threshold)."""
+    odo = (CRITICAL_LOW_ODO - zones['Min Predicted ODO mg/L']) / CRITICAL_LOW_ODO
+    temp = (zones['Max Predicted Temp °C'] - CRITICAL_HIGH_TEMP) / CRITICAL_HIGH_TEMP
+    ph = (CRITICAL_LOW_PH - zones['Min Predicted pH']) / CRITICAL_LOW_PH
+    return pd.concat([odo, temp, ph], axis=1).max(axis=1).clip(lower=0)
+
+
+@metrics.timed("flowcast_risk_zoning_seconds", "Fish-kill risk zoning time.")
+def risk_zones(prediction_df, radius=ZONE_RADIUS, min_samples=ZONE_MIN_SAMPLES):
+    """
+    Cluster readings with critical predicted conditions into risk zones.
+
+    Parameters
+    ----------
+    prediction_df : DataFrame
+        Output of :func:`flowcast.models.predict_water_quality`, with
+        ``Latitude`` and ``Longitude``; a ``Timestamp`` column adds the
+        time span of each zone.
+    radius : float
+        Neighbourhood radius in metres.
+    min_samples : int
+        Breaching readings within ``radius`` needed to start a zone.
+
+    Returns
+    -------
+    (zones, isolated)
+        ``zones`` has one row per zone, most severe first: ``Zone``,
+        ``Samples``, one boolean column per key of
+        :func:`~flowcast.models.critical_masks` and the matching sample
+        counts (``low_odo samples``, ...), ``Area km²``, ``Start``, ``End``,
+        ``Duration``, the extreme predicted values, ``Severity``, the centre
+        ``Latitude``/``Longitude`` and ``Polygon`` (closed ``(lat, lon)``
+        vertex array).  ``isolated`` is the number of breaching readings
+        outside every zone.
+    """
+    masks = critical_masks(prediction_df)
+    breach = masks['low_odo'] | masks['high_temp'] | masks['low_ph']
+    located = breach & prediction_df['Latitude'].notna() & prediction_df['Longitude'].notna()
+    points = prediction_df[located]
+    empty = pd.DataFrame(columns=['Zone', 'Samples', *CONDITIONS, *(f'{key} samples' for key in CONDITIONS),
+                                  'Area km²', 'Severity', 'Polygon'])
+    if points.empty:
+        return empty, int(breach.sum())
+
+    lat = points['Latitude'].to_numpy(dtype=float)
+    lon = points['Longitude'].to_numpy(dtype=float)
+    origin = (float(lat.mean()), float(lon.mean()))
+    centres, weights, cell = thin(project(lat, lon, origin), radius / THINNING)
+    labels = dbscan(centres, radius, min_samples, weights)[cell]
+    clustered = labels >= 0
+    isolated = int(breach.sum() - clustered.sum())
+    if not clustered.any():
+        return empty, isolated
+
+    members = points[clustered].assign(_zone=labels[clustered])
+    for key in CONDITIONS:
+        members[key] = masks[key][located].to_numpy()[clustered]
+    aggregations = {
+        'Samples': ('_zone', 'size'),
+        'Min Predicted ODO mg/L': ('Predicted ODO mg/L', 'min'),
+        'Max Predicted Temp °C': ('Predicted Temp °C', 'max'),
+        'Min Predicted pH': ('Predicted pH', 'min'),
+        'Latitude': ('Latitude', 'mean'),
+        'Longitude': ('Longitude', 'mean'),
+        **{f'{key} samples': (key, 'sum') for key in CONDITIONS},
+    }
+    if 'Timestamp' in members.columns:
+        aggregations.update(Start=('Timestamp', 'min'), End=('Timestamp', 'max'))
+    zones = members.groupby('_zone').agg(**aggregations)
+    for key in CONDITIONS:
+        zones.insert(zones.columns.get_loc(f'{key} samples'), key, zones[f'{key} samples'] > 0)
+    if 'Start' in zones.columns:
+        zones['Duration'] = zones['End'] - zones['Start']
+
+    # Outlines from the thinned points of each zone.
+    centre_labels = np.full(len(centres), -1)
+    centre_labels[cell[clustered]] = labels[clustered]
+    polygons, areas = [], []
+    for zone in zones.index:
+        vertices, area = _outline(centres[centre_labels == zone], radius)
+        polygons.append(np.column_stack(unproject(vertices, origin)))
+        areas.append(area / 1e6)
+    zones['Area km²'] = areas
+    zones['Polygon'] = polygons
+    zones['Severity'] = _severity(zones)
+
+    zones = zones.sort_values(['Severity', 'Samples'], ascending=False).reset_index(drop=True)
+    zones.insert(0, 'Zone', np.arange(1, len(zones) + 1))
+    return zones, isolated
@@ -1,4 +1,6 @@
 import streamlit as st
+from flowcast.assets import inject_css
+from flowcast.images import show_image
 
 IMAGE1 = "media/boat1.jpg"
 IMAGE2 = "media/boat2.jpg"
@@ -11,236 +13,9 @@ IMAGE7 = "media/jesus-pic.jpeg"
 st.set_page_config(page_title="Project Background", layout="wide",
                    page_icon="🌊", initial_sidebar_state="expanded")
 
-# Custom CSS for styling
-st.markdown(
-    """
-    <style>
-        /* General Styles */
+# Shared and page styles (assets/css), served as a cached static stylesheet
+inject_css("background")
 
-        .hero-title {
-            font-size: 2.8rem;
-            font-weight: bold;
-            color: white;
-            text-align: center;
-            background: linear-gradient(135deg, #005f73, #0a9396);
-            padding: 20px;
-            border-radius: 15px;
-            margin-bottom: 30px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-            font-family: "Consolas", monospace;
-            animation: fadeIn 1.5s ease-in-out;
-        }
-        .section-header {
-            font-size: 2.5rem;
-            text-align: center;
-            margin-top: 40px;
-            margin-bottom: 20px;
-            color: #005f73;
-            font-family: "Consolas", monospace;
-        }
-        .divider {
-            border: 0;
-            height: 1px;
-            background: linear-gradient(to right, #005f73, #0a9396, #005f73);
-            margin: 30px 0;
-        }
-        .card {
-            background-color: white;
-            padding: 20px;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-            margin-bottom: 20px;
-            transition: transform 0.2s ease-in-out, box-shadow 0.2s ease-in-out;
-            font-family: "Consolas", monospace;
-        }
-        .card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.2);
-        }
-        .card img {
-            border-radius: 10px;
-            transition: transform 0.3s ease-in-out, box-shadow 0.3s ease-in-out;
-        }
-        .card img:hover {
-            transform: scale(1.02);
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.2);
-        }
-        .rounded-image {
-            border-radius: 10px;
-        }
-        .back-to-top {
-            text-align: center;
-            margin-top: 30px;
-        }
-        .back-to-top a {
-            text-decoration: none;
-            font-size: 1.2rem;
-            color: #0a9396;
-            font-weight: bold;
-        }
-        .back-to-top a:hover {
-            color: #005f73;
-            text-decoration: underline;
-        }
-        /* Animation */
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-                transform: translateY(20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-# Custom CSS for Styling and Sidebar
-st.markdown(
-    """
-    <style>
-        /* General Styles */
-        body {
-            margin: 0;
-            padding: 0;
-        }
-        .section-header {
-            font-size: 2.5rem;
-            text-align: center;
-            margin-top: 50px;
-            margin-bottom: 20px;
-            color: #005f73;
-            font-family: "Consolas", monospace;
-        }
-        .divider {
-            border-top: 1px solid #ccc;
-            margin: 30px 0;
-        }
-        /* Hero Section */
-        .hero-section {
-            position: relative;
-            background: linear-gradient(135deg, rgba(0, 95, 115, 0.9), rgba(10, 147, 150, 0.9)), url('media/FIU_Banner.png');
-            background-size: cover;
-            background-position: center;
-            color: white;
-            text-align: center;
-            padding: 100px 20px;
-            border-radius: 10px;
-            animation: fadeIn 1.5s ease-in-out;
-            margin-bottom: 0; /* Removes the light gray gap */
-        }
-        .hero-title {
-            font-size: 3.5rem;
-            font-weight: bold;
-            margin-bottom: 15px;
-            color: white;
-        }
-        .hero-subtitle {
-            font-size: 1.5rem;
-            margin-bottom: 40px;
-        }
-        .button-container a {
-            text-decoration: none;
-        }
-        .button-container button {
-            margin: 0 10px;
-            padding: 12px 30px;
-            font-size: 1rem;
-            color: white;
-            background-color: #0a9396;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: transform 0.3s ease-in-out, background-color 0.3s;
-        }
-        .button-container button:hover {
-            background-color: white;
-            color: #005f73;
-            transform: scale(1.05);
-        }
-        /* Cards */
-        .card {
-            background: white;
-            padding: 20px;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-            transition: transform 0.3s ease-in-out, box-shadow 0.3s;
-        }
-        .card:hover {
-            transform: translateY(-10px);
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3);
-        }
-        .card img {
-            border-radius: 15px;
-            width: 100%;
-        }
-        .card p {
-            margin-top: 10px;
-        }
-        /* Animation */
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-                transform: translateY(20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        /* Sidebar Styling */
-        [data-testid="stSidebar"] {
-            background-color: #0a9396; /* Match the lighter blue from the banner gradient */
-            color: #005f73;
-            padding: 20px;
-            font-family: "Consolas", monospace;
-        }
-
-        [data-testid="stSidebar"] h3 {
-            color: white;
-            font-weight: bold;
-            margin-bottom: 20px;
-            font-family: "Consolas", monospace;
-        }
-
-        [data-testid="stSidebar"] label {
-            font-size: 1rem;
-            color: white;
-        }
-
-        [data-testid="stSidebar"] button {
-            background-color: #005f73;
-            color: white;
-            font-size: 1rem;
-            border-radius: 8px;
-            padding: 10px 15px;
-            margin: 10px 0;
-            border: none;
-            cursor: pointer;
-            transition: transform 0.2s, background-color 0.3s;
-        }
-
-        [data-testid="stSidebar"] button:hover {
-            background-color: #ffffff;
-            color: #005f73;
-            transform: scale(1.05);
-        }
-
-        [data-testid="stSidebar"] .stSelectbox {
-            background-color: rgba(255, 255, 255, 0.1);
-            color: white;
-            border-radius: 8px;
-            padding: 5px;
-            margin: 10px 0;
-            font-family: "Consolas", monospace;
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
 
 
 def render_background():
@@ -385,9 +160,9 @@ def render_background():
 
 
     with col2:
-        st.image(IMAGE3, caption="The Heron collecting data nearby Haulover Beach, FL.", use_container_width=True)
-        st.image(IMAGE5, caption="Our boat completely prepared for the upcoming mission on October 25, 2024 at the "
-                                 "Biscayne Bay Campus in Miami, FL.", use_container_width=True)
+        show_image(IMAGE3, caption="The Heron collecting data nearby Haulover Beach, FL.")
+        show_image(IMAGE5, caption="Our boat completely prepared for the upcoming mission on October 25, 2024 at the "
+                                   "Biscayne Bay Campus in Miami, FL.")
 
     st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
@@ -441,9 +216,9 @@ def render_background():
         )
 
     with col4:
-        st.image(IMAGE4, caption="Our team preparing for data collection in Biscayne Bay.", use_container_width=True)
-        st.image(IMAGE6, caption="Reassembling the ASV for second deployment onto the bay.", use_container_width=True)
-        st.image(IMAGE7, caption="Preparing the ASV for third deployment onto the bay.", use_container_width=True)
+        show_image(IMAGE4, caption="Our team preparing for data collection in Biscayne Bay.")
+        show_image(IMAGE6, caption="Reassembling the ASV for second deployment onto the bay.")
+        show_image(IMAGE7, caption="Preparing the ASV for third deployment onto the bay.")
 
     st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
@@ -1,125 +1,36 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from matplotlib import pyplot as plt
-from sklearn.metrics import mean_squared_error
-from joblib import load
-import seaborn as sns
 import os
-import numpy as np
+from flowcast import (evaluation, explorer, inference, interpolation, metrics, profiles, synthetic, tables, viz,
+                      warehouse, zoning)
+from flowcast.analytics import COMPARATIVE_PARAMETERS, LOCATION_COLUMNS, STUDY_END, STUDY_START
+from flowcast.models import (FISH_KILL_FEATURES, FISH_KILL_MODEL, MULTI_OUTPUT_MODEL, WATER_QUALITY_FEATURES,
+                             WATER_QUALITY_TARGETS, assess_fish_kill, predict_water_quality as score_water_quality)
+from flowcast.schema import DATE_TIME_COLUMNS
+from flowcast.storage import MissingColumnsError, REQUIRED_COLUMNS, load_default_dataset, load_upload, missing_columns
+from flowcast.assets import inject_css
 
 # Page Configuration
 st.set_page_config(page_title="Combined Analysis", layout="wide", page_icon="🌊")
 
-# Custom CSS for Styling
-st.markdown(
-    """
-    <style>
-        /* Banner Styling */
-        .hero-title {
-            font-size: 3rem;
-            font-weight: bold;
-            color: white;
-            text-align: center;
-            background: linear-gradient(135deg, #005f73, #0a9396);
-            padding: 20px;
-            border-radius: 15px;
-            margin-bottom: 30px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-            font-family: "Consolas", monospace;
-            animation: fadeIn 1.5s ease-in-out;
-        }
-
-        /* Sidebar Styling */
-        [data-testid="stSidebar"] {
-            background-color: #0a9396; /* Lighter blue from the banner gradient */
-            color: white;
-            font-family: "Consolas", monospace;
-        }
-
-        /* Sidebar Titles */
-        [data-testid="stSidebar"] h3 {
-            color: white;
-            font-weight: bold;
-            font-family: "Consolas", monospace;
-        }
-        
-        [data-testid="stSidebar"] button {
-            background-color: #005f73;
-            color: white;
-            font-size: 1rem;
-            border-radius: 8px;
-            padding: 10px 15px;
-            margin: 10px 0;
-            border: none;
-            cursor: pointer;
-            transition: transform 0.2s, background-color 0.3s;
-        }
-
-        [data-testid="stSidebar"] button:hover {
-            background-color: #ffffff;
-            color: #005f73;
-            transform: scale(1.05);
-        }
-
-        [data-testid="stSidebar"] .stSelectbox {
-            background-color: rgba(255, 255, 255, 0.1);
-            color: white;
-            border-radius: 8px;
-            padding: 5px;
-            margin: 10px 0;
-            font-family: "Consolas", monospace;
-        }
-
-        /* Metric Box Styling */
-        .metric-box {
-            background-color: rgba(255, 255, 255, 0.1); /* Semi-transparent white */
-            border: 1px solid rgba(255, 255, 255, 0.3);
-            border-radius: 8px;
-            padding: 15px;
-            margin-bottom: 15px;
-            text-align: center;
-            color: white; /* White text for contrast */
-            font-weight: bold;
-            font-family: "Consolas", monospace;
-        }
-
-        /* Subheader Styling */
-        .styled-subheader {
-            font-size: 1.5rem;
-            font-weight: bold;
-            color: #005f73;
-            margin-bottom: 15px;
-            font-family: "Consolas", monospace;
-        }
-
-        /* Map Container Styling */
-        .map-container {
-            padding: 20px;
-            background-color: rgba(255, 255, 255, 0.95); /* Transparent white */
-            border: 2px solid #005f73;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-        }
-        /* Animation */
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-                transform: translateY(20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Shared and page styles (assets/css), served as a cached static stylesheet
+inject_css("analysis")
 
 # Banner Title
 st.markdown('<div class="hero-title">Combined Analysis</div>', unsafe_allow_html=True)
 
+# Chart rendering is timed for the runtime metrics (see flowcast.metrics)
+plotly_chart = metrics.instrument(st.plotly_chart, "flowcast_figure_render_seconds", "Figure serialization and send time.",
+                                  page="analysis")
+
+# Date and time columns read with the model inputs, for the time span of risk zones
+TIMESTAMP_COLUMNS = [column for pair in DATE_TIME_COLUMNS for column in pair]
+
+# Readings of the dummy survey (seeded, so the preview does not change between reruns; see flowcast.synthetic)
+DUMMY_ROWS = 1000
+
+# Parameters offered for interpolated surfaces
+SURFACE_PARAMETERS = ['ODO mg/L', 'Temp °C', 'pH', 'Depth m', 'Turbidity FNU', 'Chlorophyll RFU', 'Sal psu']
+
 # Dropdown for Navigation
 section = st.selectbox(
     "Choose Section", ["Data Analysis", "Predictive Analysis", "Comparative Analysis"], help="Navigate between Data, "
@@ -128,6 +39,28 @@ section = st.selectbox(
 )
 
 
+# Parse an upload once per content (see flowcast.storage), showing progress while it is read
+def load_uploaded_dataset(uploaded_file, columns=None, required=REQUIRED_COLUMNS, compact=False):
+    bar = st.empty()
+    try:
+        return load_upload(uploaded_file, st.session_state, columns, required,
+                           progress=lambda fraction: bar.progress(fraction, text=f"Reading {uploaded_file.name}..."),
+                           compact=compact)
+    finally:
+        bar.empty()
+
+
+# Add an upload to the observation store, showing progress the first time it is parsed
+def store_uploaded_file(uploaded_file):
+    bar = st.empty()
+    try:
+        return warehouse.store_upload(uploaded_file, st.session_state,
+                                      progress=lambda fraction: bar.progress(fraction,
+                                                                             text=f"Reading {uploaded_file.name}..."))
+    finally:
+        bar.empty()
+
+
 # Function for Data Analysis
 def data_analysis():
     st.markdown('<p class="styled-subheader">Data Analysis</p>', unsafe_allow_html=True)
@@ -138,23 +71,26 @@ def data_analysis():
     if dataset_toggle == "Upload Your Own":
         uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
         if uploaded_file:
-            df = pd.read_csv(uploaded_file)
+            # The header is validated before the data is parsed
+            try:
+                dataset = load_uploaded_dataset(uploaded_file)
+            except MissingColumnsError as e:
+                st.error(f"Missing column: {e.missing[0]}. Please upload a valid CSV file.")
+                return
+            except ValueError as e:
+                st.error(f"Could not read the file: {e}")
+                return
             st.success("File uploaded successfully.")
         else:
             st.warning("Please upload a CSV file to proceed.")
             return
     else:
-        df = pd.read_csv("data/oct25-2024.csv")
+        dataset = load_default_dataset()
         st.info("Using the default dataset.")
+    df = dataset.frame
 
-    # Validate Data
-    required_columns = ['Depth m', 'Temp °C', 'pH', 'ODO mg/L']
-    for column in required_columns:
-        if column not in df.columns:
-            st.error(f"Missing column: {column}. Please upload a valid CSV file.")
-            return
-
-    if df.isnull().values.any():
+    # Null counts are collected while parsing
+    if dataset.null_counts.any():
         st.warning("Data contains NaN values. Please clean your data.")
 
     # Sidebar Metrics
@@ -188,229 +124,229 @@ def data_analysis():
     )
 
     # Tabs for Visualizations
-    Scatter_Plots_tab, Maps_tab, Line_Plots_tab, threeD_Plots_tab, Raw_Plots_tab = st.tabs(
-        ["Scatter Plots", "Maps", "Line", "3D Plots", "Raw Data"]
+    Scatter_Plots_tab, Maps_tab, Line_Plots_tab, threeD_Plots_tab, Profiles_tab, Raw_Plots_tab = st.tabs(
+        ["Scatter Plots", "Maps", "Line", "3D Plots", "Depth Profiles", "Raw Data"]
     )
 
     with Scatter_Plots_tab:
         st.markdown('<p class="styled-subheader">Scatter Plot</p>', unsafe_allow_html=True)
-        fig = px.scatter(
-            df, x="Depth m", y="Temp °C", size="pH", color="ODO mg/L", color_continuous_scale=px.colors.sequential.ice
-        )
-        st.plotly_chart(fig)
+        plotly_chart(viz.depth_temperature_scatter(df))
 
     with Maps_tab:
         st.markdown('<p class="styled-subheader">Maps</p>', unsafe_allow_html=True)
         if 'Latitude' in df.columns and 'Longitude' in df.columns:
-            fig = px.scatter_mapbox(
-                df, lat="Latitude", lon="Longitude", hover_data=["Depth m", "Temp °C", "ODO mg/L"],
-                color="ODO mg/L", zoom=10, mapbox_style="carto-positron"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(viz.observation_map(df), use_container_width=True)
+            interpolated_surface(df)
         else:
             st.error("Missing 'Latitude' or 'Longitude' columns in data.")
 
     with Line_Plots_tab:
         st.markdown('<p class="styled-subheader">Line Plot</p>', unsafe_allow_html=True)
-        fig = px.line(df, x=df.index, y="ODO mg/L")
-        st.plotly_chart(fig)
+        plotly_chart(viz.odo_line(df))
 
     with threeD_Plots_tab:
         st.markdown('<p class="styled-subheader">3D Plot</p>', unsafe_allow_html=True)
-        fig = px.scatter_3d(
-            df, x="Longitude", y="Latitude", z="Depth m", color="ODO mg/L",
-            color_continuous_scale=px.colors.sequential.ice
-        )
-        st.plotly_chart(fig)
+        plotly_chart(viz.depth_3d_scatter(df))
+
+    with Profiles_tab:
+        st.markdown('<p class="styled-subheader">Depth Profiles</p>', unsafe_allow_html=True)
+        depth_profiles(df)
 
     with Raw_Plots_tab:
         st.markdown('<p class="styled-subheader">Raw Data</p>', unsafe_allow_html=True)
-        st.dataframe(df)
+        # Filtered, sorted and paged by DuckDB on the server; only the visible page is sent (see flowcast.explorer)
+        explorer.show_explorer(explorer.Explorer.frame(df), "raw_data")
 
 
-# Function for Predictive Analysis
-def predictive_analysis():
-    st.markdown('<p class="styled-subheader">Predictive Analysis</p>', unsafe_allow_html=True)
+# Casts found in the survey, their layered profiles and stratification (cached per dataset, see flowcast.profiles)
+def depth_profiles(df):
+    try:
+        result = profiles.analyse(df)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if result.casts.empty:
+        st.info("No depth casts were found in this dataset.")
+        return
+    st.write(f"**{len(result.casts)} casts** found; profiles are averaged over "
+             f"{profiles.LAYER_THICKNESS:g} m layers of each down-cast.")
+    st.dataframe(result.casts, hide_index=True)
+    parameters = [c for c in profiles.PROFILE_PARAMETERS if c in result.layers.columns]
+    column = st.selectbox("Profile parameter", parameters, key="profile_parameter")
+    plotly_chart(viz.cast_profiles(result.layers, column), use_container_width=True)
+    st.markdown('<p class="styled-subheader">Stratification</p>', unsafe_allow_html=True)
+    st.dataframe(result.stratification, hide_index=True)
+    st.write(f"""
+    **Explanation**: The thermocline and oxycline are the depths where temperature and dissolved oxygen change 
+    fastest; the mixed layer ends where temperature first differs from the surface layer by more than 
+    {profiles.MIXED_LAYER_DELTA_T} °C. Δ values are surface minus bottom.
+    """)
+
+
+# Interpolated parameter surface between the sampled points (cached per dataset, see flowcast.interpolation)
+def interpolated_surface(df):
+    st.markdown('<p class="styled-subheader">Interpolated Surface</p>', unsafe_allow_html=True)
+    parameters = [c for c in SURFACE_PARAMETERS if c in df.columns]
+    col1, col2, col3 = st.columns(3)
+    column = col1.selectbox("Parameter", parameters, key="surface_parameter")
+    method = col2.radio("Method", ["IDW", "Kriging"], horizontal=True, key="surface_method",
+                        help="Inverse-distance weighting, or ordinary kriging with a fitted variogram.")
+    resolution = col3.select_slider("Resolution", [50, 100, 200, 300, 500], value=200, key="surface_resolution")
+    try:
+        surface = interpolation.surface(df, column, method.lower(), resolution)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    plotly_chart(viz.surface_heatmap(surface, df, column), use_container_width=True)
+    if surface.variance is not None and st.checkbox("Show kriging variance", key="surface_variance"):
+        plotly_chart(viz.surface_heatmap(surface, df, column, variance=True), use_container_width=True)
+
+
+# Error and drift trends of a model over the uploads it scored (logged per model version, see flowcast.evaluation)
+def model_monitoring(name, prediction_df):
+    st.markdown('<p class="styled-subheader">Model Monitoring</p>', unsafe_allow_html=True)
+    # Drift is measured against the default dataset the first time a model version is monitored
+    monitor = evaluation.Monitor(name)
+    if monitor.reference() is None:
+        monitor.record(prediction_df, reference=load_default_dataset().frame)
+    else:
+        monitor.record(prediction_df)
+    errors, drift = evaluation.history(name)
+
+    metric = st.radio("Error metric", ["RMSE", "MAE", "Bias"], horizontal=True, key=f"{name}_metric")
+    plotly_chart(viz.evaluation_trends(errors, metric), use_container_width=True)
+    plotly_chart(viz.drift_trends(drift), use_container_width=True)
+    latest = drift[drift['Version'] == monitor.version].groupby('Feature')['PSI'].last()
+    shifted = latest[latest > evaluation.PSI_SIGNIFICANT]
+    if not shifted.empty:
+        st.warning(f"⚠️ Input drift against the reference data: {', '.join(shifted.index)}. "
+                   "Predictions for this upload may be less reliable.")
+
+    st.write(f"""
+    **Explanation**: Every uploaded file scored by this model version is logged once. The first chart shows the 
+    running {metric} of each target over all logged uploads (hover for the value of each upload); a new model file 
+    starts a new line. The second chart shows the population stability index (PSI) of each input against the 
+    reference data: below {evaluation.PSI_MODERATE} the inputs look like the data the model was checked on, above 
+    {evaluation.PSI_SIGNIFICANT} they have shifted significantly.
+    """)
+
+
+# Function to Predict Water Quality
+def predict_water_quality(df, monitor=False):
+    st.markdown('<p class="styled-subheader">Model Predictions</p>', unsafe_allow_html=True)
+    st.write("""
+    **Explanation**: Displayed below are the predicted and actual values for the water quality metrics: `Depth m`, `Temp °C`, 
+    `pH`, and `ODO mg/L`. This comparison provides insights into the model's prediction accuracy.
+    """)
+
+    if missing_columns(df, WATER_QUALITY_FEATURES):
+        st.error(
+            "The dataset must contain the following columns: Latitude, Longitude, Depth m, Temp °C, pH, ODO mg/L.")
+        return
+
+    # Load the multi-output model (or score through the inference service, see flowcast.inference)
+    if not os.path.exists(MULTI_OUTPUT_MODEL):
+        st.error(f"Model file {MULTI_OUTPUT_MODEL} not found. Train the model first.")
+        return
+    model = inference.model(MULTI_OUTPUT_MODEL)
+
+    # Make predictions
+    prediction_df = score_water_quality(df, model)
+
+    st.markdown('<p class="styled-subheader">Predicted Values for All Variables</p>', unsafe_allow_html=True)
+    tables.show_table(prediction_df, "water_quality_predictions",
+                      columns=WATER_QUALITY_FEATURES + [f'Predicted {col}' for col in WATER_QUALITY_TARGETS])
 
-    # Preloaded Dummy Data
-    def generate_dummy_data():
-        data = {
-            'Latitude': np.random.uniform(25.0, 26.0, 100),
-            'Longitude': np.random.uniform(-80.0, -79.0, 100),
-            'Depth m': np.random.uniform(0, 50, 100),
-            'Temp °C': np.random.uniform(15, 30, 100),
-            'pH': np.random.uniform(6.5, 8.5, 100),
-            'ODO mg/L': np.random.uniform(4, 12, 100),
-        }
-        return pd.DataFrame(data)
-
-    # Function to Predict Water Quality
-    def predict_water_quality(df):
-        st.markdown('<p class="styled-subheader">Model Predictions</p>', unsafe_allow_html=True)
-        st.write("""
-        **Explanation**: Displayed below are the predicted and actual values for the water quality metrics: `Depth m`, `Temp °C`, 
-        `pH`, and `ODO mg/L`. This comparison provides insights into the model's prediction accuracy.
+    st.write("""
+    **Explanation**: This table shows the input features and model-predicted values for all four target variables: 
+    `Depth m`, `Temp °C`, `pH`, and `ODO mg/L`. Compare these predictions with the actual values to evaluate accuracy.
+    """)
+
+    # Visualize Predictions for Each Variable
+    for actual_col in WATER_QUALITY_TARGETS:
+        st.markdown(f'<p class="styled-subheader">Actual vs Predicted {actual_col}</p>', unsafe_allow_html=True)
+        plotly_chart(viz.actual_vs_predicted(prediction_df, actual_col), use_container_width=True)
+
+        st.write(f"""
+        **Explanation**: This scatter plot compares the actual vs. predicted values for `{actual_col}`. Points closer 
+        to the red dashed line indicate better predictions, while points far from the line represent higher errors.
         """)
 
-        # Select relevant features for prediction
-        features = ['Latitude', 'Longitude', 'Depth m', 'Temp °C', 'pH', 'ODO mg/L']
-        target_columns = ['Depth m', 'Temp °C', 'pH', 'ODO mg/L']
+    # Fish Kill Risk Trends
+    st.markdown('<p class="styled-subheader">Fish Kill Risk Trends</p>', unsafe_allow_html=True)
+
+    # Cluster readings with critical conditions into zones (see flowcast.zoning)
+    zones, isolated = zoning.risk_zones(prediction_df)
+    for key, name in zoning.CONDITIONS.items():
+        affected = zones[zones[key].astype(bool)]
+        st.write(f"🔴 **{name}**: {len(affected)} zones ({int(affected[f'{key} samples'].sum())} readings)")
+    if isolated:
+        st.write(f"Isolated readings outside any zone: {isolated}")
+
+    st.write(f"""
+    **Explanation**: These trends highlight how many zones have critical water quality conditions that pose a risk to fish. 
+    A zone is a patch where at least {zoning.ZONE_MIN_SAMPLES} critical readings lie within {zoning.ZONE_RADIUS:.0f} m 
+    of each other, so repeated readings in one patch count once. Low dissolved oxygen is the primary driver of fish 
+    kills, while high temperatures and low pH exacerbate stress and mortality.
+    """)
+
+    # Map Risk Zones
+    st.markdown('<p class="styled-subheader">Fish Kill Risk Zones</p>', unsafe_allow_html=True)
+    st.write("""
+                    **Explanation**: This map outlines zones where water quality conditions meet critical thresholds for fish kills. 
+                    Redder areas indicate more severe conditions.
+                    """)
+    if not zones.empty:
+        plotly_chart(viz.critical_zone_map(zones), use_container_width=True)
+        st.dataframe(zones.drop(columns=['Polygon', *zoning.CONDITIONS]), hide_index=True)
+    else:
+        st.success("✅ No zones were found with conditions likely to cause fish kills.")
 
-        if not all(col in df.columns for col in features):
-            st.error(
-                "The dataset must contain the following columns: Latitude, Longitude, Depth m, Temp °C, pH, ODO mg/L.")
-            return
+    if monitor:
+        model_monitoring('water_quality', prediction_df)
 
-        X = df[features]
-
-        # Load the multi-output model
-        model_file = 'models/multi_output_model.pkl'
-        if os.path.exists(model_file):
-            from joblib import load
-            model = load(model_file)
-
-            # Make predictions
-            predictions = model.predict(X)
-            prediction_df = df.copy()
-            for i, col in enumerate(target_columns):
-                prediction_df[f'Predicted {col}'] = predictions[:, i]
-
-            st.markdown('<p class="styled-subheader">Predicted Values for All Variables</p>', unsafe_allow_html=True)
-            st.dataframe(prediction_df[features + [f'Predicted {col}' for col in target_columns]])
-
-            st.write("""
-            **Explanation**: This table shows the input features and model-predicted values for all four target variables: 
-            `Depth m`, `Temp °C`, `pH`, and `ODO mg/L`. Compare these predictions with the actual values to evaluate accuracy.
-            """)
-
-            # Visualize Predictions for Each Variable
-            for actual_col in target_columns:
-                predicted_col = f'Predicted {actual_col}'
-                st.markdown(f'<p class="styled-subheader">Actual vs Predicted {actual_col}</p>', unsafe_allow_html=True)
-
-                # Scatter Plot
-                scatter_fig = px.scatter(
-                    x=prediction_df[actual_col],
-                    y=prediction_df[predicted_col],
-                    labels={"x": f"Actual {actual_col}", "y": f"Predicted {actual_col}"},
-                    title=f"Actual vs Predicted {actual_col}",
-                    template="plotly_white",
-                )
-                scatter_fig.add_shape(
-                    type="line",
-                    x0=prediction_df[actual_col].min(), y0=prediction_df[actual_col].min(),
-                    x1=prediction_df[actual_col].max(), y1=prediction_df[actual_col].max(),
-                    line=dict(color="Red", dash="dash"),
-                )
-                st.plotly_chart(scatter_fig, use_container_width=True)
-
-                st.write(f"""
-                **Explanation**: This scatter plot compares the actual vs. predicted values for `{actual_col}`. Points closer 
-                to the red dashed line indicate better predictions, while points far from the line represent higher errors.
-                """)
-
-            # Fish Kill Risk Trends
-            st.markdown('<p class="styled-subheader">Fish Kill Risk Trends</p>', unsafe_allow_html=True)
-
-            # Identify critical thresholds for risks
-            low_odo_count = prediction_df[prediction_df['Predicted ODO mg/L'] < 4].shape[0]
-            high_temp_count = prediction_df[prediction_df['Predicted Temp °C'] > 30].shape[0]
-            low_ph_count = prediction_df[prediction_df['Predicted pH'] < 6.5].shape[0]
-
-            st.write(f"🔴 **Low Dissolved Oxygen (< 4 mg/L)**: {low_odo_count} zones")
-            st.write(f"🔴 **High Temperature (> 30 °C)**: {high_temp_count} zones")
-            st.write(f"🔴 **Low pH (< 6.5)**: {low_ph_count} zones")
-
-            st.write("""
-            **Explanation**: These trends highlight how many zones have critical water quality conditions that pose a risk to fish. 
-            Low dissolved oxygen is the primary driver of fish kills, while high temperatures and low pH exacerbate stress and mortality.
-            """)
-
-            # Map Risk Zones
-            st.markdown('<p class="styled-subheader">Fish Kill Risk Zones</p>', unsafe_allow_html=True)
-            st.write("""
-                            **Explanation**: This map highlights zones where water quality conditions meet critical thresholds for fish kills. 
-                            Redder areas indicate greater risk based on low dissolved oxygen levels.
-                            """)
-            risk_zones = prediction_df[
-                (prediction_df['Predicted ODO mg/L'] < 4) |
-                (prediction_df['Predicted Temp °C'] > 30) |
-                (prediction_df['Predicted pH'] < 6.5)
-                ]
-            if not risk_zones.empty:
-                risk_fig = px.scatter_mapbox(
-                    risk_zones,
-                    lat="Latitude", lon="Longitude",
-                    color="Predicted ODO mg/L",
-                    size="Predicted Temp °C",
-                    hover_data=["Predicted Depth m", "Predicted pH", "Predicted Temp °C"],
-                    color_continuous_scale="reds",
-                    mapbox_style="carto-positron",
-                    zoom=8,
-                    title="Prone Areas to Potential Fish Kills"
-                )
-                st.plotly_chart(risk_fig, use_container_width=True)
-            else:
-                st.success("✅ No zones were found with conditions likely to cause fish kills.")
 
-        else:
-            st.error(f"Model file {model_file} not found. Train the model first.")
-
-    # Function to Assess Fish Kill Risk
-    def predict_fish_kill(df):
-        st.markdown('<p class="styled-subheader">Fish Kill Risk Assessment</p>', unsafe_allow_html=True)
-
-        # Select relevant features for prediction
-        features = df[['Depth m', 'Temp °C', 'pH', 'ODO mg/L']]
-        st.write(
-            "**Features used for prediction**: Depth (m), Temperature (°C), pH Levels, and Dissolved Oxygen (ODO mg/L)")
-        st.dataframe(features.head())
-
-        # Check if model exists
-        model_file = 'models/data.pkl'
-        if os.path.exists(model_file):
-            model = load(model_file)
-
-            # Make predictions
-            predictions = model.predict(features)
-            df['Predicted ODO mg/L'] = predictions
-
-            # Assess Fish Kill Risk
-            df['Risk Level'] = df['Predicted ODO mg/L'].apply(
-                lambda odo: 'High' if odo < 4 else 'Moderate' if odo < 6 else 'Low'
-            )
-
-            # Display Risk Summary
-            st.write("**Risk Level Summary**")
-            st.dataframe(df['Risk Level'].value_counts())
-
-            # Map Visualization
-            st.markdown('<p class="styled-subheader">Risk Level Map</p>', unsafe_allow_html=True)
-            fig = px.scatter_mapbox(
-                df,
-                lat="Latitude",
-                lon="Longitude",
-                color="Risk Level",
-                color_discrete_map={
-                    "Low": "green",
-                    "Moderate": "yellow",
-                    "High": "red",
-                },
-                hover_data=["Depth m", "Temp °C", "pH", "Predicted ODO mg/L"],
-                zoom=8,
-                mapbox_style="carto-positron",
-            )
-            st.plotly_chart(fig, use_container_width=True)
-
-            # Display Risk Messages
-            if 'High' in df['Risk Level'].values:
-                st.warning("⚠️ Areas with High Risk of Fish Kill detected. Immediate action recommended.")
-            elif 'Moderate' in df['Risk Level'].values:
-                st.info("⚠️ Areas with Moderate Risk of Fish Kill detected. Monitoring required.")
-            else:
-                st.success("✅ All areas show Low Risk of Fish Kill.")
-        else:
-            st.error(f"Model file {model_file} not found. Train the model first.")
+# Function to Assess Fish Kill Risk
+def predict_fish_kill(df, monitor=False):
+    st.markdown('<p class="styled-subheader">Fish Kill Risk Assessment</p>', unsafe_allow_html=True)
+
+    # Select relevant features for prediction
+    st.write(
+        "**Features used for prediction**: Depth (m), Temperature (°C), pH Levels, and Dissolved Oxygen (ODO mg/L)")
+    st.dataframe(df[FISH_KILL_FEATURES].head())
+
+    # Check if model exists
+    if not os.path.exists(FISH_KILL_MODEL):
+        st.error(f"Model file {FISH_KILL_MODEL} not found. Train the model first.")
+        return
+    model = inference.model(FISH_KILL_MODEL)
+
+    # Make predictions and assess Fish Kill Risk
+    df = assess_fish_kill(df, model)
+
+    # Display Risk Summary
+    st.write("**Risk Level Summary**")
+    st.dataframe(df['Risk Level'].value_counts())
+
+    # Map Visualization
+    st.markdown('<p class="styled-subheader">Risk Level Map</p>', unsafe_allow_html=True)
+    plotly_chart(viz.risk_level_map(df), use_container_width=True)
+
+    # Display Risk Messages
+    if 'High' in df['Risk Level'].values:
+        st.warning("⚠️ Areas with High Risk of Fish Kill detected. Immediate action recommended.")
+    elif 'Moderate' in df['Risk Level'].values:
+        st.info("⚠️ Areas with Moderate Risk of Fish Kill detected. Monitoring required.")
+    else:
+        st.success("✅ All areas show Low Risk of Fish Kill.")
+
+    if monitor:
+        model_monitoring('fish_kill', df)
+
+
+# Function for Predictive Analysis
+def predictive_analysis():
+    st.markdown('<p class="styled-subheader">Predictive Analysis</p>', unsafe_allow_html=True)
 
     # Toggle between Predictive Options
     option = st.selectbox("Choose Analysis Type", ["Water Quality Prediction", "Fish Kill Risk Assessment"])
@@ -422,17 +358,28 @@ def predictive_analysis():
     if data_toggle == "Upload CSV File":
         uploaded_file = st.file_uploader("Upload a CSV file for prediction", type=["csv"])
         if uploaded_file is not None:
-            df = pd.read_csv(uploaded_file)
+            # Only the model inputs and timestamps are parsed, as float32 (see flowcast.schema)
+            required = FISH_KILL_FEATURES if option == "Fish Kill Risk Assessment" else ()
+            try:
+                df = load_uploaded_dataset(uploaded_file, WATER_QUALITY_FEATURES + TIMESTAMP_COLUMNS, required,
+                                           compact=True).frame
+            except MissingColumnsError as e:
+                st.error(f"The dataset must contain the following columns: {', '.join(e.missing)}.")
+                return
+            except ValueError as e:
+                st.error(f"Could not read the file: {e}")
+                return
             st.success("File uploaded successfully.")
+            # Uploads come with observed values, so their errors and input drift are logged
             if option == "Water Quality Prediction":
-                predict_water_quality(df)
+                predict_water_quality(df, monitor=True)
             elif option == "Fish Kill Risk Assessment":
-                predict_fish_kill(df)
+                predict_fish_kill(df, monitor=True)
         else:
             st.warning("Please upload a CSV file to get predictions.")
     else:
         st.write("Using preloaded dummy data for predictions.")
-        dummy_df = generate_dummy_data()
+        dummy_df = synthetic.survey(DUMMY_ROWS, seed=0, missing=0)[['Timestamp'] + WATER_QUALITY_FEATURES]
         st.dataframe(dummy_df.head())
         if option == "Water Quality Prediction":
             predict_water_quality(dummy_df)
@@ -445,21 +392,6 @@ def comparative_analysis():
     st.markdown('<p class="styled-subheader">Comparative Analysis: March 2024 - October 2024</p>',
                 unsafe_allow_html=True)
 
-    st.markdown(
-        """
-        <style>
-        .info-container {
-            background-color: #f7f9fa;
-            padding: 15px;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-            margin-bottom: 20px;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
     # File uploader for data files
     uploaded_files = st.file_uploader(
         "Upload water quality data files (March 2024 - October 2024)",
@@ -471,58 +403,36 @@ def comparative_analysis():
         st.info("Please upload CSV files for analysis.")
         return
 
-    # Combine uploaded files into a single DataFrame
-    combined_df = pd.DataFrame()
-    for file in uploaded_files:
-        temp_df = pd.read_csv(file)
-        combined_df = pd.concat([combined_df, temp_df], ignore_index=True)
-
-        # Ensure 'Date' or 'Date (MM/DD/YYYY)' column exists and filter for the date range
-        # Check for the correct date column
-        if 'Date' in combined_df.columns:
-            date_column = 'Date'
-        elif 'Date (MM/DD/YYYY)' in combined_df.columns:
-            date_column = 'Date (MM/DD/YYYY)'
-        else:
-            st.error("The uploaded data must include a 'Date' or 'Date (MM/DD/YYYY)' column.")
-            return
-
-        # Ensure the date column is properly parsed
-        combined_df[date_column] = pd.to_datetime(combined_df[date_column], errors='coerce')
-        filtered_df = combined_df[
-            (combined_df[date_column] >= '2024-03-01') & (combined_df[date_column] <= '2024-10-31')
-            ]
-
-        if filtered_df.empty:
-            st.warning("No data available for the specified date range.")
-            return
-
-        # Rename date column for consistency
-        filtered_df = filtered_df.rename(columns={date_column: 'Date'})
+    # Store the uploads in the Parquet observation store (once per file); the month filters, averages and
+    # correlations below run as SQL over the stored files (see flowcast.warehouse)
+    try:
+        sources = [store_uploaded_file(file) for file in uploaded_files]
+    except ValueError as e:
+        st.error(str(e))
+        return
 
-    # Focus on the four key parameters
-    key_parameters = ['ODO mg/L', 'pH', 'Chlorophyll RFU']
-    available_columns = [col for col in key_parameters if col in filtered_df.columns]
+    # Focus on the key parameters (negative depths are dropped)
+    available_columns = [col for col in COMPARATIVE_PARAMETERS if col in warehouse.columns()]
+    monthly_avg = warehouse.monthly_averages(sources, available_columns, STUDY_START, STUDY_END)
+    if monthly_avg.empty:
+        st.warning("No data available for the specified date range.")
+        return
+    available_columns = [col for col in available_columns if monthly_avg[col].notna().any()]
     if not available_columns:
         st.error("The uploaded data does not contain the required parameters: ODO mg/L, pH, Chlorophyll RFU.")
         return
-    filtered_df = filtered_df[['Date', 'Latitude', 'Longitude', 'Depth m'] + available_columns]
-
-    # Handle invalid depth values (e.g., negative values)
-    if 'Depth m' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Depth m'] >= 0]  # Filter out negative depths
 
     # Dropdown for Month Selection
-    filtered_df['Month'] = filtered_df['Date'].dt.strftime('%B %Y')
     selected_month = st.selectbox(
         "Select a month to view data:",
-        options=filtered_df['Month'].unique(),
+        options=list(monthly_avg['Month']),
     )
-    month_data = filtered_df[filtered_df['Month'] == selected_month]
+    month_table = warehouse.month_rows(sources, selected_month, LOCATION_COLUMNS[1:] + available_columns, arrow=True)
 
-    # Dataframe Preview for Selected Month
+    # Dataframe Preview for Selected Month (pages of the Arrow result; the map below needs pandas)
     st.markdown(f'<p class="styled-subheader">Dataset for {selected_month}</p>', unsafe_allow_html=True)
-    st.dataframe(month_data)
+    tables.show_table(month_table, "month_rows")
+    month_data = month_table.to_pandas()
 
     # Geospatial Depth Visualization
     st.markdown(f'<p class="styled-subheader">Geospatial Depth Visualization</p>', unsafe_allow_html=True)
@@ -538,19 +448,7 @@ def comparative_analysis():
     )
 
     if 'Latitude' in month_data.columns and 'Longitude' in month_data.columns and 'Depth m' in month_data.columns:
-        fig = px.scatter_mapbox(
-            month_data,
-            lat='Latitude',
-            lon='Longitude',
-            color='Depth m',
-            size='Depth m',
-            color_continuous_scale="Viridis",
-            size_max=15,
-            zoom=6,
-            mapbox_style="carto-positron",
-            title=f"Geo-Depth Map for {selected_month}",
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(viz.depth_map(month_data, selected_month), use_container_width=True)
     else:
         st.warning(
             "The dataset must contain 'Latitude', 'Longitude', and 'Depth m' columns for geospatial visualization.")
@@ -568,16 +466,7 @@ def comparative_analysis():
         "and evaluate whether specific months exhibit unusual behavior that warrants further investigation."
     )
 
-    monthly_avg = filtered_df.groupby('Month')[available_columns].mean().reset_index()
-    avg_fig = px.bar(
-        monthly_avg,
-        x='Month',
-        y=available_columns,
-        title="Key Parameters",
-        template="plotly_white",
-        barmode='group',
-    )
-    st.plotly_chart(avg_fig, use_container_width=True)
+    plotly_chart(viz.monthly_average_bars(monthly_avg, available_columns), use_container_width=True)
 
     # Correlation Heatmap
     st.markdown(f'<p class="styled-subheader">Correlation Heatmap</p>', unsafe_allow_html=True)
@@ -593,25 +482,8 @@ def comparative_analysis():
         "point to biochemical processes affecting oxygen levels in the water."
     )
 
-    corr = month_data[available_columns].corr()
-
-    # Use Plotly for an interactive, scalable heatmap
-    fig = px.imshow(
-        corr,
-        text_auto=".2f",
-        color_continuous_scale="icefire",
-        labels={"color": "Correlation"},
-        title=f"Correlation Between Parameters in {selected_month}",
-    )
-
-    # Adjust layout for better scalability
-    fig.update_layout(
-        autosize=True,
-        margin=dict(l=10, r=10, t=40, b=10),
-        font=dict(size=10),
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    corr = warehouse.correlations(sources, available_columns, selected_month)
+    plotly_chart(viz.correlation_heatmap(corr, selected_month), use_container_width=True)
 
     # Boxplots for Key Parameters
     st.markdown('<h3 class="styled-subheader">Boxplots for Distribution Analysis</h3>', unsafe_allow_html=True)
@@ -626,14 +498,7 @@ def comparative_analysis():
     )
 
     for column in available_columns:
-        fig = px.box(
-            month_data,
-            y=column,
-            title=f"Distribution of {column} in {selected_month}",
-            template="plotly_white",
-            labels={column: column},
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(viz.parameter_box(month_data, column, selected_month), use_container_width=True)
 
     # Summary of Observations
     st.markdown('<p class="styled-subheader">Summary of Observations</p>', unsafe_allow_html=True)
@@ -645,9 +510,10 @@ def comparative_analysis():
 
 
 # Display the selected section
-if section == "Data Analysis":
-    data_analysis()
-elif section == "Predictive Analysis":
-    predictive_analysis()
-elif section == "Comparative Analysis":
-    comparative_analysis()
+with metrics.timed("flowcast_rerun_seconds", "Page script run time.", page="analysis", section=section):
+    if section == "Data Analysis":
+        data_analysis()
+    elif section == "Predictive Analysis":
+        predictive_analysis()
+    elif section == "Comparative Analysis":
+        comparative_analysis()
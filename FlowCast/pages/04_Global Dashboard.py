@@ -1,188 +1,28 @@
 import streamlit as st
 import pandas as pd
-import requests
-import matplotlib.pyplot as plt
-import folium
-from folium import Map, Popup, Marker, Icon
-from streamlit_folium import st_folium
-from folium.plugins import MarkerCluster, FastMarkerCluster
+from flowcast import cache, explorer, http_client, metrics, storage, viz
+from flowcast.lazy import lazy_import
 from datetime import datetime
+from flowcast.comparison import (align, aligned_frame, differences, lagged_correlations, ndbc_series, peak_lags,
+                                 station_summary)
+from flowcast.forecast import forecast_series, ndbc_timestamps
+from flowcast.ingest import fetch_ndbc_station, fetch_ndbc_stations
+from flowcast.assets import inject_css
 
-API_URL = "https://www.ndbc.noaa.gov/data/realtime2/<station_id>.txt"
+# The map library loads on first use, not on every cold start of the page
+folium = lazy_import("folium")
 
 st.set_page_config(page_title="API Retrievals", layout="wide", page_icon="🌊", initial_sidebar_state="expanded")
 
-# Custom CSS for consistent banner, optimized layout, and active sidebar highlighting
-st.markdown(
-    """
-    <style>
-        /* Consistent Banner */
-        .hero-title {
-            font-size: 3rem;
-            font-weight: bold;
-            color: white;
-            text-align: center;
-            background: linear-gradient(135deg, #005f73, #0a9396);
-            padding: 20px;
-            border-radius: 15px;
-            margin-bottom: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-            font-family: "Consolas", monospace;
-            animation: fadeIn 1.5s ease-in-out;
-        }
-        
-        .hero-subtitle {
-            font-size: 1.5rem;
-            font-weight: bold;
-            color: white;
-            text-align: center;
-            background: linear-gradient(135deg, #005f73, #0a9396);
-            padding: 20px;
-            border-radius: 15px;
-            margin-bottom: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-            font-family: "Consolas", monospace;
-            animation: fadeIn 1.5s ease-in-out;
-        }
-
-        /* Consistent Subtitle and Subheader Styles */
-        .styled-subheader {
-            font-size: 1.4rem;
-            font-weight: bold;
-            color: #005f73;
-            margin: 5px 0;
-            font-family: "Consolas", monospace;
-        }
-        
-        /* Consistent Caption Styles */
-        .styled-caption {
-            font-size: 1.2rem;
-            font-weight: bold;
-            color: #005f73;
-            margin: 5px 0;
-            font-family: "Consolas", monospace;
-        }
-
-        /* Divider Style */
-        .divider {
-            border-top: 2px solid #005f73;
-            margin: 10px 0;
-        }
-
-        /* Center Text */
-        .center-text {
-            text-align: center;
-            margin: 0;
-            font-family: "Consolas", monospace;
-        }
-
-        /* Sidebar Styling */
-        [data-testid="stSidebar"] {
-            background-color: #0a9396;
-            color: white;
-            padding: 20px;
-            font-family: "Consolas", monospace;
-        }
-
-        [data-testid="stSidebar"] h3 {
-            color: white;
-            font-weight: bold;
-            margin-bottom: 15px;
-            font-family: "Consolas", monospace;
-            
-        }
-
-        [data-testid="stSidebar"] label {
-            font-size: 1rem;
-            color: white;
-            font-family: "Consolas", monospace;
-        }
-
-        [data-testid="stSidebar"] button {
-            background-color: #005f73;
-            color: white;
-            font-size: 1rem;
-            border-radius: 8px;
-            padding: 10px 15px;
-            margin: 10px 0;
-            border: none;
-            cursor: pointer;
-            transition: transform 0.2s, background-color 0.3s;
-            font-family: "Consolas", monospace;
-        }
-
-        [data-testid="stSidebar"] button:hover {
-            background-color: #ffffff;
-            color: #005f73;
-            transform: scale(1.05);
-        }
-
-        [data-testid="stSidebar"] .stSelectbox {
-            background-color: rgba(255, 255, 255, 0.1);
-            color: white;
-            border-radius: 8px;
-            padding: 5px;
-            margin: 10px 0;
-            font-family: "Consolas", monospace;
-        }
-
-        /* Highlight Active Sidebar Item */
-        .sidebar-item.active {
-            background-color: #005f73;
-            color: white;
-            padding: 10px 15px;
-            border-radius: 8px;
-            font-weight: bold;
-            margin-bottom: 10px;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-        }
-
-        .sidebar-item {
-            padding: 10px 15px;
-            color: white;
-            font-weight: bold;
-            margin-bottom: 10px;
-            cursor: pointer;
-            transition: background-color 0.3s, transform 0.2s;
-            font-family: "Consolas", monospace;
-        }
+# Shared and page styles (assets/css), served as a cached static stylesheet
+inject_css("dashboard")
 
-        .sidebar-item:hover {
-            background-color: #ffffff;
-            color: #005f73;
-            transform: scale(1.05);
-        }
+# Chart rendering is timed for the runtime metrics (see flowcast.metrics), labelled by figure
+def plotly_chart(fig, figure, **kwargs):
+    with metrics.timed("flowcast_figure_render_seconds", "Figure serialization and send time.", page="dashboard",
+                       figure=figure):
+        return st.plotly_chart(fig, **kwargs)
 
-        /* Card Styling */
-        .card {
-            background-color: white;
-            padding: 20px;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-            margin-bottom: 20px;
-            transition: transform 0.2s ease-in-out, box-shadow 0.2s ease-in-out;
-            font-family: "Consolas", monospace;
-        }
-
-        .card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.2);
-        }
-        /* Animation */
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-                transform: translateY(20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
 
 # Function to display all the buoys fetched from the station
 def display_buoy_map(regions_hierarchy, selected_region="All Regions", selected_station=None, current_data=None):
@@ -190,6 +30,9 @@ def display_buoy_map(regions_hierarchy, selected_region="All Regions", selected_
     Display a Folium map with buoys for a specific region or all regions.
     Ensures the map is properly centered and zoomed.
     """
+    from folium.plugins import MarkerCluster
+    from streamlit_folium import st_folium
+
     # Default map center and zoom
     center_lat, center_lon = 27.5, -60.0
     zoom_level = 2
@@ -245,7 +88,9 @@ def display_buoy_map(regions_hierarchy, selected_region="All Regions", selected_
             ).add_to(marker_cluster)
 
     # Render the map within Streamlit
-    return st_folium(buoy_map, width=800, height=600)
+    with metrics.timed("flowcast_figure_render_seconds", "Figure serialization and send time.", page="dashboard",
+                       figure="buoy_map"):
+        return st_folium(buoy_map, width=800, height=600)
 
 
 
@@ -456,20 +301,20 @@ def get_regions_hierarchy():
     }
 
 
-@st.cache_data
+# Station data is cached for every replica of the app (see flowcast.cache); NDBC updates the files every ~10 minutes
+@cache.cached("ndbc_station", ttl=600)
+def station_frame(station_id):
+    metrics.count("flowcast_station_cache_misses_total", documentation="fetch_station_data calls not served from cache.")
+    return fetch_ndbc_station(station_id)
+
+
 def fetch_station_data(station_id):
-    """Fetch station data and cache the result."""
-    headers = {"Accept-Encoding": "gzip"}
-    response = requests.get(API_URL.replace("<station_id>", station_id), headers=headers)
-    if response.status_code == 200:
-        data = response.text.splitlines()
-        columns = ['YY', 'MM', 'DD', 'hh', 'mm', 'WDIR', 'WSPD', 'GST', 'WVHT', 'DPD', 'APD', 'MWD',
-                   'PRES', 'ATMP', 'WTMP', 'DEWP', 'VIS', 'PTDY', 'TIDE']
-        df = pd.DataFrame([x.split() for x in data[2:] if x.strip() != ''], columns=columns)
-        df = df.apply(pd.to_numeric, errors='coerce', axis=1)
-        return df
-    st.error("Failed to fetch data from NOAA API.")
-    return None
+    """Fetch station data through the shared cache (failures are not cached)."""
+    try:
+        return station_frame(station_id)
+    except http_client.HTTPError as e:
+        st.error(f"Failed to fetch data from NOAA API: {e}")
+        return None
 
 # Function for the legend and what each means
 def legend_status():
@@ -496,6 +341,37 @@ def legend_status():
 
     st.markdown(legend_html, unsafe_allow_html=True)
 
+@cache.cached("station_forecast", ttl=3600,
+              key=lambda df_api, column, horizon: (storage.frame_key(df_api, list(df_api.columns)), column, horizon))
+def station_forecast(df_api, column, horizon):
+    """Fit the station's history for one column and forecast it (cached per station data)."""
+    series = df_api[column].set_axis(ndbc_timestamps(df_api))
+    return forecast_series(series, horizon=horizon, level=0.9)
+
+
+# Function to forecast water temperature for the selected station
+def forecast_section(df_api):
+    st.markdown('<div class="styled-subheader">Water Temperature Forecast</div>', unsafe_allow_html=True)
+    st.markdown("""
+                        <div class="card">
+                            <p style="color:#252323;">
+                                The forecast is produced by a seasonal exponential smoothing model fitted on the station's
+                                recent hourly history. The shaded band shows the 90% prediction interval, which widens as the
+                                forecast looks further ahead.
+                            </p>
+                        </div>
+                    """, unsafe_allow_html=True)
+
+    horizon = st.slider("Forecast horizon (hours)", min_value=6, max_value=72, value=24, step=6)
+    history, forecast = station_forecast(df_api, "WTMP", horizon)
+    if forecast is None:
+        st.info("Not enough recent water temperature history to produce a forecast for this station.")
+        return
+
+    fig = viz.forecast_chart(history.iloc[-72:], forecast, 'Observed WTMP', "Water Temperature (°C)")
+    plotly_chart(fig, "forecast", use_container_width=True)
+
+
 # Function to render data from NOAA API
 def render_API():
     """Render NOAA data with selectable region and station."""
@@ -510,6 +386,7 @@ def render_API():
     if selected_station:
         station_id = regions_hierarchy[selected_region][selected_station]["id"]
         with st.spinner("Fetching data..."):
+            metrics.count("flowcast_station_lookups_total", documentation="fetch_station_data calls.")
             df_api = fetch_station_data(station_id)
             if df_api is not None:
                 current_data = {
@@ -529,7 +406,7 @@ def render_API():
                 #Fetched data info
                 data_describe()
                 st.markdown(f'<div class="styled-caption">Data Table</div>', unsafe_allow_html=True)
-                st.dataframe(df_api)
+                explorer.show_explorer(explorer.Explorer.frame(df_api), "station_data")
 
                 # Descriptive stats
                 stats_describe(df_api)
@@ -571,6 +448,11 @@ def render_API():
                 st.line_chart(df_api[["WTMP", "APD", "ATMP", "WSPD"]])
                 legend_status()
 
+                # =========================================
+                # Short-term forecast
+                # =========================================
+                forecast_section(df_api)
+
                 st.download_button(
                     label="Download Data as CSV",
                     data=df_api.to_csv(index=False),
@@ -588,5 +470,97 @@ def render_API():
         display_buoy_map(regions_hierarchy)
 
 
+# Parameters offered in the station comparison, with their axis titles
+COMPARE_PARAMETERS = {
+    "WTMP": "Water Temperature (°C)",
+    "ATMP": "Air Temperature (°C)",
+    "WSPD": "Wind Speed (m/s)",
+    "WVHT": "Wave Height (m)",
+    "APD": "Average Wave Period (s)",
+    "PRES": "Sea Level Pressure (hPa)",
+}
+
+# Grid steps offered for aligning the stations
+COMPARE_STEPS = {"1 hour": "1h", "3 hours": "3h", "6 hours": "6h", "1 day": "1D"}
+
+
+@cache.cached("ndbc_station_series", ttl=600)
+def fetch_station_series(station_ids, column):
+    """One column of several stations, fetched concurrently; only the series are cached, not the raw frames."""
+    metrics.count("flowcast_station_cache_misses_total", len(station_ids),
+                  documentation="fetch_station_data calls not served from cache.")
+    frames, errors = fetch_ndbc_stations(station_ids)
+    series = {sid: ndbc_series(df, column) for sid, df in frames.items() if column in df.columns}
+    return series, {sid: str(e) for sid, e in errors.items()}
+
+
+# Function to compare several stations side by side
+def compare_stations():
+    """Align the selected stations on one time grid and compare them."""
+    st.markdown('<div class="hero-title">Compare Stations</div>', unsafe_allow_html=True)
+
+    # One entry per buoy (some buoys appear in two regions)
+    stations = {}
+    for region in get_regions_hierarchy().values():
+        for name, info in region.items():
+            stations.setdefault(info["id"], name)
+    names = {sid: f"{name} ({sid})" for sid, name in stations.items()}
+
+    selected = st.sidebar.multiselect("Select Stations", list(names), default=list(names)[:4],
+                                      format_func=names.get)
+    column = st.sidebar.selectbox("Select Parameter", list(COMPARE_PARAMETERS), format_func=COMPARE_PARAMETERS.get)
+    step = st.sidebar.selectbox("Time Step", list(COMPARE_STEPS))
+    if len(selected) < 2:
+        st.info("Select at least two stations to compare.")
+        return
+
+    with st.spinner("Fetching data..."):
+        metrics.count("flowcast_station_lookups_total", len(selected), documentation="fetch_station_data calls.")
+        series, errors = fetch_station_series(tuple(selected), column)
+    for sid, error in errors.items():
+        st.warning(f"{names[sid]}: {error}")
+    series = {sid: s for sid, s in series.items() if not s.empty}
+    if len(series) < 2:
+        st.error(f"Fewer than two of the selected stations currently report {COMPARE_PARAMETERS[column]}.")
+        return
+
+    aligned = align(series, COMPARE_STEPS[step])
+    frame = aligned_frame(aligned, names)
+    y_title = COMPARE_PARAMETERS[column]
+
+    st.markdown('<div class="styled-subheader">Station Summary</div>', unsafe_allow_html=True)
+    st.dataframe(station_summary(aligned, names).style.format(precision=2).format("{:.0%}", subset=["coverage"]))
+
+    overlay_tab, multiples_tab, differences_tab, correlation_tab = st.tabs(
+        ["Overlay", "Small Multiples", "Differences", "Lagged Correlation"])
+
+    with overlay_tab:
+        plotly_chart(viz.station_overlay(frame, y_title), "station_overlay", use_container_width=True)
+
+    with multiples_tab:
+        plotly_chart(viz.station_small_multiples(frame, y_title), "station_small_multiples", use_container_width=True)
+
+    with differences_tab:
+        reference = st.selectbox("Reference Station", list(series), format_func=names.get)
+        plotly_chart(viz.station_overlay(differences(aligned, reference, names), f"Difference from "
+                                                                                 f"{names[reference]}"),
+                     "station_differences", use_container_width=True)
+
+    with correlation_tab:
+        max_lag = st.slider(f"Maximum lag (steps of {step})", min_value=1, max_value=48, value=24)
+        lags, corr = lagged_correlations(aligned, max_lag=max_lag, min_periods=min(24, aligned.values.shape[1]))
+        matrix = pd.DataFrame(corr[max_lag], index=frame.columns, columns=frame.columns)
+        plotly_chart(viz.correlation_matrix_heatmap(matrix, f"Correlation of {column} at lag 0"),
+                     "station_correlation", use_container_width=True)
+        st.markdown(f'<div class="styled-caption">Strongest correlation within ±{max_lag} steps '
+                    f'(positive lag: the second station follows the first)</div>', unsafe_allow_html=True)
+        st.dataframe(peak_lags(aligned, lags, corr, names), hide_index=True)
+
+
 # Render the API function
-render_API()
+view = st.sidebar.radio("View", ["Single Station", "Compare Stations"])
+with metrics.timed("flowcast_rerun_seconds", "Page script run time.", page="dashboard", view=view):
+    if view == "Compare Stations":
+        compare_stations()
+    else:
+        render_API()
@@ -0,0 +1,89 @@
+import time
+
+import streamlit as st
+from flowcast import explorer, metrics, tables, warehouse
+from flowcast.assets import inject_css
+from flowcast.storage import DEFAULT_DATASET
+
+# Page Configuration
+st.set_page_config(page_title="Data Query", layout="wide", page_icon="🌊")
+
+# Shared and page styles (assets/css), served as a cached static stylesheet
+inject_css("analysis")
+
+# Banner Title
+st.markdown('<div class="hero-title">Data Query</div>', unsafe_allow_html=True)
+
+MAX_ROWS = 10_000
+
+EXAMPLE_QUERY = """SELECT month, Source, count(*) AS samples,
+       avg("ODO mg/L") AS odo, avg("Temp °C") AS temperature, corr("ODO mg/L", pH) AS odo_ph
+FROM observations
+WHERE month BETWEEN '2024-03' AND '2024-10'
+GROUP BY ALL
+ORDER BY month, Source"""
+
+
+# Function for adding files to the observation store
+def store_files():
+    # The shipped dataset is always available; uploads add more sources
+    warehouse.store_file(DEFAULT_DATASET)
+    uploaded_files = st.file_uploader("Add sonde CSV files to the store", type=["csv"], accept_multiple_files=True)
+    for uploaded_file in uploaded_files or []:
+        try:
+            warehouse.store_upload(uploaded_file, st.session_state)
+        except ValueError as e:
+            st.error(f"{uploaded_file.name}: {e}")
+
+
+# Function for browsing the stored observations without SQL
+def browse_observations():
+    st.write(
+        "Browse every stored sonde observation. Filters and sorting run on the server over the stored files (a "
+        "`Timestamp` filter reads only the matching months); only the page on screen is sent to the browser."
+    )
+    explorer.show_explorer(explorer.Explorer.warehouse(), "observations")
+
+
+# Function for the SQL workspace
+def query_workspace():
+    st.write(
+        "Run SQL over every stored sonde observation. The `observations` view has one row per sample, one column per "
+        "sensor channel, a `Timestamp`, the `Source` file id and the `month` partition (`'2024-03'`); filtering on "
+        "`month` reads only the matching files. Queries can read the observation store only."
+    )
+
+    with st.sidebar:
+        st.markdown("<h3>observations</h3>", unsafe_allow_html=True)
+        st.dataframe(warehouse.query(f"DESCRIBE {warehouse.TABLE}")[['column_name', 'column_type']],
+                     hide_index=True)
+
+    sql = st.text_area("SQL", EXAMPLE_QUERY, height=180)
+    if st.button("Run Query", type="primary"):
+        start = time.perf_counter()
+        try:
+            result, truncated = warehouse.run_sql(sql, max_rows=MAX_ROWS, arrow=True)
+        except Exception as e:
+            # duckdb.Error (syntax, binding, permission); duckdb is imported lazily by flowcast.warehouse
+            st.error(str(e))
+            return
+        # Kept for the reruns triggered by paging through the result
+        st.session_state["query_result"] = (result, truncated, time.perf_counter() - start)
+    if "query_result" not in st.session_state:
+        return
+    result, truncated, elapsed = st.session_state["query_result"]
+
+    st.caption(f"{result.num_rows:,} row(s) in {elapsed * 1000:.0f} ms"
+               + (f" (showing the first {MAX_ROWS:,})" if truncated else ""))
+    # The result stays an Arrow table; only the visible page is sent (see flowcast.tables)
+    tables.show_table(result, "query_result", use_container_width=True)
+    st.download_button("Download CSV", tables.csv_bytes(result), file_name="query.csv", mime="text/csv")
+
+
+with metrics.timed("flowcast_rerun_seconds", "Page script run time.", page="query"):
+    store_files()
+    browse_tab, sql_tab = st.tabs(["Browse", "SQL"])
+    with browse_tab:
+        browse_observations()
+    with sql_tab:
+        query_workspace()
@@ -3,88 +3,28 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from scipy.stats import gaussian_kde
-import requests
+from flowcast import http_client, viz
+from flowcast.forecast import forecast_series
+from flowcast.ingest import fetch_usgs_sites, fetch_usgs_water_quality
 
 
 # ===============================
-# Helper Functions
+# Data Functions
 # ===============================
 
-def safe_float_convert(value, default=0.0):
-    try:
-        numeric_part = ''.join(c for c in str(value) if c.isdigit() or c in '.-')
-        return float(numeric_part) if numeric_part else default
-    except (ValueError, TypeError):
-        return default
-
-
 # Fetch active monitoring sites
 def get_south_florida_sites():
-    base_url = "https://waterservices.usgs.gov/nwis/site/"
-    params = {
-        "format": "rdb",
-        "bBox": "-82.331,25.124,-80.031,26.947",
-        "siteStatus": "active",
-        "hasDataTypeCd": "qw",
-        "siteType": "ST,LK,SP"
-    }
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        lines = [line for line in response.text.split('\n') if line.strip() and not line.startswith('#')]
-        if len(lines) < 2:
-            return pd.DataFrame()
-        headers = lines[0].strip().split('\t')
-        sites = []
-        for line in lines[2:]:
-            values = line.strip().split('\t')
-            if len(values) == len(headers):
-                site_dict = dict(zip(headers, values))
-                site_entry = {
-                    'Site ID': site_dict.get('site_no', '').strip(),
-                    'Site Name': site_dict.get('station_nm', '').strip(),
-                    'Latitude': safe_float_convert(site_dict.get('dec_lat_va')),
-                    'Longitude': safe_float_convert(site_dict.get('dec_long_va')),
-                    'State': site_dict.get('state_cd', '').strip(),
-                    'County': site_dict.get('county_cd', '').strip()
-                }
-                if site_entry['Latitude'] != 0 and site_entry['Longitude'] != 0:
-                    sites.append(site_entry)
-        return pd.DataFrame(sites)
-    except requests.exceptions.RequestException:
+        return fetch_usgs_sites()
+    except http_client.HTTPError:
         return pd.DataFrame()
 
 
 # Fetch water quality data for a given site and parameter
 def get_usgs_water_quality(site_id, start_date, end_date, parameter_codes):
-    base_url = "https://waterservices.usgs.gov/nwis/iv/"
-    params = {
-        "format": "json",
-        "sites": site_id,
-        "startDT": start_date,
-        "endDT": end_date,
-        "parameterCd": ",".join(parameter_codes),
-        "siteStatus": "all"
-    }
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        readings = []
-        if 'value' in data and 'timeSeries' in data['value']:
-            for series in data['value']['timeSeries']:
-                parameter_name = series['variable']['variableName']
-                for value in series['values'][0]['value']:
-                    readings.append({
-                        'Timestamp': value['dateTime'],
-                        'Parameter': parameter_name,
-                        'Value': safe_float_convert(value['value']),
-                        'Unit': series['variable']['unit']['unitCode']
-                    })
-        return pd.DataFrame(readings)
-    except requests.exceptions.RequestException:
+        return fetch_usgs_water_quality(site_id, start_date, end_date, parameter_codes)
+    except http_client.HTTPError:
         return pd.DataFrame()
 
 
@@ -93,36 +33,23 @@ def get_usgs_water_quality(site_id, start_date, end_date, parameter_codes):
 # ===============================
 
 def create_site_map(sites_df):
-    fig = go.Figure(go.Scattermapbox(
-        lat=sites_df['Latitude'],
-        lon=sites_df['Longitude'],
-        mode='markers',
-        marker=go.scattermapbox.Marker(size=10, color='royalblue'),
-        text=sites_df['Site Name'],
-        hoverinfo='text'
-    ))
-    fig.update_layout(
-        mapbox=dict(
-            style="carto-positron",
-            center={"lat": sites_df['Latitude'].mean(), "lon": sites_df['Longitude'].mean()},
-            zoom=8
-        ),
-        margin={"r": 0, "t": 0, "l": 0, "b": 0},
-        height=500
-    )
-    return fig
+    return viz.site_map(sites_df)
 
 
-def create_time_series_chart(data_df, parameter):
+def create_time_series_chart(data_df, parameter, forecast_hours=None):
     filtered_data = data_df[data_df['Parameter'] == parameter]
     if filtered_data.empty:
         return None
-    filtered_data['Timestamp'] = pd.to_datetime(filtered_data['Timestamp'])
+    filtered_data['Timestamp'] = pd.to_datetime(filtered_data['Timestamp'], utc=True)
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=filtered_data['Timestamp'], y=filtered_data['Value'], mode='lines+markers',
         name=parameter, line=dict(color='blue')
     ))
+    if forecast_hours:
+        _, forecast = forecast_series(filtered_data.set_index('Timestamp')['Value'], horizon=forecast_hours)
+        if forecast is not None:
+            viz.add_forecast_band(fig, forecast, 'orange', 'rgba(255, 165, 0, 0.25)')
     fig.update_layout(title=f"Time Series for {parameter}", height=400)
     return fig
 
@@ -180,8 +107,11 @@ def main():
                 st.table(create_summary_statistics(data_df))
 
                 st.subheader("Visualizations")
+                forecast_hours = None
+                if st.checkbox("Show short-term forecast (e.g. Temperature, Dissolved Oxygen)"):
+                    forecast_hours = st.slider("Forecast horizon (hours)", min_value=6, max_value=72, value=24, step=6)
                 for param in selected_params:
-                    chart = create_time_series_chart(data_df, param)
+                    chart = create_time_series_chart(data_df, param, forecast_hours)
                     if chart:
                         st.plotly_chart(chart)
             else:
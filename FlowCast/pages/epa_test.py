@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-import requests
+from flowcast import explorer, http_client
+from flowcast.ingest import fetch_wqp_stations, fetch_wqp_results
 from datetime import date
 
 
@@ -24,43 +25,11 @@ def fetch_stations_in_area(b_box="-82.3,24.5,-80.0,26.6"):
         DataFrame with station metadata (StationID, StationName, coords, etc.).
         If no stations or an error occurs, returns an empty DataFrame.
     """
-    base_url = "https://www.waterqualitydata.us/data/Station/search"
-    params = {
-        "bBox": b_box,  # bounding box only
-        "dataProfile": "station",  # 'station' or 'simplestation'
-        "mimeType": "geojson"  # request GeoJSON format
-    }
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-    except requests.HTTPError as e:
+        return fetch_wqp_stations(b_box)
+    except http_client.HTTPError as e:
         st.error(f"Error fetching stations: {e}")
         return pd.DataFrame()
-    except Exception as e:
-        st.error(f"An unknown error occurred: {e}")
-        return pd.DataFrame()
-
-    features = data.get("features", [])
-    station_records = []
-    for feature in features:
-        props = feature.get("properties", {})
-        geom = feature.get("geometry", {})
-        coords = geom.get("coordinates", [None, None])
-
-        station_records.append({
-            "OrganizationID": props.get("organizationidentifier"),
-            "OrganizationName": props.get("organizationformalname"),
-            "StationID": props.get("stationidentifier"),
-            "StationName": props.get("stationname"),
-            "Latitude": coords[1],
-            "Longitude": coords[0],
-            "CountyName": props.get("countyname"),
-            "StateName": props.get("statename"),
-            "HUC": props.get("hydrologicunitcode")  # Hydrologic Unit Code
-        })
-
-    return pd.DataFrame(station_records)
 
 
 # =========================================================
@@ -86,42 +55,11 @@ def fetch_water_quality_data(site_id, start_date, end_date):
         DataFrame with measurement results (CharacteristicName, ResultValue, etc.).
         If no data or an error occurs, returns an empty DataFrame.
     """
-    base_url = "https://www.waterqualitydata.us/data/Result/search"
-    params = {
-        "siteid": site_id,
-        "startDateLo": start_date,
-        "startDateHi": end_date,
-        "mimeType": "json"
-    }
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-    except requests.HTTPError as e:
+        return fetch_wqp_results(site_id, start_date, end_date)
+    except http_client.HTTPError as e:
         st.error(f"Error fetching water quality data: {e}")
         return pd.DataFrame()
-    except Exception as e:
-        st.error(f"An unknown error occurred: {e}")
-        return pd.DataFrame()
-
-    results = data.get("results", [])
-    records = []
-    for r in results:
-        measure = r.get("ResultMeasure", {})
-        records.append({
-            "Organization": r.get("OrganizationIdentifier"),
-            "StationID": r.get("MonitoringLocationIdentifier"),
-            "CharacteristicName": r.get("CharacteristicName"),
-            "ResultValue": r.get("ResultMeasureValue"),
-            "ResultUnit": measure.get("MeasureUnitCode"),
-            "SampleFraction": r.get("ResultSampleFractionText"),
-            "ActivityType": r.get("ActivityTypeCode"),
-            "SampleCollectionDate": r.get("ActivityStartDate"),
-            "Latitude": r.get("LatitudeMeasure"),
-            "Longitude": r.get("LongitudeMeasure"),
-        })
-
-    return pd.DataFrame(records)
 
 
 # ==================================
@@ -188,27 +126,31 @@ def run_wqp_app():
 
         if st.button("Fetch Water Quality Data"):
             with st.spinner("Fetching water quality results..."):
-                wq_data = fetch_water_quality_data(
+                # Kept in the session so that exploring the results (reruns) does not fetch again
+                st.session_state["wq_data"] = fetch_water_quality_data(
                     station_input,
                     start_date.strftime("%Y-%m-%d"),
                     end_date.strftime("%Y-%m-%d")
                 )
-            if not wq_data.empty:
-                st.success(f"Fetched {len(wq_data)} measurement record(s).")
-                st.dataframe(wq_data.head(50))
-
-                # Simple numeric summary if 'ResultValue' is numeric
-                if "ResultValue" in wq_data.columns:
-                    # Convert to numeric where possible
-                    wq_data["NumericValue"] = pd.to_numeric(wq_data["ResultValue"], errors="coerce")
-                    numeric_only = wq_data.dropna(subset=["NumericValue"])
-                    if not numeric_only.empty:
-                        st.write("### Basic Statistics by Characteristic Name")
-                        stats_df = numeric_only.groupby("CharacteristicName")["NumericValue"].describe()
-                        st.dataframe(stats_df)
-            else:
-                st.warning("No water quality data found for this station and date range.")
-
+        wq_data = st.session_state.get("wq_data")
+        if wq_data is None:
+            return
+        if not wq_data.empty:
+            st.success(f"Fetched {len(wq_data)} measurement record(s).")
+            # Filtered, sorted and paged on the server (see flowcast.explorer)
+            explorer.show_explorer(explorer.Explorer.frame(wq_data), "wqp_results")
+
+            # Simple numeric summary if 'ResultValue' is numeric
+            if "ResultValue" in wq_data.columns:
+                # Convert to numeric where possible (on a copy: fetched frames are shared)
+                numeric_only = wq_data.assign(NumericValue=pd.to_numeric(wq_data["ResultValue"], errors="coerce"))
+                numeric_only = numeric_only.dropna(subset=["NumericValue"])
+                if not numeric_only.empty:
+                    st.write("### Basic Statistics by Characteristic Name")
+                    stats_df = numeric_only.groupby("CharacteristicName")["NumericValue"].describe()
+                    st.dataframe(stats_df)
+        else:
+            st.warning("No water quality data found for this station and date range.")
 
 if __name__ == "__main__":
     run_wqp_app()
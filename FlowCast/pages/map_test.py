@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import requests
+from flowcast.ingest import fetch_wqp_stations
 
 
 def fetch_stations_in_area(b_box="-82.3,24.5,-80.0,26.6"):
@@ -8,30 +8,8 @@ def fetch_stations_in_area(b_box="-82.3,24.5,-80.0,26.6"):
     Fetches water quality stations (sites) from the Water Quality Portal (WQP)
     using a bounding box query, requesting GeoJSON format.
     """
-    base_url = "https://www.waterqualitydata.us/data/Station/search"
-    params = {
-        "bBox": b_box,
-        "dataProfile": "station",
-        "mimeType": "geojson"
-    }
-    response = requests.get(base_url, params=params)
-    response.raise_for_status()
-    data = response.json()
-
-    features = data.get("features", [])
-    station_records = []
-    for feature in features:
-        props = feature.get("properties", {})
-        geom = feature.get("geometry", {})
-        coords = geom.get("coordinates", [None, None])
-
-        station_records.append({
-            "StationID": props.get("stationidentifier"),
-            "StationName": props.get("stationname"),
-            "Latitude": coords[1],
-            "Longitude": coords[0],
-        })
-    return pd.DataFrame(station_records)
+    stations_df = fetch_wqp_stations(b_box)
+    return stations_df[["StationID", "StationName", "Latitude", "Longitude"]] if not stations_df.empty else stations_df
 
 
 def main():
@@ -1,37 +1,18 @@
 import streamlit as st
 import pydeck as pdk
 import pandas as pd
-import requests
+from flowcast.ingest import fetch_wqp_stations
 
 
 def fetch_stations_in_area(b_box="-82.3,24.5,-80.0,26.6"):
     """
     Fetch water quality stations from the Water Quality Portal (WQP) using GeoJSON.
     """
-    base_url = "https://www.waterqualitydata.us/data/Station/search"
-    params = {
-        "bBox": b_box,
-        "dataProfile": "station",
-        "mimeType": "geojson"
-    }
-    response = requests.get(base_url, params=params)
-    response.raise_for_status()
-    data = response.json()
-
-    features = data.get("features", [])
-    station_records = []
-    for feature in features:
-        props = feature.get("properties", {})
-        geom = feature.get("geometry", {})
-        coords = geom.get("coordinates", [None, None])
-
-        station_records.append({
-            "StationID": props.get("stationidentifier"),
-            "StationName": props.get("stationname"),
-            "lat": coords[1],
-            "lon": coords[0],
-        })
-    return pd.DataFrame(station_records)
+    stations_df = fetch_wqp_stations(b_box)
+    if stations_df.empty:
+        return stations_df
+    stations_df = stations_df.rename(columns={"Latitude": "lat", "Longitude": "lon"})
+    return stations_df[["StationID", "StationName", "lat", "lon"]]
 
 
 def build_pydeck_map(df):